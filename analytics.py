@@ -0,0 +1,262 @@
+"""
+Academy analytics over the per-match stats ledger.
+
+The batting, bowling and fielding ledger rows (stats_ledger.py) are
+loaded once into NumPy arrays, ordered by player and match date, and
+every metric is computed for all players at once:
+
+    form           mean runs / wickets over each player's last FORM_WINDOW matches
+    percentiles    strike rate, average, economy, wickets and form within the player's Batch
+    consistency    1 / (1 + coefficient of variation) of runs per innings, 0..1
+    trend          least-squares slope of runs (and wickets) per match
+
+The result is cached per process and rebuilt when the ledger changes —
+approval calls invalidate(), and other workers notice the ledger's
+fingerprint (row count and newest id) moving on their next read.
+"""
+import numpy as np
+from sqlalchemy import func, select
+
+from models import db, User, Player, Match, BattingStats, BowlingStats, FieldingStats
+
+FORM_WINDOW = 5
+
+# innings needed before consistency and trend mean anything
+MIN_INNINGS = 3
+
+# qualification for the rate metrics (same as the leaderboards)
+MIN_BALLS_FACED = 30
+MIN_BALLS_BOWLED = 30
+
+# metric -> higher is better, used for the within-Batch percentiles
+PERCENTILE_METRICS = {
+    "strike_rate": True,
+    "average": True,
+    "economy": False,
+    "wickets": True,
+    "form_runs": True,
+}
+
+_cache = {"fingerprint": None, "analytics": None}
+
+
+# ----------------------------------------------------
+# LOADING
+# ----------------------------------------------------
+def _chronological(model, *columns):
+    """Ledger rows of approved players, by player then match date."""
+    q = select(model.player_id, *columns).join(
+        Match, Match.id == model.match_id
+    ).join(
+        Player, Player.id == model.player_id
+    ).join(
+        User, User.id == Player.user_id
+    ).where(
+        User.status == "approved"
+    ).order_by(model.player_id, Match.match_date, Match.id)
+    return db.session.execute(q).all()
+
+
+def _columns(rows, n, dtype=float):
+    """Column-wise arrays for the first n fields of each row."""
+    if not rows:
+        return [np.zeros(0, dtype=dtype) for _ in range(n)]
+    arr = np.array([[v or 0 for v in r[:n]] for r in rows], dtype=dtype)
+    return [arr[:, i] for i in range(n)]
+
+
+def _fingerprint():
+    return tuple(
+        db.session.execute(select(func.count(), func.max(model.id))).one()
+        for model in (BattingStats, BowlingStats, FieldingStats)
+    )
+
+
+# ----------------------------------------------------
+# GROUPED KERNELS (rows sorted by player)
+# ----------------------------------------------------
+def _groups(pids):
+    """Distinct players with the start and length of their runs of rows."""
+    return np.unique(pids, return_index=True, return_counts=True)
+
+
+def _sums(values, starts):
+    if not len(values):
+        return np.zeros(0)
+    return np.add.reduceat(values, starts)
+
+
+def _last_k_mean(values, starts, counts, k):
+    csum = np.concatenate(([0.0], np.cumsum(values)))
+    ends = starts + counts
+    begins = np.maximum(starts, ends - k)
+    return (csum[ends] - csum[begins]) / (ends - begins)
+
+
+def _slope(values, starts, counts):
+    """Least-squares slope of values against match number, per player."""
+    x = np.arange(len(values)) - np.repeat(starts, counts)
+    n = counts.astype(float)
+    sx, sy = _sums(x, starts), _sums(values, starts)
+    sxx, sxy = _sums(x * x, starts), _sums(x * values, starts)
+    denom = n * sxx - sx * sx
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(denom > 0, (n * sxy - sx * sy) / denom, 0.0)
+    return np.where(counts >= MIN_INNINGS, slope, np.nan)
+
+
+def _consistency(values, starts, counts):
+    n = counts.astype(float)
+    mean = _sums(values, starts) / n
+    var = np.maximum(_sums(values * values, starts) / n - mean * mean, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score = np.where(mean > 0, mean / (mean + np.sqrt(var)), 0.0)
+    return np.where(counts >= MIN_INNINGS, score, np.nan)
+
+
+def _batch_percentiles(values, batches, higher_is_better):
+    """Share of the player's Batch (0-100) the player is at least as good as."""
+    out = np.full(len(values), np.nan)
+    valid = ~np.isnan(values)
+
+    for b in np.unique(batches[valid]):
+        mask = valid & (batches == b)
+        group = np.sort(values[mask])
+        if higher_is_better:
+            at_or_below = np.searchsorted(group, values[mask], side="right")
+        else:
+            at_or_below = len(group) - np.searchsorted(group, values[mask], side="left")
+        out[mask] = at_or_below * 100.0 / len(group)
+    return out
+
+
+def _spread(target_ids, ids, values, fill=0.0):
+    """values keyed by ids, laid out along target_ids (both sorted)."""
+    out = np.full(len(target_ids), fill, dtype=float)
+    if len(ids):
+        out[np.searchsorted(target_ids, ids)] = values
+    return out
+
+
+# ----------------------------------------------------
+# ANALYTICS
+# ----------------------------------------------------
+class AcademyAnalytics:
+    """Per-player metric vectors, aligned on the sorted player_ids array."""
+
+    def __init__(self, player_ids, names, batch_ids, metrics):
+        self.player_ids = player_ids
+        self.names = names
+        self.batch_ids = batch_ids
+        self.metrics = metrics
+        self._row = {int(pid): i for i, pid in enumerate(player_ids)}
+
+    def for_player(self, player_id):
+        """Plain dict of every metric for one player (None when not enough data)."""
+        i = self._row.get(player_id)
+        if i is None:
+            return None
+        return {
+            name: (None if np.isnan(v[i]) else round(float(v[i]), 2))
+            for name, v in self.metrics.items()
+        }
+
+    def ranked(self, metric, batch_id=None, n=5, lowest=False):
+        """[(player_id, name, value)] — the n best (or lowest) players on a metric."""
+        values = self.metrics[metric]
+        mask = ~np.isnan(values)
+        if batch_id is not None:
+            mask &= self.batch_ids == batch_id
+        idx = np.flatnonzero(mask)
+        order = idx[np.argsort(values[idx], kind="stable")]
+        if not lowest:
+            order = order[::-1]
+        return [
+            (int(self.player_ids[i]), self.names[i], round(float(values[i]), 2))
+            for i in order[:n]
+        ]
+
+
+def compute():
+    """Load the ledger and compute every metric for every player."""
+    bat = _chronological(
+        BattingStats, BattingStats.runs, BattingStats.balls, BattingStats.is_out,
+        User.username, Player.batch_id
+    )
+    bowl = _chronological(
+        BowlingStats, BowlingStats.overs, BowlingStats.runs_conceded, BowlingStats.wickets
+    )
+    field = _chronological(FieldingStats, FieldingStats.catches, FieldingStats.drops)
+
+    # every scorecard player has a batting row per match — it is the player axis
+    b_pid, runs, balls, outs = _columns(bat, 4)
+    b_pid = b_pid.astype(int)
+    players, b_start, b_count = _groups(b_pid)
+
+    first = {int(r[0]): r for r in (bat[i] for i in b_start)}
+    names = [first[int(pid)][4] for pid in players]
+    batches = np.array([first[int(pid)][5] or 0 for pid in players], dtype=int)
+
+    runs_tot = _sums(runs, b_start)
+    balls_tot = _sums(balls, b_start)
+    outs_tot = _sums(outs, b_start)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        strike_rate = np.where(balls_tot >= MIN_BALLS_FACED, runs_tot * 100 / balls_tot, np.nan)
+        average = np.where(outs_tot > 0, runs_tot / outs_tot, np.nan)
+
+    # bowling: overs are stored as 4.3 = four overs and three balls
+    w_pid, overs, conceded, wickets = _columns(bowl, 4)
+    w_pid = w_pid.astype(int)
+    bowlers, w_start, w_count = _groups(w_pid)
+    balls_bowled = np.floor(overs) * 6 + np.round((overs - np.floor(overs)) * 10)
+
+    bb_tot = _sums(balls_bowled, w_start)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        economy = np.where(bb_tot >= MIN_BALLS_BOWLED, _sums(conceded, w_start) * 6 / bb_tot, np.nan)
+
+    f_pid, catches, drops = _columns(field, 3)
+    fielders, f_start, _ = _groups(f_pid.astype(int))
+
+    metrics = {
+        "matches": b_count.astype(float),
+        "runs": runs_tot,
+        "strike_rate": strike_rate,
+        "average": average,
+        "form_runs": _last_k_mean(runs, b_start, b_count, FORM_WINDOW),
+        "consistency": _consistency(runs, b_start, b_count),
+        "trend_runs": _slope(runs, b_start, b_count),
+        "wickets": _spread(players, bowlers, _sums(wickets, w_start)),
+        "economy": _spread(players, bowlers, economy, fill=np.nan),
+        "form_wickets": _spread(
+            players, bowlers, _last_k_mean(wickets, w_start, w_count, FORM_WINDOW), fill=np.nan
+        ),
+        "trend_wickets": _spread(players, bowlers, _slope(wickets, w_start, w_count), fill=np.nan),
+        "catches": _spread(players, fielders, _sums(catches, f_start)),
+        "drops": _spread(players, fielders, _sums(drops, f_start)),
+    }
+
+    for metric, higher_is_better in PERCENTILE_METRICS.items():
+        metrics[f"{metric}_pct"] = _batch_percentiles(metrics[metric], batches, higher_is_better)
+
+    return AcademyAnalytics(players, names, batches, metrics)
+
+
+# ----------------------------------------------------
+# CACHE
+# ----------------------------------------------------
+def get():
+    """The current AcademyAnalytics, recomputed only when the ledger changed."""
+    fingerprint = _fingerprint()
+    if _cache["analytics"] is None or _cache["fingerprint"] != fingerprint:
+        _cache["analytics"] = compute()
+        _cache["fingerprint"] = fingerprint
+    return _cache["analytics"]
+
+
+def invalidate():
+    _cache["analytics"] = None
+
+
+def player_analytics(player_id):
+    return get().for_player(player_id)
@@ -4,10 +4,12 @@ import os
 from datetime import datetime, date, timezone, timedelta
 
 from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 
 from flask import (
     Flask, render_template, request, redirect,
-    url_for, flash, jsonify, send_file
+    url_for, flash, jsonify, send_file, make_response, abort,
+    send_from_directory, Response, stream_with_context
 )
 from flask_login import (
     LoginManager, login_user, login_required,
@@ -33,13 +35,36 @@ from models import (
     PreMatchAvailability,FoodItem,MatchPayment
 )
 
+# -------------------- MIGRATIONS --------------------
+import migrations
+from migrations import report_missing_indexes
+
 # -------------------- DRILL MAP --------------------
-from drillmap import DRILL_MAP
+from drillmap import DRILL_MAP, DRILL_CATEGORIES
+import drill_docs
 
 # -------------------- UTILS --------------------
 from utils import (
-    calculate_age, assign_batch_by_age,
-    merge_manual_into_player_stats, get_all_allowed_players
+    calculate_age, assign_batch_by_age, get_all_allowed_players
+)
+import stats_ledger
+import leaderboards
+import analytics
+import unread_counters
+from unread_counters import get_unread_counts
+from reports import (
+    get_match_report_data, save_report_snapshot, drop_report_snapshot,
+    match_report_pdf_data, player_stats_pdf_data, attendance_pdf_data,
+    availability_pdf_data, iter_player_stats_pdf_data
+)
+from manual_scorecard import (
+    get_draft, draft_payload, save_draft, flush_draft, flush_due_in, draft_diff
+)
+from scoring_auth import scorer_required, is_match_scorer, clear_actor_cache
+from live_state import (
+    record_ball, record_balls, get_innings_state, state_to_summary,
+    row_to_state, overs_str, match_overs, over_balls, state_at,
+    current_seq, claim_seq, void_ball, amend_ball, AMENDABLE_FIELDS
 )
 
 # -------------------- FORMS --------------------
@@ -49,10 +74,8 @@ from forms import (
 )
 
 # -------------------- PDF --------------------
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
+from routes.report_jobs import send_or_queue_pdf
+from pdf_jobs import stream_pdf_zip
 
 
 
@@ -70,6 +93,12 @@ app.register_blueprint(jogging_bp)
 from routes.payments import payments_bp
 app.register_blueprint(payments_bp)
 
+from routes.report_jobs import report_jobs_bp
+app.register_blueprint(report_jobs_bp)
+
+from routes.exports import exports_bp
+app.register_blueprint(exports_bp)
+
 # -------------------- EXTENSIONS INIT --------------------
 db.init_app(app)
 
@@ -84,45 +113,37 @@ with app.app_context():
     except Exception as e:
         print("⚠️ Warning: create_all() failed:", e)
 
+    try:
+        report_missing_indexes()
+    except Exception as e:
+        print("⚠️ Warning: index check failed:", e)
+
+    try:
+        drill_docs.build_drill_pdfs(app.config["DRILL_PDF_DIR"])
+    except Exception as e:
+        print("⚠️ Warning: drill PDF build failed:", e)
+
 
 @login_manager.user_loader
 def load_user(user_id):
     return db.session.get(User, int(user_id))
 
 @app.context_processor
-def inject_unread_count():
-    if current_user.is_authenticated:
-        count = Message.query.filter_by(
-            receiver_id=current_user.id,
-            is_read=False
-        ).count()
-        return dict(unread_count=count)
-    return dict(unread_count=0)
-
-
-@app.context_processor
-def inject_unread_message_count():
-    if current_user.is_authenticated:
-        count = Message.query.filter_by(
-            receiver_id=current_user.id,
-            is_read=0,
-            is_deleted=0
-        ).count()
-        return dict(unread_message_count=count)
-    return dict(unread_message_count=0)
-
-
-@app.context_processor
-def inject_unread_messages():
-    if current_user.is_authenticated:
-        unread = Message.query.filter(
-            Message.receiver_id == current_user.id,
-            Message.is_read == 0
-        ).count()
-    else:
-        unread = 0
-
-    return dict(unread_messages=unread)
+def inject_unread_counts():
+    """
+    Every unread-message badge, read from user_inbox_counters by key.
+    (unread_count / unread_message_count / unread_messages are the same
+    number under the names the templates already use.)
+    """
+    if not current_user.is_authenticated:
+        return dict(unread_count=0, unread_message_count=0, unread_messages=0)
+
+    counts = get_unread_counts(current_user.id)
+    return dict(
+        unread_count=counts["total"],
+        unread_message_count=counts["total"],
+        unread_messages=counts["total"]
+    )
 
 
 
@@ -194,6 +215,7 @@ def login():
             flash("Your account is pending approval.", "warning")
             return redirect(url_for("login"))
 
+        clear_actor_cache()
         login_user(user)
         flash("Logged in!", "success")
 
@@ -209,6 +231,7 @@ def login():
 @login_required
 def logout():
     logout_user()
+    clear_actor_cache()
     flash("Logged out.", "info")
     return redirect(url_for("home"))
 
@@ -427,6 +450,13 @@ def dashboard_coach():
         MatchPayment.payment_status != "paid"
     ).count()
 
+    # -------------------------
+    # ACADEMY FORM (PRECOMPUTED)
+    # -------------------------
+    academy = analytics.get()
+    form_leaders = academy.ranked("form_runs", n=5)
+    trending_up = academy.ranked("trend_runs", n=5)
+
     return render_template(
     "dashboard_coach.html",
     attendance_present=attendance_present,
@@ -441,7 +471,10 @@ def dashboard_coach():
 
     # ✅ PAYMENT CONTEXT
     paid_count=paid_count,
-    pending_count=pending_count
+    pending_count=pending_count,
+
+    form_leaders=form_leaders,
+    trending_up=trending_up
 )
 
 @app.route("/coach/pre-match")
@@ -574,6 +607,7 @@ def player_public_profile(player_id):
         "player_public_profile.html",
         player=player,
         stats=stats,
+        insights=analytics.player_analytics(player.id),
         recent_manual=recent_manual,
         can_edit=can_edit
     )
@@ -650,10 +684,7 @@ def dashboard_player():
     payment_status="pending"
     ).first()
 
-    unread_messages = Message.query.filter_by(
-        receiver_id=current_user.id,
-        is_read=0
-    ).count()
+    unread_messages = get_unread_counts(current_user.id)["total"]
 
     return render_template(
     "dashboard_player.html",
@@ -703,7 +734,39 @@ def coach_player_list():
         return redirect(url_for("home"))
 
     players = Player.query.join(User).filter(User.status == "approved").all()
-    return render_template("coach_player_list.html", players=players)
+    batches = Batch.query.order_by(Batch.min_age).all()
+    return render_template("coach_player_list.html", players=players, batches=batches)
+
+
+# --------------------------------------------------------
+# LEADERBOARD
+# --------------------------------------------------------
+@app.route("/leaderboard")
+@login_required
+def leaderboard():
+    category = request.args.get("category", "runs")
+    if category not in leaderboards.CATEGORIES:
+        category = "runs"
+    batch_id = request.args.get("batch_id", 0, type=int)
+    season = request.args.get("season", leaderboards.ALL_SEASONS)
+    page = max(request.args.get("page", 1, type=int), 1)
+
+    entries, has_next = leaderboards.top(category, batch_id, season, page)
+
+    my_entry = None
+    if current_user.role == "player":
+        me = Player.query.filter_by(user_id=current_user.id).first()
+        if me:
+            my_entry = leaderboards.player_rank(me.id, category, batch_id, season)
+
+    return render_template(
+        "leaderboard.html",
+        entries=entries, my_entry=my_entry,
+        category=category, batch_id=batch_id, season=season, page=page, has_next=has_next,
+        categories=leaderboards.CATEGORIES,
+        batches=Batch.query.order_by(Batch.min_age).all(),
+        seasons=leaderboards.seasons()
+    )
 
 
 @app.route("/coach/player/<int:id>")
@@ -913,24 +976,22 @@ def coach_player_stats(id):
 def match_detail(match_id):
     m = Match.query.get_or_404(match_id)
 
-    def can_score(match):
-        if current_user.role == "coach":
-            c = Coach.query.filter_by(user_id=current_user.id).first()
-            return match.scorer_coach_id == c.id
-        if current_user.role == "player":
-            p = Player.query.filter_by(user_id=current_user.id).first()
-            return match.scorer_player_id == p.id
-        return False
-
     playing = MatchAssignment.query.filter_by(match_id=m.id).all()
     opponents = OpponentTempPlayer.query.filter_by(match_id=m.id).all()
 
+    live_summary = None
+    if m.scoring_mode == "live":
+        state = get_innings_state(m.id, m.current_innings or 1)
+        if state:
+            live_summary = state_to_summary(state, m.current_innings or 1)
+
     return render_template(
         "match_detail.html",
         match=m,
-        can_score=can_score(m),
+        can_score=is_match_scorer(m),
         playing_count=len(playing),
-        opponent_count=len(opponents)
+        opponent_count=len(opponents),
+        live_summary=live_summary
     )
 
 
@@ -996,21 +1057,8 @@ def select_players(match_id):
 # --------------------------------------------------------
 @app.route("/match/<int:match_id>/manual")
 @login_required
-def manual_scoring(match_id):
-
-    m = Match.query.get_or_404(match_id)
-
-    allowed = False
-    if current_user.role == "coach":
-        c = Coach.query.filter_by(user_id=current_user.id).first()
-        allowed = (m.scorer_coach_id == c.id)
-    elif current_user.role == "player":
-        p = Player.query.filter_by(user_id=current_user.id).first()
-        allowed = (m.scorer_player_id == p.id)
-
-    if not allowed:
-        flash("You are not the assigned scorer.", "danger")
-        return redirect(url_for("match_detail", match_id=m.id))
+@scorer_required()
+def manual_scoring(match_id, m):
 
     # players: if squad assigned use that otherwise fallback to all approved players
     squad_assignments = MatchAssignment.query.filter_by(match_id=m.id).all()
@@ -1022,107 +1070,150 @@ def manual_scoring(match_id):
 
     opponents = OpponentTempPlayer.query.filter_by(match_id=m.id).all()
 
+    # the form resumes from the latest draft; one an autosave left
+    # unwritten (tab closed before the re-send) is written now
+    draft = get_draft(m.id)
+    if m.status != "completed":
+        flush_draft(draft, force=True)
+    db.session.commit()
+
     return render_template(
         "manual_scoring.html",
         match=m,
         players=players,
-        opponents=opponents
+        opponents=opponents,
+        draft=draft_payload(draft),
+        draft_version=draft.version
     )
 
 # --------------------------------------------------------
-# API: MANUAL SCORE SAVE
-# --------------------------------------------------------
+# API: MANUAL SCORECARD DRAFTS
 # --------------------------------------------------------
-# API: MANUAL SCORE SAVE (FINAL FIXED VERSION)
-# --------------------------------------------------------
-@app.route("/api/match/<int:match_id>/manual_save", methods=["POST"])
-@login_required
-def api_manual_save(match_id):
+def parse_expected_version(data):
+    """
+    The draft version the client edited: the If-Match header ("3" or a
+    quoted ETag), else "version" in the body. None saves unconditionally.
+    """
+    tag = (request.headers.get("If-Match") or "").strip()
+    if tag and tag != "*":
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        return int(tag.strip('"'))
+    expected = data.get("version")
+    return None if expected is None else int(expected)
+
+
+def draft_response(body, draft, status=200):
+    resp = jsonify(dict(body, version=draft.version))
+    resp.status_code = status
+    resp.headers["ETag"] = f'"{draft.version}"'
+    return resp
+
+
+def draft_conflict_response(match_id, data):
+    """409 with the stored draft and what the rejected save would change in it."""
+    draft = get_draft(match_id)
+    stored = draft_payload(draft)
+    editor = db.session.get(User, draft.updated_by) if draft.updated_by else None
+    db.session.commit()
+    return draft_response({
+        "error": "version_conflict",
+        "updated_by": editor.username if editor else None,
+        "updated_at": draft.updated_at.isoformat() if draft.updated_at else None,
+        "draft": stored,
+        "diff": draft_diff(stored, data)
+    }, draft, status=409)
 
-    m = Match.query.get_or_404(match_id)
 
-    # scorer permission check
-    allowed = False
-    if current_user.role == "coach":
-        c = Coach.query.filter_by(user_id=current_user.id).first()
-        allowed = (m.scorer_coach_id == c.id)
-    elif current_user.role == "player":
-        p = Player.query.filter_by(user_id=current_user.id).first()
-        allowed = (m.scorer_player_id == p.id)
+@app.route("/api/match/<int:match_id>/manual_draft", methods=["GET"])
+@login_required
+@scorer_required(api=True)
+def api_manual_draft(match_id, m):
+    draft = get_draft(match_id)
+    db.session.commit()
+    return draft_response({
+        "draft": draft_payload(draft),
+        "saved_version": draft.saved_version
+    }, draft)
 
-    if not allowed:
-        return jsonify({"error": "not_allowed"}), 403
 
+@app.route("/api/match/<int:match_id>/manual_draft", methods=["PUT"])
+@login_required
+@scorer_required(api=True)
+def api_manual_autosave(match_id, m):
+    """
+    Autosave: the draft is stored at once, the scorecard tables at most
+    once per DRAFT_FLUSH_SECONDS. A deferred save answers "queued" with
+    flush_in; re-sending the same payload after that writes it. If the
+    client never re-sends (the tab closed), ManualScore stays behind the
+    draft until the next save or until the manual scoring page is opened,
+    which flushes a pending draft.
+
+    Autosaves carry no team summary (only the explicit save asks for
+    it); the stored one is kept, so it doesn't read as a change.
+    """
     data = request.get_json() or {}
 
     try:
-        # clear previous manual data
-        ManualScore.query.filter_by(match_id=match_id).delete()
-        WagonWheel.query.filter_by(match_id=match_id).delete()
-        db.session.flush()
+        expected = parse_expected_version(data)
+    except (TypeError, ValueError):
+        return jsonify({"error": "If-Match must be a draft version"}), 400
 
-        # ---------------- BATTING ----------------
-        for b in data.get("batting", []):
-            db.session.add(ManualScore(
-                match_id=match_id,
-                player_id=b.get("player_id"),
-                runs=b.get("runs", 0),
-                balls_faced=b.get("balls", 0),
-                fours=b.get("fours", 0),
-                sixes=b.get("sixes", 0),
-                is_out=bool(b.get("is_out", 0)),
-                wicket_over=b.get("wicket_over"),
-               # wicket_ball=b.get("wicket_ball"),
-                dismissal_type=b.get("dismissal_type"),
-                is_opponent=False
-            ))
+    try:
+        stored = draft_payload(get_draft(match_id))
+        if "team_summary" not in data and "team_summary" in stored:
+            data = dict(data, team_summary=stored["team_summary"])
 
-        # ---------------- BOWLING ----------------
-        for bo in data.get("bowling", []):
-            db.session.add(ManualScore(
-                match_id=match_id,
-                player_id=bo.get("player_id"),
-                overs=bo.get("overs", 0.0),
-                runs_conceded=bo.get("runs_conceded", 0),
-                wickets=bo.get("wickets", 0),
-                is_opponent=False
-            ))
+        draft = save_draft(match_id, data, expected, current_user.id)
+        if draft is None:
+            return draft_conflict_response(match_id, data)
 
-        # ---------------- FIELDING ----------------
-        for f in data.get("fielding", []):
-            db.session.add(ManualScore(
-                match_id=match_id,
-                player_id=f.get("player_id"),
-                catches=f.get("catches", 0),
-                drops=f.get("drops", 0),
-                saves=f.get("saves", 0),
-                is_opponent=False
-            ))
+        # an approved scorecard only changes through an explicit save
+        changes = None
+        if m.status != "completed":
+            changes = flush_draft(draft)
 
-        # ---------------- WAGON WHEEL ----------------
-        for w in data.get("wagon", []):
-            db.session.add(WagonWheel(
-                match_id=match_id,
-                player_id=w.get("player_id"),
-                angle=w.get("angle"),
-                distance=w.get("distance", 0),
-                runs=w.get("runs", 0),
-                shot_type=w.get("shot_type"),
-               # is_opponent=False
-            ))
+        db.session.commit()
+
+        pending = draft.saved_version != draft.version
+        return draft_response({
+            "status": "queued" if pending else "saved",
+            "saved_version": draft.saved_version,
+            "flush_in": flush_due_in(draft) if pending and m.status != "completed" else None,
+            "changes": changes
+        }, draft)
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+
+
+# --------------------------------------------------------
+# API: MANUAL SCORE SAVE (FINAL FIXED VERSION)
+# --------------------------------------------------------
+@app.route("/api/match/<int:match_id>/manual_save", methods=["POST"])
+@login_required
+@scorer_required(api=True)
+def api_manual_save(match_id, m):
+
+    data = request.get_json() or {}
+
+    try:
+        expected = parse_expected_version(data)
+    except (TypeError, ValueError):
+        return jsonify({"error": "If-Match must be a draft version"}), 400
+
+    try:
+        draft = save_draft(match_id, data, expected, current_user.id)
+        if draft is None:
+            return draft_conflict_response(match_id, data)
+
+        # only the rows that differ from what is stored are written
+        changes = flush_draft(draft, force=True)
 
         # ---------------- OPPONENT SUMMARY ----------------
         op = data.get("opponent_simple")
         if op:
-            db.session.add(ManualScore(
-                match_id=match_id,
-                player_id=None,
-                runs=op.get("runs", 0),
-                wickets=op.get("wickets", 0),
-                overs=op.get("overs", 0.0),
-                is_opponent=True
-            ))
-
             m.opp_runs = int(op.get("runs", 0))
             m.opp_wkts = int(op.get("wickets", 0))
             m.opp_overs = str(op.get("overs", "0.0"))
@@ -1138,45 +1229,36 @@ def api_manual_save(match_id):
         # mark as pending approval
         m.status = "pending_approval"
 
+        # summaries re-edited: any frozen report is stale
+        if db.session.is_modified(m):
+            drop_report_snapshot(match_id)
+
         db.session.commit()
-        return jsonify({"status": "ok"}), 200
+        return draft_response({"status": "ok", "changes": changes}, draft)
 
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 400
 
- 
+
 # --------------------------------------------------------
 # LIVE SCORING PANEL + BALL INSERT
 # --------------------------------------------------------
 @app.route("/match/<int:match_id>/panel")
 @login_required
-def scoring_panel(match_id):
+@scorer_required(message="Not authorized.")
+def scoring_panel(match_id, m):
 
-    m = Match.query.get_or_404(match_id)
+    # next delivery from the innings aggregate, so undone balls are accounted for
+    innings = m.current_innings or 1
+    state = get_innings_state(match_id, innings)
+    legal_balls = state["legal_balls"] if state else 0
+    next_over, next_ball = legal_balls // 6 + 1, legal_balls % 6 + 1
 
-    allowed = False
-    if current_user.role == "coach":
-        c = Coach.query.filter_by(user_id=current_user.id).first()
-        allowed = (m.scorer_coach_id == c.id)
-    elif current_user.role == "player":
-        p = Player.query.filter_by(user_id=current_user.id).first()
-        allowed = (m.scorer_player_id == p.id)
-
-    if not allowed:
-        flash("Not authorized.", "danger")
-        return redirect(url_for("match_detail", match_id=match_id))
-
-    last = LiveBall.query.filter_by(match_id=match_id).order_by(LiveBall.id.desc()).first()
-    next_over, next_ball = (1, 1)
-
-    if last:
-        if last.ball_no == 6:
-            next_over = last.over_no + 1
-            next_ball = 1
-        else:
-            next_over = last.over_no
-            next_ball = last.ball_no + 1
+    last = LiveBall.query.filter(
+        LiveBall.match_id == match_id,
+        LiveBall.voided.isnot(True)
+    ).order_by(LiveBall.id.desc()).first()
 
     squad_ids = [a.player_id for a in MatchAssignment.query.filter_by(match_id=m.id)]
     players = Player.query.filter(Player.id.in_(squad_ids)).all() if squad_ids else \
@@ -1190,54 +1272,454 @@ def scoring_panel(match_id):
         players=players,
         opponents=opponents,
         next_over=next_over,
-        next_ball=next_ball
+        next_ball=next_ball,
+        last_ball=last,
+        live_seq=current_seq(match_id)
     )
 
 
-@app.route("/api/live/<int:match_id>/add", methods=["POST"])
-@login_required
-def api_live_add(match_id):
+def live_ball_from_payload(m, data):
+    return LiveBall(
+        match_id=m.id,
+        innings=m.current_innings or 1,
+        over_no=int(data.get("over_no", 1)),
+        ball_no=int(data.get("ball_no", 1)),
+        striker=data.get("striker"),
+        non_striker=data.get("non_striker"),
+        bowler=data.get("bowler"),
+        runs=int(data.get("runs", 0)),
+        extras=data.get("extras", "none"),
+        wicket=data.get("wicket", "none"),
+        commentary=data.get("commentary", ""),
+        angle=data.get("angle"),
+        shot_type=data.get("shot_type"),
+        client_seq=data.get("client_seq")
+    )
 
-    m = Match.query.get_or_404(match_id)
 
-    allowed = False
-    if current_user.role == "coach":
-        c = Coach.query.filter_by(user_id=current_user.id).first()
-        allowed = (m.scorer_coach_id == c.id)
-    elif current_user.role == "player":
-        p = Player.query.filter_by(user_id=current_user.id).first()
-        allowed = (m.scorer_player_id == p.id)
+def parse_expected_seq(data):
+    """The scorer's last seen live_seq, or None to append unconditionally."""
+    expected = data.get("expected_seq")
+    return None if expected is None else int(expected)
+
+
+def stale_seq_response(match_id):
+    return jsonify({
+        "error": "stale",
+        "live_seq": current_seq(match_id),
+        "retry": False
+    }), 409
+
 
-    if not allowed:
-        return jsonify({"error": "not_allowed"}), 403
+def stored_client_ball(match_id, client_seq):
+    """The match's ball already stored under this client_seq, if any."""
+    if client_seq is None:
+        return None
+    try:
+        client_seq = int(client_seq)
+    except (TypeError, ValueError):
+        return None
+    return LiveBall.query.filter_by(match_id=match_id, client_seq=client_seq).first()
+
+
+def duplicate_ball_response(lb):
+    return jsonify({
+        "status": "ok",
+        "duplicate": True,
+        "ball_id": lb.id,
+        "seq": current_seq(lb.match_id)
+    }), 200
+
+
+@app.route("/api/live/<int:match_id>/add", methods=["POST"])
+@login_required
+@scorer_required(api=True)
+def api_live_add(match_id, m):
 
     data = request.get_json() or {}
 
     try:
-        lb = LiveBall(
-            match_id=match_id,
-            over_no=int(data.get("over_no", 1)),
-            ball_no=int(data.get("ball_no", 1)),
-            striker=data.get("striker"),
-            non_striker=data.get("non_striker"),
-            bowler=data.get("bowler"),
-            runs=int(data.get("runs", 0)),
-            extras=data.get("extras", "none"),
-            wicket=data.get("wicket", "none"),
-            commentary=data.get("commentary", ""),
-            angle=data.get("angle"),
-            shot_type=data.get("shot_type")
-        )
+        expected = parse_expected_seq(data)
+    except (TypeError, ValueError):
+        return jsonify({"error": "expected_seq must be an integer"}), 400
+
+    try:
+        # a resent ball (same client_seq) is already stored: hand it back
+        existing = stored_client_ball(match_id, data.get("client_seq"))
+        if existing:
+            return duplicate_ball_response(existing)
+
+        # compare-and-swap: a scorer working from a stale view is turned away
+        seq = claim_seq(match_id, expected)
+        if seq is None:
+            db.session.rollback()
+            return stale_seq_response(match_id)
+
+        lb = live_ball_from_payload(m, data)
+        lb.seq = seq
         db.session.add(lb)
+        db.session.flush()
+
+        # keep the innings scoreboard current without replaying the match
+        row = record_ball(lb)
         db.session.commit()
 
-        return jsonify({"status": "ok"}), 201
+        broadcast_live_ball(lb, row)
+
+        return jsonify({"status": "ok", "ball_id": lb.id, "seq": seq}), 201
+
+    except IntegrityError:
+        # a concurrent resend of the same ball won the race
+        db.session.rollback()
+        existing = stored_client_ball(match_id, data.get("client_seq"))
+        if existing:
+            return duplicate_ball_response(existing)
+        return jsonify({"error": "conflict", "retry": True}), 409
 
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 400
 
 
+# --------------------------------------------------------
+# BATCH BALL INSERT (OFFLINE SCORING SYNC)
+# --------------------------------------------------------
+LIVE_BATCH_MAX = 300
+
+
+@app.route("/api/live/<int:match_id>/add_batch", methods=["POST"])
+@login_required
+@scorer_required(api=True)
+def api_live_add_batch(match_id, m):
+    """
+    Store an ordered list of balls in one transaction.
+
+    Every ball carries the scorer's client_seq. Balls whose client_seq is
+    already stored for this match are skipped, so a sync that timed out
+    can simply be resent.
+    """
+
+    body = request.get_json() or {}
+    items = body.get("balls") or []
+
+    if len(items) > LIVE_BATCH_MAX:
+        return jsonify({"error": f"max {LIVE_BATCH_MAX} balls per batch"}), 413
+
+    try:
+        seqs = [int(b["client_seq"]) for b in items]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "every ball needs an integer client_seq"}), 400
+
+    if len(set(seqs)) != len(seqs):
+        return jsonify({"error": "duplicate client_seq in batch"}), 400
+
+    try:
+        expected = parse_expected_seq(body)
+    except (TypeError, ValueError):
+        return jsonify({"error": "expected_seq must be an integer"}), 400
+
+    live_seq = None
+
+    try:
+        known = set()
+        if seqs:
+            known = {
+                s for (s,) in db.session.query(LiveBall.client_seq).filter(
+                    LiveBall.match_id == match_id,
+                    LiveBall.client_seq.in_(seqs)
+                )
+            }
+
+        fresh = []
+        for data, seq in zip(items, seqs):
+            if seq in known:
+                continue
+            lb = live_ball_from_payload(m, dict(data, client_seq=seq))
+            fresh.append(lb)
+
+        if fresh:
+            live_seq = claim_seq(match_id, expected, len(fresh))
+            if live_seq is None:
+                db.session.rollback()
+                return stale_seq_response(match_id)
+            for offset, lb in enumerate(fresh, start=1):
+                lb.seq = live_seq - len(fresh) + offset
+            db.session.add_all(fresh)
+            db.session.flush()
+            record_balls(fresh)
+
+        db.session.commit()
+
+    except IntegrityError:
+        # a concurrent resend of the same batch won the race; resending is safe
+        db.session.rollback()
+        return jsonify({"error": "conflict", "retry": True}), 409
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+
+    if fresh:
+        broadcast_live_balls(m, fresh)
+
+    return jsonify({
+        "status": "ok",
+        "accepted": [b.client_seq for b in fresh],
+        "duplicates": sorted(known),
+        "last_id": fresh[-1].id if fresh else None,
+        "seq": live_seq if fresh else current_seq(match_id)
+    }), 201 if fresh else 200
+
+
+# --------------------------------------------------------
+# BALL CORRECTIONS (UNDO / AMEND)
+# --------------------------------------------------------
+def _amend_changes(data):
+    changes = {k: data[k] for k in AMENDABLE_FIELDS if k in data}
+    for k in ("over_no", "ball_no", "runs", "angle"):
+        if changes.get(k) is not None:
+            changes[k] = int(changes[k])
+    return changes
+
+
+@app.route("/api/live/<int:match_id>/balls/<int:ball_id>/undo", methods=["POST"])
+@app.route("/api/live/<int:match_id>/balls/<int:ball_id>/amend", methods=["POST"])
+@login_required
+@scorer_required(api=True)
+def api_live_correct(match_id, m, ball_id):
+    """
+    Undo or amend one stored ball. The innings row and over rollup are
+    corrected by taking the ball back out (no replay); checkpoints from
+    its over on are re-saved. expected_seq is required: a correction made
+    from a stale view could undo the wrong ball.
+    """
+    data = request.get_json() or {}
+    amend = request.path.endswith("/amend")
+
+    if data.get("expected_seq") is None:
+        return jsonify({"error": "expected_seq is required"}), 400
+
+    try:
+        expected = parse_expected_seq(data)
+        changes = _amend_changes(data) if amend else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "invalid ball values"}), 400
+
+    if amend and not changes:
+        return jsonify({"error": "nothing to amend"}), 400
+
+    ball = LiveBall.query.filter_by(id=ball_id, match_id=match_id).first()
+    if not ball or ball.voided:
+        return jsonify({"error": "no such ball"}), 404
+
+    try:
+        seq = claim_seq(match_id, expected)
+        if seq is None:
+            db.session.rollback()
+            return stale_seq_response(match_id)
+
+        if amend:
+            event, row = amend_ball(ball, changes, seq)
+        else:
+            event, row = void_ball(ball, seq)
+        db.session.commit()
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+
+    broadcast_live_correction(m, event)
+
+    return jsonify({
+        "status": "ok",
+        "event_id": event.id,
+        "ball": serialize_live_ball(ball),
+        "seq": seq
+    })
+
+
+# --------------------------------------------------------
+# LIVE EVENTS FEED (DELTA SINCE CURSOR)
+# --------------------------------------------------------
+LIVE_EVENTS_PAGE_SIZE = 500
+
+
+def serialize_live_ball(b):
+    return {
+        "id": b.id,
+        "over": b.over_no,
+        "ball": b.ball_no,
+        "striker": b.striker,
+        "non_striker": b.non_striker,
+        "bowler": b.bowler,
+        "runs": b.runs or 0,
+        "extras": b.extras or "none",
+        "wicket": b.wicket or "none",
+        "commentary": b.commentary or "",
+        "angle": b.angle,
+        "shot_type": b.shot_type,
+        "seq": b.seq,
+        "voided": bool(b.voided),
+        "correction": b.correction,
+        "ref_ball_id": b.ref_ball_id
+    }
+
+
+@app.route("/api/live/<int:match_id>/events")
+def api_live_events(match_id):
+    """
+    Balls of a match newer than ?since_id=N (oldest first).
+
+    Pollers send back the id of the last ball they hold, so each poll only
+    transfers new balls. The ETag is derived from the cursor and the newest
+    ball id, so an idle match answers 304 without reading any rows.
+    """
+    since_id = request.args.get("since_id", 0, type=int)
+    limit = min(request.args.get("limit", LIVE_EVENTS_PAGE_SIZE, type=int), LIVE_EVENTS_PAGE_SIZE)
+    limit = max(limit, 1)
+
+    last_id = db.session.query(func.max(LiveBall.id)).filter(
+        LiveBall.match_id == match_id
+    ).scalar() or 0
+
+    etag = f"live-{match_id}-{since_id}-{last_id}"
+    if request.if_none_match.contains(etag):
+        resp = make_response("", 304)
+        resp.set_etag(etag)
+        return resp
+
+    balls = []
+    if last_id > since_id:
+        balls = LiveBall.query.filter(
+            LiveBall.match_id == match_id,
+            LiveBall.id > since_id
+        ).order_by(LiveBall.id.asc()).limit(limit).all()
+
+    resp = jsonify([serialize_live_ball(b) for b in balls])
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Last-Event-Id"] = str(balls[-1].id if balls else since_id)
+    return resp
+
+
+# --------------------------------------------------------
+# LIVE PUSH (SOCKET.IO ROOM match_<id>)
+# --------------------------------------------------------
+def broadcast_live_ball(lb, innings_row):
+    """
+    Push one committed ball to spectators as a compact delta: the ball,
+    the new headline score and the updated figures of the two players
+    involved. Clients patch their scoreboard instead of refetching it.
+    """
+    state = row_to_state(innings_row)
+
+    socketio.emit(
+        "live_ball",
+        {
+            "match_id": lb.match_id,
+            "innings": innings_row.innings,
+            "ball": serialize_live_ball(lb),
+            "score": {
+                "runs": state["runs"],
+                "wickets": state["wickets"],
+                "extras": state["extras"],
+                "overs": overs_str(state["legal_balls"])
+            },
+            "batter": {lb.striker: state["batters"].get(lb.striker)} if lb.striker else {},
+            "bowler": {lb.bowler: state["bowlers"].get(lb.bowler)} if lb.bowler else {}
+        },
+        to=f"match_{lb.match_id}"
+    )
+
+
+def broadcast_live_balls(m, balls):
+    """
+    One push for a synced batch: the new balls plus the resulting scoreboard.
+    """
+    innings = m.current_innings or 1
+    state = get_innings_state(m.id, innings)
+
+    socketio.emit(
+        "live_balls",
+        {
+            "match_id": m.id,
+            "balls": [serialize_live_ball(b) for b in balls],
+            "state": state_to_summary(state, innings) if state else None
+        },
+        to=f"match_{m.id}"
+    )
+
+
+def broadcast_live_correction(m, event):
+    """An undo / amend event plus the corrected scoreboard of its innings."""
+    innings = event.innings or 1
+    state = get_innings_state(m.id, innings)
+
+    socketio.emit(
+        "live_correction",
+        {
+            "match_id": m.id,
+            "event": serialize_live_ball(event),
+            "seq": event.seq,
+            "state": state_to_summary(state, innings) if state else None
+        },
+        to=f"match_{m.id}"
+    )
+
+
+def broadcast_live_innings(m):
+    socketio.emit(
+        "live_innings",
+        {
+            "match_id": m.id,
+            "innings": m.current_innings or 1,
+            "batting_side": m.batting_side
+        },
+        to=f"match_{m.id}"
+    )
+
+
+@app.route("/api/live/<int:match_id>/state")
+def api_live_state(match_id):
+    """
+    Current innings scoreboard, read from the LiveInnings aggregate.
+    """
+    m = Match.query.get_or_404(match_id)
+    innings = request.args.get("innings", m.current_innings or 1, type=int)
+
+    state = get_innings_state(match_id, innings)
+    if state is None:
+        return jsonify({"innings": innings, "empty": True})
+
+    return jsonify(state_to_summary(state, innings))
+
+
+@app.route("/api/live/<int:match_id>/timeline")
+def api_live_timeline(match_id):
+    """
+    Scoreboard as it stood after ?over=N&ball=B (ball 0 = end of over N-1),
+    rebuilt from the nearest end-of-over checkpoint.
+    """
+    m = Match.query.get_or_404(match_id)
+    innings = request.args.get("innings", m.current_innings or 1, type=int)
+    over_no = request.args.get("over", type=int)
+    ball_no = request.args.get("ball", 0, type=int)
+
+    if over_no is None or over_no < 1 or ball_no < 0:
+        return jsonify({"error": "over (>= 1) and ball (>= 0) are required"}), 400
+
+    state, checkpoint_over, replayed = state_at(match_id, innings, over_no, ball_no)
+
+    summary = state_to_summary(state, innings)
+    summary.update({
+        "at": {"over": over_no, "ball": ball_no},
+        "partnership": state.get("partnership"),
+        "checkpoint_over": checkpoint_over,
+        "replayed": replayed
+    })
+    return jsonify(summary)
+
+
 # --------------------------------------------------------
 # START + END INNINGS
 # --------------------------------------------------------
@@ -1264,6 +1746,8 @@ def start_innings(match_id):
     m.started_at = datetime.utcnow()
     db.session.commit()
 
+    broadcast_live_innings(m)
+
     flash(f"Innings {m.current_innings} started!", "success")
     return redirect(url_for("match_detail", match_id=match_id))
 
@@ -1280,6 +1764,8 @@ def end_innings(match_id):
     m.completed_at = datetime.utcnow()
     db.session.commit()
 
+    broadcast_live_innings(m)
+
     flash(f"Innings {m.current_innings} ended.", "success")
     return redirect(url_for("match_detail", match_id=match_id))
 
@@ -1295,9 +1781,29 @@ def live_score_view(match_id):
 
 @app.route("/match/<int:match_id>/history")
 def ball_history(match_id):
+    """Over summaries only; the balls of an over come from api_over_balls."""
     m = Match.query.get_or_404(match_id)
-    balls = LiveBall.query.filter_by(match_id=match_id).order_by(LiveBall.id.asc()).all()
-    return render_template("ball_history.html", match=m, balls=balls)
+    overs = match_overs(match_id)
+    return render_template("ball_history.html", match=m, overs=overs)
+
+
+OVER_BALLS_PAGE_SIZE = 50
+
+
+@app.route("/api/live/<int:match_id>/overs/<int:innings>/<int:over_no>/balls")
+def api_over_balls(match_id, innings, over_no):
+    """
+    Balls of one over, oldest first, ?after_id=N for the next page.
+    """
+    after_id = request.args.get("after_id", 0, type=int)
+    limit = min(request.args.get("limit", OVER_BALLS_PAGE_SIZE, type=int), OVER_BALLS_PAGE_SIZE)
+    limit = max(limit, 1)
+
+    balls, next_after_id = over_balls(match_id, innings, over_no, after_id, limit)
+    return jsonify({
+        "balls": [serialize_live_ball(b) for b in balls],
+        "next_after_id": next_after_id
+    })
 
 
 # --------------------------------------------------------
@@ -1310,9 +1816,14 @@ def coach_approve_match(match_id):
         flash("Not allowed.", "danger"); return redirect(url_for("home"))
     m = Match.query.get_or_404(match_id)
     try:
-        merge_manual_into_player_stats(match_id)
+        # idempotent: re-approving rewrites this match's ledger rows
+        stats_ledger.record_match_stats(match_id)
+        leaderboards.refresh_for_match(match_id)
+        analytics.invalidate()
         OpponentTempPlayer.query.filter_by(match_id=match_id).delete()
         m.status = "completed"
+        # report data is final from here on; freeze it
+        save_report_snapshot(m)
         db.session.commit()
         flash("Match approved and stats updated!", "success")
     except Exception as e:
@@ -1321,200 +1832,12 @@ def coach_approve_match(match_id):
     return redirect(url_for("dashboard_coach"))
 
 
-def generate_coach_suggestions(full_batting, full_bowling, top_fielding):
-    suggestions = []
-
-    # ---------------- BATSMEN ----------------
-    for b in full_batting:
-        # SAFETY CHECK
-        if not b.get("player_name"):
-            continue
-
-        runs = b.get("runs", 0)
-        balls = b.get("balls", 0)
-        sr = (runs / balls * 100) if balls > 0 else 0
-
-        s = []
-
-        if runs >= 50:
-            s.append("Excellent batting performance — continue building long innings.")
-        elif runs >= 30:
-            s.append("Good start — work on converting 30s into big scores.")
-        else:
-            s.append("Need stronger shot selection and rotation of strike.")
-
-        if balls > 0:
-            if sr < 60:
-                s.append("Low strike rate — improve running between wickets and placement.")
-            elif sr > 120:
-                s.append("Great aggressive intent — maintain controlled aggression.")
-
-        suggestions.append({
-            "player_name": b["player_name"],
-            "suggestions": s
-        })
-
-    # ---------------- BOWLERS ----------------
-    for bw in full_bowling:
-        if not bw.get("player_name"):
-            continue
-
-        overs = bw.get("overs", 0)
-        runs_conceded = bw.get("runs_conceded", 0)
-        wickets = bw.get("wickets", 0)
-
-        econ = (runs_conceded / overs) if overs > 0 else 0
-        s = []
-
-        if wickets >= 3:
-            s.append("Strong wicket-taking performance — maintain consistency with variations.")
-        elif wickets == 0:
-            s.append("Focus on bowling tighter lines to create wicket opportunities.")
-
-        if overs > 0:
-            if econ > 7.5:
-                s.append("Economy rate high — practice yorkers and slower balls.")
-            else:
-                s.append("Good economical spell — maintain discipline.")
-
-        suggestions.append({
-            "player_name": bw["player_name"],
-            "suggestions": s
-        })
-
-    # ---------------- FIELDERS ----------------
-    for f in top_fielding:
-        if not f.get("player_name"):
-            continue
-
-        catches = f.get("catches", 0)
-        s = []
-
-        if catches >= 2:
-            s.append("Good catching performance — work on reaction drills for run-outs.")
-        else:
-            s.append("Improve anticipation and ready position while fielding.")
-
-        suggestions.append({
-            "player_name": f["player_name"],
-            "suggestions": s
-        })
-
-    return suggestions
-
 @app.route("/match/<int:match_id>/report_view")
 @login_required
 def match_report_view(match_id):
 
     m = Match.query.get_or_404(match_id)
-
-    # ---------------- OUR TEAM ROWS ----------------
-    our_rows = ManualScore.query.filter_by(match_id=match_id, is_opponent=False).all()
-
-    # ---------------- BATTING ----------------
-    full_batting = []
-    total = 0
-    fow = []
-    w_no = 1
-
-    for r in our_rows:
-        total += (r.runs or 0)
-
-        if r.balls_faced > 0:
-            full_batting.append({
-                "player_name": r.player.user.username,
-                "runs": r.runs,
-                "balls": r.balls_faced,
-                "fours": r.fours,
-                "sixes": r.sixes,
-                "dismissal_type": r.dismissal_type if r.is_out else "Not Out"
-            })
-
-        if r.is_out:
-            fow.append({
-                "number": w_no,
-                "score": total,
-                "over": r.wicket_over or "-",
-                "player_name": r.player.user.username
-            })
-            w_no += 1
-
-    # ---------------- BOWLING ----------------
-    full_bowling = []
-    for r in our_rows:
-        if r.overs and float(r.overs) > 0:
-            full_bowling.append({
-                "player_name": r.player.user.username,
-                "overs": float(r.overs),
-                "runs_conceded": r.runs_conceded,
-                "wickets": r.wickets,
-            })
-
-    # ---------------- FIELDING ----------------
-    top_fielding = []
-    for r in our_rows:
-        if r.catches > 0:
-            top_fielding.append({
-                "player_name": r.player.user.username,
-                "catches": r.catches
-            })
-
-    # ---------------- WAGON WHEEL ----------------
-    wagon_list = []
-    for w in WagonWheel.query.filter_by(match_id=match_id).all():
-        pname = Player.query.get(w.player_id).user.username
-        wagon_list.append({
-            "player_name": pname,
-            "shots": [{
-                "angle": w.angle,
-                "runs": w.runs,
-                "shot_type": w.shot_type
-            }]
-        })
-
-    # ---------------- RESULT ----------------
-    result = None
-    if m.team_runs is not None and m.opp_runs is not None:
-        if m.team_runs > m.opp_runs:
-            result = f"{m.team_name} won by {m.team_runs - m.opp_runs} runs"
-        elif m.opp_runs > m.team_runs:
-            result = f"{m.opponent_name} won by {m.opp_runs - m.team_runs} runs"
-        else:
-            result = "Match Tied"
-
-    # ---------------- AI COACH SUGGESTIONS ----------------
-    suggestions = generate_coach_suggestions(full_batting, full_bowling, top_fielding)
-
-    # ---------------- FINAL DATA ----------------
-    data = {
-        "match": m,
-        "result": result,
-
-        "our": {
-            "runs": m.team_runs or 0,
-            "wickets": m.team_wkts or 0,
-            "overs": float(m.team_overs or 0)
-        },
-
-        "opponent": {
-            "runs": m.opp_runs or 0,
-            "wickets": m.opp_wkts or 0,
-            "overs": float(m.opp_overs or 0)
-        },
-
-        "full_batting": full_batting,
-        "full_bowling": full_bowling,
-        "fow": fow,
-
-        "top_batting": sorted(full_batting, key=lambda x: x["runs"], reverse=True)[:3],
-        "top_bowling": sorted(full_bowling, key=lambda x: x["wickets"], reverse=True)[:3],
-        "top_fielding": top_fielding,
-
-        "wagon_list": wagon_list,
-        "suggestions": suggestions,
-
-        "generated_at": datetime.utcnow()
-    }
+    data = get_match_report_data(m)
 
     return render_template("match_report.html", data=data)
 
@@ -1523,50 +1846,10 @@ def match_report_view(match_id):
 @login_required
 def match_report_pdf(match_id):
 
-    # USE THE SAME DATA AS VIEW
-    response = match_report_view(match_id)
-    html_data = response.context["data"]  # Flask provides context here
-
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, leftMargin=30, rightMargin=30)
-    styles = getSampleStyleSheet()
-    story = []
-
-    m = html_data["match"]
-
-    # TITLE
-    story.append(Paragraph(f"Match Report — {m.title}", styles["Title"]))
-    story.append(Paragraph(f"{m.team_name} vs {m.opponent_name}", styles["Normal"]))
-    story.append(Spacer(1, 12))
-
-    # SCORE SUMMARY
-    summary = [
-        ["Team", "Runs", "Wickets", "Overs"],
-        [m.team_name, html_data["our"]["runs"], html_data["our"]["wickets"], html_data["our"]["overs"]],
-        [m.opponent_name, html_data["opponent"]["runs"], html_data["opponent"]["wickets"], html_data["opponent"]["overs"]],
-    ]
-
-    t = Table(summary)
-    t.setStyle(TableStyle([
-        ("BACKGROUND", (0,0), (-1,0), colors.lightblue),
-        ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
-    ]))
-    story.append(t)
-    story.append(Spacer(1, 12))
-
-    # TOP PERFORMERS
-    story.append(Paragraph("Top Performers", styles["Heading2"]))
-
-    for s in html_data["suggestions"]:
-        story.append(Paragraph(f"<b>{s['player_name']}</b>", styles["Normal"]))
-        for sug in s["suggestions"]:
-            story.append(Paragraph(f"• {sug}", styles["Normal"]))
-        story.append(Spacer(1, 6))
-
-    doc.build(story)
+    m = Match.query.get_or_404(match_id)
 
-    buffer.seek(0)
-    return send_file(buffer, download_name=f"match_{match_id}_report.pdf", as_attachment=True)
+    # same data as the HTML view, without rendering the template
+    return send_or_queue_pdf("match_report", match_report_pdf_data(m), f"match_{match_id}_report.pdf")
 
 
 
@@ -1710,67 +1993,29 @@ def notifications_page():
 def player_stats_pdf(player_id):
 
     player = Player.query.get_or_404(player_id)
-    stats = PlayerStats.query.filter_by(player_id=player_id).first()
-
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
-    styles = getSampleStyleSheet()
-    story = []
-
-    story.append(Paragraph(f"Player Stats Report - {player.user.username}", styles["Title"]))
-    story.append(Spacer(1, 12))
-
-    # Basic info table
-    data = [
-        ["Field", "Value"],
-        ["Name", player.user.username],
-        ["Age", player.age or "-"],
-        ["Batting Style", player.batting_style or "-"],
-        ["Bowling Style", player.bowling_style or "-"],
-        ["Role", player.role_in_team or "-"],
-    ]
+    return send_or_queue_pdf(
+        "player_stats", player_stats_pdf_data(player), f"{player.user.username}_stats.pdf"
+    )
 
-    t = Table(data)
-    t.setStyle(TableStyle([
-        ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
-        ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
-        ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
-    ]))
-    story.append(t)
-    story.append(Spacer(1, 20))
-
-    # Career Stats
-    if stats:
-        story.append(Paragraph("Career Stats", styles["Heading2"]))
-        data2 = [
-            ["Matches", stats.matches],
-            ["Runs", stats.total_runs],
-            ["Balls", stats.total_balls],
-            ["Fours", stats.total_fours],
-            ["Sixes", stats.total_sixes],
-            ["Wickets", stats.wickets],
-            ["Overs Bowled", stats.overs_bowled],
-            ["Runs Conceded", stats.runs_conceded],
-            ["Catches", stats.catches],
-        ]
-
-        t2 = Table(data2)
-        t2.setStyle(TableStyle([
-            ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
-        ]))
-
-        story.append(t2)
-    else:
-        story.append(Paragraph("No stats available yet.", styles["Normal"]))
 
-    doc.build(story)
-    buffer.seek(0)
+# --------------------------------------------------------
+# SEASON EXPORT — ZIP OF EVERY PLAYER'S STATS PDF
+# --------------------------------------------------------
+@app.route("/coach/players/stats.zip")
+@login_required
+def export_player_stats_zip():
+    if current_user.role != "coach":
+        abort(403)
 
-    return send_file(
-        buffer,
-        as_attachment=True,
-        download_name=f"{player.user.username}_stats.pdf",
-        mimetype="application/pdf"
+    batch_id = request.args.get("batch_id", type=int)
+    items = iter_player_stats_pdf_data(batch_id)
+    archive = stream_pdf_zip("player_stats", items, workers=app.config["PDF_WORKERS"])
+
+    filename = f"player_stats_batch_{batch_id}.zip" if batch_id else "player_stats.zip"
+    return Response(
+        stream_with_context(archive),
+        mimetype="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
 
@@ -1865,65 +2110,7 @@ def attendance_summary():
 @login_required
 def attendance_pdf():
     today = date.today()
-
-    attendance = Attendance.query.filter_by(date=today).all()
-
-    os.makedirs("generated_reports", exist_ok=True)
-    file_path = f"generated_reports/attendance_{today}.pdf"
-
-    doc = SimpleDocTemplate(
-        file_path,
-        pagesize=A4,
-        rightMargin=30,
-        leftMargin=30,
-        topMargin=30,
-        bottomMargin=30
-    )
-
-    styles = getSampleStyleSheet()
-    elements = []
-
-    # ===== TITLE =====
-    elements.append(Paragraph(
-        f"<b>Attendance Report</b><br/>Date: {today}",
-        styles["Title"]
-    ))
-
-    elements.append(Paragraph("<br/>", styles["Normal"]))
-
-    # ===== TABLE DATA =====
-    table_data = [
-        ["Player", "Status", "Coach Note"]
-    ]
-
-    for a in attendance:
-        table_data.append([
-            a.player.user.username,
-            "Present" if a.status == "present" else "Absent",
-            a.improvement_note or "-"
-        ])
-
-    table = Table(table_data, colWidths=[180, 80, 200])
-
-    table.setStyle(TableStyle([
-        ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
-        ("TEXTCOLOR", (0,0), (-1,0), colors.black),
-
-        ("ALIGN", (1,1), (-1,-1), "CENTER"),
-        ("ALIGN", (0,0), (0,-1), "LEFT"),
-
-        ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
-
-        ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
-        ("BOTTOMPADDING", (0,0), (-1,0), 10),
-        ("TOPPADDING", (0,0), (-1,0), 10),
-    ]))
-
-    elements.append(table)
-
-    doc.build(elements)
-
-    return send_file(file_path, as_attachment=True)
+    return send_or_queue_pdf("attendance", attendance_pdf_data(today), f"attendance_{today}.pdf")
 
 
 
@@ -2003,24 +2190,34 @@ def generate_ai_suggestions(player, attendance_note=None):
 
 
 
-from reportlab.platypus import SimpleDocTemplate, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
+# a year — drill document names change whenever DRILL_MAP does
+DRILL_PDF_MAX_AGE = 365 * 24 * 60 * 60
+
 
 @app.route("/drills/pdf")
+@app.route("/drills/pdf/<category>")
 @login_required
-def drills_pdf():
-    file_path = "generated_reports/drills_report.pdf"
-    doc = SimpleDocTemplate(file_path)
-    styles = getSampleStyleSheet()
-    content = []
+def drills_pdf(category=None):
+    if category is not None and category not in DRILL_CATEGORIES:
+        abort(404)
 
-    for topic, data in DRILL_MAP.items():
-        content.append(Paragraph(f"<b>{topic.upper()}</b>", styles["Heading2"]))
-        for d in data["drills"]:
-            content.append(Paragraph(f"- {d}", styles["Normal"]))
+    # rebuilds only if the files were removed since startup
+    drill_docs.build_drill_pdfs(app.config["DRILL_PDF_DIR"])
+    return redirect(url_for("drill_doc", filename=drill_docs.doc_name(category)))
 
-    doc.build(content)
-    return send_file(file_path, as_attachment=True)
+
+@app.route("/drills/docs/<filename>")
+@login_required
+def drill_doc(filename):
+    response = send_from_directory(
+        app.config["DRILL_PDF_DIR"], filename,
+        mimetype="application/pdf",
+        max_age=DRILL_PDF_MAX_AGE
+    )
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.cache_control.immutable = True
+    return response
 
 
 
@@ -2083,11 +2280,14 @@ def chat_user(user_id):
     ).order_by(Message.created_at).all()
 
     # MARK RECEIVED MESSAGES AS READ
-    Message.query.filter(
+    marked = Message.query.filter(
         Message.sender_id == user_id,
         Message.receiver_id == current_user.id,
-        Message.is_read == 0
+        Message.is_read == 0,
+        # deleted messages were already taken off the counter
+        Message.is_deleted == False
     ).update({"is_read": 1})
+    unread_counters.mark_direct_read(current_user.id, marked)
     db.session.commit()
 
     return render_template(
@@ -2106,6 +2306,8 @@ def delete_message(msg_id):
     if msg.sender_id != current_user.id:
         abort(403)
 
+    if msg.receiver_id and not msg.is_read and not msg.is_deleted:
+        unread_counters.mark_direct_read(msg.receiver_id)
     msg.is_deleted = 1
     db.session.commit()
     return redirect(request.referrer)
@@ -2184,6 +2386,9 @@ def chat_group(group_id):
         is_deleted=0
     ).order_by(Message.created_at).all()
 
+    unread_counters.mark_group_read(current_user.id, group_id)
+    db.session.commit()
+
     users = User.query.filter(User.id.in_(member_ids)).all()
     users_map = {u.id: u for u in users}
 
@@ -2339,78 +2544,11 @@ def availability_summary(availability_id):
 @app.route("/availability/<int:availability_id>/pdf")
 @login_required
 def availability_pdf(availability_id):
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-    from reportlab.lib.styles import getSampleStyleSheet
-    import os
-
     availability = PreMatchAvailability.query.get_or_404(availability_id)
-
-    # 🔹 Ensure folder exists
-    output_dir = "generated_reports"
-    os.makedirs(output_dir, exist_ok=True)
-
-    file_path = os.path.join(
-        output_dir,
-        f"pre_match_{availability_id}.pdf"
+    return send_or_queue_pdf(
+        "availability", availability_pdf_data(availability), f"pre_match_{availability_id}.pdf"
     )
 
-    doc = SimpleDocTemplate(file_path)
-    styles = getSampleStyleSheet()
-    elements = []
-
-    # 🔹 Title
-    elements.append(
-        Paragraph(
-            "<b>Pre-Match Availability Report</b>",
-            styles["Title"]
-        )
-    )
-    elements.append(Spacer(1, 12))
-
-    # 🔹 Match Details
-    elements.append(Paragraph(
-        f"<b>Title:</b> {availability.title or 'N/A'}",
-        styles["Normal"]
-    ))
-    elements.append(Paragraph(
-        f"<b>Date:</b> {availability.match_date or 'N/A'}",
-        styles["Normal"]
-    ))
-    elements.append(Paragraph(
-        f"<b>Venue:</b> {availability.venue or 'N/A'}",
-        styles["Normal"]
-    ))
-    elements.append(Spacer(1, 12))
-
-    # 🔹 Responses
-    responses = db.session.query(
-        User.username,
-        PreMatchResponse.status
-    ).join(
-        PreMatchResponse,
-        User.id == PreMatchResponse.user_id
-    ).filter(
-        PreMatchResponse.availability_id == availability_id
-    ).order_by(User.username).all()
-
-    if responses:
-        for r in responses:
-            elements.append(
-                Paragraph(
-                    f"{r.username} — <b>{r.status.upper()}</b>",
-                    styles["Normal"]
-                )
-            )
-    else:
-        elements.append(
-            Paragraph("No responses submitted yet.", styles["Italic"])
-        )
-
-    # 🔹 Build PDF
-    doc.build(elements)
-
-    return send_file(file_path, as_attachment=True)
-
 
 
 
@@ -2429,6 +2567,10 @@ def chat_send():
     )
 
     db.session.add(msg)
+    if msg.receiver_id:
+        unread_counters.record_direct_message(msg.receiver_id)
+    elif msg.group_id:
+        unread_counters.record_group_message(msg.group_id, current_user.id)
     db.session.commit()
 
     socketio.emit(
@@ -2487,6 +2629,34 @@ def join_match_room(data):
     match_id = data.get("match_id")
     join_room(f"match_{match_id}")
 
+    # resume handshake: a (re)connecting client sends the last ball id it
+    # holds and gets only the balls it missed, plus the current scoreboard
+    since_id = data.get("since_id")
+    if since_id is None or not match_id:
+        return
+
+    # a malformed cursor gets the full snapshot, as a fresh client would
+    try:
+        since_id = max(int(since_id), 0)
+    except (TypeError, ValueError):
+        since_id = 0
+
+    missed = LiveBall.query.filter(
+        LiveBall.match_id == match_id,
+        LiveBall.id > since_id
+    ).order_by(LiveBall.id.asc()).limit(LIVE_EVENTS_PAGE_SIZE).all()
+
+    m = db.session.get(Match, int(match_id))
+    innings = (m.current_innings or 1) if m else 1
+    state = get_innings_state(match_id, innings)
+
+    emit("live_resume", {
+        "match_id": match_id,
+        "balls": [serialize_live_ball(b) for b in missed],
+        "has_more": len(missed) == LIVE_EVENTS_PAGE_SIZE,
+        "state": state_to_summary(state, innings) if state else None
+    })
+
 
 # -------------------------------------------------
 # JOIN GROUP ROOM
@@ -2512,6 +2682,7 @@ def handle_send_message(data):
         delivered=1
     )
     db.session.add(msg)
+    unread_counters.record_direct_message(receiver_id)
     db.session.commit()
 
     payload = {
@@ -2552,6 +2723,7 @@ def handle_group_message(data):
         delivered=1
     )
     db.session.add(msg)
+    unread_counters.record_group_message(group_id, current_user.id)
     db.session.commit()
 
     socketio.emit(
@@ -2605,6 +2777,8 @@ def delete_group_message(data):
 @socketio.on("message_read")
 def message_read(data):
     msg = Message.query.get(data["message_id"])
+    if msg.receiver_id and not msg.is_read and not msg.is_deleted:
+        unread_counters.mark_direct_read(msg.receiver_id)
     msg.is_read = 1
     db.session.commit()
 
@@ -2630,6 +2804,8 @@ def edit_message(data):
 def delete_message(data):
     msg = Message.query.get(data["id"])
     if msg.sender_id == current_user.id:
+        if msg.receiver_id and not msg.is_read and not msg.is_deleted:
+            unread_counters.mark_direct_read(msg.receiver_id)
         msg.is_deleted = 1
         db.session.commit()
 
@@ -2640,16 +2816,76 @@ def delete_message(data):
 
 @socketio.on("mark_read")
 def handle_mark_read(data):
-    Message.query.filter_by(
+    marked = Message.query.filter_by(
         sender_id=data["sender_id"],
         receiver_id=current_user.id,
-        is_read=False
+        is_read=False,
+        # deleted messages were already taken off the counter
+        is_deleted=False
     ).update({"is_read": True})
 
+    unread_counters.mark_direct_read(current_user.id, marked)
+    db.session.commit()
+
+
+
+
+
+# --------------------------------------------------------
+# MAINTENANCE COMMANDS
+# --------------------------------------------------------
+@app.cli.command("db-upgrade")
+def db_upgrade_command():
+    """Apply pending schema migrations (columns + indexes)."""
+    ran = migrations.upgrade()
+    for name in ran:
+        print(f"Applied {name}")
+    if not ran:
+        print("Database is up to date.")
+
+
+@app.cli.command("rebuild-player-stats")
+def rebuild_player_stats_command():
+    """Rewrite the stats ledger from approved scorecards and rebuild PlayerStats."""
+    matches, players = stats_ledger.backfill_ledger()
+    db.session.commit()
+    print(f"Ledger rebuilt from {matches} approved matches; {players} players' totals derived.")
+
+
+@app.cli.command("rebuild-leaderboards")
+def rebuild_leaderboards_command():
+    """Recompute every leaderboard from the stats ledger."""
+    boards = leaderboards.rebuild_all()
     db.session.commit()
+    for season, rows in boards.items():
+        print(f"{season}: {rows} rows")
+
 
+@app.cli.command("build-drill-pdfs")
+def build_drill_pdfs_command():
+    """Render the drill documents for the current DRILL_MAP."""
+    built = drill_docs.build_drill_pdfs(app.config["DRILL_PDF_DIR"])
+    print(f"Drill documents version {drill_docs.drill_map_version()}: "
+          f"{len(built)} built, {len(DRILL_CATEGORIES) + 1 - len(built)} up to date.")
 
 
+@app.cli.command("db-check-indexes")
+def db_check_indexes_command():
+    """List hot-path indexes missing from the database."""
+    missing = migrations.missing_indexes()
+    for table, name in missing:
+        print(f"missing: {table}.{name}")
+    if not missing:
+        print("All hot-path indexes present.")
+
+
+@app.cli.command("rebuild-inbox-counters")
+def rebuild_inbox_counters_command():
+    """Recompute unread-message counters from the messages table."""
+    direct = unread_counters.rebuild_direct_counters()
+    groups = unread_counters.rebuild_group_counters()
+    db.session.commit()
+    print(f"Rebuilt {direct} direct and {groups} group unread counters.")
 
 
 # --------------------------------------------------------
@@ -0,0 +1,113 @@
+"""
+Query plans and timings for the hot query shapes, before and after the
+index migration, on a seeded throwaway SQLite database.
+
+    python bench/bench_indexes.py [rows_per_table]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text  # noqa: E402
+
+from app import app  # noqa: E402
+import migrations  # noqa: E402
+from models import (  # noqa: E402
+    db, Message, LiveBall, ManualScore, Attendance, Notification, MatchPayment
+)
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+REPEAT = 50
+
+
+def hot_queries():
+    today = date.today()
+    return {
+        "unread messages": Message.query.filter_by(receiver_id=7, is_read=False),
+        "group timeline": Message.query.filter_by(group_id=3, is_deleted=False).order_by(Message.created_at),
+        "live events since": LiveBall.query.filter(LiveBall.match_id == 5, LiveBall.id > ROWS // 2),
+        "match scorecard": ManualScore.query.filter_by(match_id=5, is_opponent=False),
+        "attendance today": Attendance.query.filter_by(date=today, player_id=11),
+        "recent notifications": Notification.query.filter(
+            Notification.user_id == 7, Notification.is_read == False
+        ).order_by(Notification.created_at.desc()),
+        "paid for match": MatchPayment.query.filter_by(availability_id=5, payment_status="paid"),
+    }
+
+
+def seed():
+    now = datetime.utcnow()
+    today = date.today()
+    n = ROWS
+
+    db.session.execute(Message.__table__.insert(), [
+        {"sender_id": i % 50 + 1, "receiver_id": (i * 7) % 200 + 1 if i % 3 else None,
+         "group_id": i % 20 if i % 3 == 0 else None, "content": "x",
+         "is_read": i % 4 == 0, "is_deleted": False, "created_at": now - timedelta(seconds=i)}
+        for i in range(n)
+    ])
+    db.session.execute(LiveBall.__table__.insert(), [
+        {"match_id": i % 100, "over_no": i // 6, "ball_no": i % 6 + 1, "runs": i % 7}
+        for i in range(n)
+    ])
+    db.session.execute(ManualScore.__table__.insert(), [
+        {"match_id": i % 500, "player_id": i % 300 + 1, "is_opponent": i % 12 == 0}
+        for i in range(n)
+    ])
+    db.session.execute(Attendance.__table__.insert(), [
+        {"player_id": i % 300 + 1, "date": today - timedelta(days=i // 300), "status": "present"}
+        for i in range(n)
+    ])
+    db.session.execute(Notification.__table__.insert(), [
+        {"user_id": i % 200 + 1, "message": "m", "is_read": i % 2 == 0,
+         "created_at": now - timedelta(minutes=i)}
+        for i in range(n)
+    ])
+    db.session.execute(MatchPayment.__table__.insert(), [
+        {"availability_id": i % 400, "user_id": i % 200 + 1, "amount": 100,
+         "payment_status": "paid" if i % 3 else "pending"}
+        for i in range(n)
+    ])
+    db.session.commit()
+
+
+def drop_hot_indexes():
+    for model, names in migrations.HOT_PATH_INDEXES.items():
+        for name in names:
+            db.session.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    db.session.execute(text("DELETE FROM schema_migrations"))
+    db.session.commit()
+
+
+def report(label):
+    print(f"\n=== {label} ===")
+    for name, q in hot_queries().items():
+        sql = str(q.statement.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}))
+        plan = db.session.execute(text("EXPLAIN QUERY PLAN " + sql)).fetchall()
+
+        start = time.perf_counter()
+        for _ in range(REPEAT):
+            q.all()
+        ms = (time.perf_counter() - start) * 1000 / REPEAT
+
+        print(f"{name:<22} {ms:8.3f} ms   " + " | ".join(row[-1] for row in plan))
+
+
+if __name__ == "__main__":
+    with app.app_context():
+        drop_hot_indexes()
+        seed()
+        report(f"before migration ({ROWS} rows per table)")
+
+        for applied in migrations.upgrade():
+            print(f"\napplied {applied}")
+        db.session.execute(text("ANALYZE"))
+
+        report("after migration")
+        print("\nmissing indexes:", migrations.missing_indexes() or "none")
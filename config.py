@@ -3,6 +3,8 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
 class Config:
     """
     Base configuration.
@@ -23,6 +25,25 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL", "sqlite:///cricpros_dev.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Background PDF jobs (pdf_jobs.py): status files + finished documents,
+    # shared by every worker process on the host.
+    PDF_JOB_DIR = os.environ.get(
+        "PDF_JOB_DIR", os.path.join(BASE_DIR, "generated_reports", "jobs")
+    )
+    PDF_WORKERS = int(os.environ.get("PDF_WORKERS", 2))
+
+    # Content-addressed PDF cache (pdf_cache.py)
+    PDF_CACHE_DIR = os.environ.get(
+        "PDF_CACHE_DIR", os.path.join(BASE_DIR, "generated_reports", "cache")
+    )
+    PDF_CACHE_MAX_BYTES = int(os.environ.get("PDF_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+    PDF_CACHE_MAX_AGE = int(os.environ.get("PDF_CACHE_MAX_AGE", 7 * 24 * 60 * 60))
+
+    # Precompiled drill documents (drill_docs.py)
+    DRILL_PDF_DIR = os.environ.get(
+        "DRILL_PDF_DIR", os.path.join(BASE_DIR, "generated_reports", "drills")
+    )
+
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -0,0 +1,71 @@
+"""
+Precompiled drill documents.
+
+DRILL_MAP only changes with a deploy, so the catalogue PDF and one PDF
+per DRILL_CATEGORIES entry are built once — at startup or with
+`flask build-drill-pdfs` — and served as files. Names carry a hash of
+DRILL_MAP, so a changed map gets new files (and new URLs) while the old
+ones are removed; an unchanged map is never re-rendered.
+
+    <DRILL_PDF_DIR>/drills_<version>.pdf
+    <DRILL_PDF_DIR>/drills_<category>_<version>.pdf
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+from drillmap import DRILL_MAP, DRILL_CATEGORIES
+from pdf_render import render_drills_pdf
+from reports import drills_pdf_data
+
+_version = None
+
+
+def drill_map_version():
+    global _version
+    if _version is None:
+        blob = json.dumps([DRILL_MAP, DRILL_CATEGORIES], sort_keys=True)
+        _version = hashlib.sha256(blob.encode()).hexdigest()[:16]
+    return _version
+
+
+def doc_name(category=None):
+    if category is None:
+        return f"drills_{drill_map_version()}.pdf"
+    return f"drills_{category}_{drill_map_version()}.pdf"
+
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def build_drill_pdfs(out_dir):
+    """
+    Render whatever is missing for the current DRILL_MAP and drop files
+    of older versions. Returns the names that were built.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+
+    wanted = {doc_name(): None}
+    wanted.update({doc_name(c): c for c in DRILL_CATEGORIES})
+
+    built = []
+    for name, category in wanted.items():
+        path = os.path.join(out_dir, name)
+        if os.path.exists(path):
+            continue
+        _write_atomic(path, render_drills_pdf(drills_pdf_data(category)))
+        built.append(name)
+
+    for name in os.listdir(out_dir):
+        if name.startswith("drills_") and name.endswith(".pdf") and name not in wanted:
+            try:
+                os.remove(os.path.join(out_dir, name))
+            except OSError:
+                pass
+
+    return built
@@ -471,4 +471,34 @@ DRILL_MAP = {
     "pov": ["player", "coach"]
 }
 
-}
\ No newline at end of file
+}
+
+# =====================================================
+# CATEGORIES (one drill document per category)
+# =====================================================
+
+DRILL_CATEGORIES = {
+    "batting": [
+        "bat swing", "straight bat", "backlift control", "head position",
+        "balance batting", "footwork batting", "front foot movement",
+        "back foot movement", "timing", "shot selection", "soft hands batting",
+        "power hitting", "inside edge issues", "outside edge issues",
+        "late swing handling", "variable bounce", "under lights batting"
+    ],
+    "bowling": [
+        "bowling action", "run-up consistency", "front arm", "wrist position",
+        "seam control", "release point", "line and length", "pace variation",
+        "death over bowling", "googly control", "arm ball accuracy",
+        "spin on flat pitch"
+    ],
+    "fielding": [
+        "catching", "ground fielding", "throwing accuracy", "diving",
+        "glove work", "keeping footwork", "stumping"
+    ],
+    "fitness": [
+        "balance training", "core stability", "agility", "speed"
+    ],
+    "mental": [
+        "concentration", "pressure handling"
+    ]
+}
@@ -0,0 +1,154 @@
+"""
+Streaming CSV exports.
+
+Each *_export() returns (header, rows): rows is a generator over a
+yield_per query, so the database driver hands rows over in chunks and
+nothing holds the whole result. csv_response() writes them to the
+response one line at a time — memory stays flat however big the export.
+"""
+import csv
+
+from flask import Response, stream_with_context
+
+from models import (
+    db, User, Player, Attendance, PlayerStats, ManualScore, MatchPayment
+)
+
+# rows fetched per round trip
+CHUNK = 500
+
+
+# ----------------------------------------------------
+# STREAMING
+# ----------------------------------------------------
+class _Line:
+    """csv.writer target that just hands back what it was given."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(header, rows):
+    writer = csv.writer(_Line())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def csv_response(filename, header, rows):
+    return Response(
+        stream_with_context(stream_csv(header, rows)),
+        mimetype="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+# ----------------------------------------------------
+# EXPORTS
+# ----------------------------------------------------
+def payment_export(availability_id):
+    header = ["Player Name", "Amount", "Transaction ID", "Paid Date"]
+
+    q = db.session.query(
+        User.username,
+        MatchPayment.amount,
+        MatchPayment.transaction_id,
+        MatchPayment.created_at
+    ).join(
+        User, User.id == MatchPayment.user_id
+    ).filter(
+        MatchPayment.availability_id == availability_id,
+        MatchPayment.payment_status == "paid"
+    ).order_by(MatchPayment.id)
+
+    def rows():
+        for username, amount, transaction_id, created_at in q.yield_per(CHUNK):
+            yield [username, float(amount), transaction_id, created_at.strftime("%Y-%m-%d %H:%M")]
+
+    return header, rows()
+
+
+def attendance_export(start, end):
+    header = ["Date", "Player", "Status", "Category", "Coach Note"]
+
+    q = db.session.query(
+        Attendance.date,
+        User.username,
+        Attendance.status,
+        Attendance.category,
+        Attendance.improvement_note
+    ).join(
+        Player, Player.id == Attendance.player_id
+    ).join(
+        User, User.id == Player.user_id
+    ).filter(
+        Attendance.date >= start,
+        Attendance.date <= end
+    ).order_by(Attendance.date, User.username)
+
+    def rows():
+        for day, username, status, category, note in q.yield_per(CHUNK):
+            yield [day.isoformat(), username, status, category or "", note or ""]
+
+    return header, rows()
+
+
+def player_stats_export(batch_id=None):
+    header = [
+        "Player", "Matches", "Runs", "Balls", "Fours", "Sixes", "Outs",
+        "Wickets", "Overs Bowled", "Runs Conceded", "Catches", "Drops", "Saves"
+    ]
+
+    q = db.session.query(
+        User.username,
+        PlayerStats.matches, PlayerStats.total_runs, PlayerStats.total_balls,
+        PlayerStats.total_fours, PlayerStats.total_sixes, PlayerStats.outs,
+        PlayerStats.wickets, PlayerStats.overs_bowled, PlayerStats.runs_conceded,
+        PlayerStats.catches, PlayerStats.drops, PlayerStats.saves
+    ).join(
+        Player, Player.id == PlayerStats.player_id
+    ).join(
+        User, User.id == Player.user_id
+    ).filter(
+        User.status == "approved"
+    )
+    if batch_id:
+        q = q.filter(Player.batch_id == batch_id)
+    q = q.order_by(User.username)
+
+    def rows():
+        for r in q.yield_per(CHUNK):
+            yield [r[0]] + [v or 0 for v in r[1:]]
+
+    return header, rows()
+
+
+def manual_score_export(match_id):
+    header = [
+        "Side", "Player", "Runs", "Balls", "Fours", "Sixes", "Out", "Dismissal",
+        "Wicket Over", "Overs", "Runs Conceded", "Wickets", "Catches", "Drops", "Saves"
+    ]
+
+    q = db.session.query(
+        ManualScore, User.username
+    ).outerjoin(
+        Player, Player.id == ManualScore.player_id
+    ).outerjoin(
+        User, User.id == Player.user_id
+    ).filter(
+        ManualScore.match_id == match_id
+    ).order_by(ManualScore.is_opponent, ManualScore.id)
+
+    def rows():
+        for s, username in q.yield_per(CHUNK):
+            yield [
+                "Opponent" if s.is_opponent else "Team",
+                username or "-",
+                s.runs or 0, s.balls_faced or 0, s.fours or 0, s.sixes or 0,
+                "Yes" if s.is_out else "No",
+                s.dismissal_type or "", s.wicket_over or "",
+                s.overs or 0, s.runs_conceded or 0, s.wickets or 0,
+                s.catches or 0, s.drops or 0, s.saves or 0
+            ]
+
+    return header, rows()
@@ -0,0 +1,227 @@
+"""
+Materialized leaderboards.
+
+Rankings are computed from the per-match stats ledger (stats_ledger.py)
+and stored in leaderboard_entries, one board per category, Batch and
+season. Approving a match rebuilds the boards of its season and of the
+career ("all") board set; views only read stored rows:
+
+    top()          one page of a board — a range scan on position
+    player_rank()  one player's row — a unique-key lookup
+
+    flask rebuild-leaderboards    rebuild every board from the ledger
+"""
+from datetime import datetime
+
+from sqlalchemy import Integer, case, cast, extract, func, insert, literal, select, union_all
+
+from models import (
+    db, User, Player, Match, BattingStats, BowlingStats, FieldingStats, LeaderboardEntry
+)
+
+ALL_BATCHES = 0
+ALL_SEASONS = "all"
+
+# qualification for the rate categories
+MIN_BALLS_FACED = 30
+MIN_BALLS_BOWLED = 30
+
+PER_PAGE = 20
+
+
+def _average(t):
+    return round(t["runs"] / t["outs"], 2) if t["outs"] else None
+
+
+def _strike_rate(t):
+    return round(t["runs"] * 100 / t["balls"], 2) if t["balls"] >= MIN_BALLS_FACED else None
+
+
+def _economy(t):
+    b = t["balls_bowled"]
+    return round(t["runs_conceded"] * 6 / b, 2) if b >= MIN_BALLS_BOWLED else None
+
+
+# category -> (label, value from the player's totals or None, lower is better)
+CATEGORIES = {
+    "runs": ("Runs", lambda t: t["runs"] or None, False),
+    "average": ("Batting Average", _average, False),
+    "strike_rate": ("Strike Rate", _strike_rate, False),
+    "wickets": ("Wickets", lambda t: t["wickets"] or None, False),
+    "economy": ("Economy", _economy, True),
+    "catches": ("Catches", lambda t: t["catches"] or None, False),
+}
+
+TOTAL_FIELDS = (
+    "matches", "runs", "balls", "outs", "balls_bowled", "runs_conceded", "wickets", "catches"
+)
+
+
+# ----------------------------------------------------
+# TOTALS PER SEASON
+# ----------------------------------------------------
+def _balls_bowled(overs):
+    """Overs are stored as 4.3 = four overs and three balls."""
+    tenths = cast(func.round(overs * 10), Integer)
+    return (tenths - tenths % 10) // 10 * 6 + tenths % 10
+
+
+def _season_totals(season):
+    """
+    {player_id: totals} for one season (or every season), with the
+    player's name and current batch — one grouped query over the ledger.
+    """
+    zero = literal(0)
+
+    bat = select(
+        BattingStats.player_id.label("player_id"),
+        BattingStats.match_id.label("match_id"),
+        BattingStats.runs.label("runs"), BattingStats.balls.label("balls"),
+        case((BattingStats.is_out == True, 1), else_=0).label("outs"),
+        zero.label("balls_bowled"), zero.label("runs_conceded"), zero.label("wickets"),
+        zero.label("catches")
+    )
+    bowl = select(
+        BowlingStats.player_id, BowlingStats.match_id,
+        zero, zero, zero,
+        _balls_bowled(BowlingStats.overs), BowlingStats.runs_conceded, BowlingStats.wickets,
+        zero
+    )
+    field = select(
+        FieldingStats.player_id, FieldingStats.match_id,
+        zero, zero, zero,
+        zero, zero, zero,
+        FieldingStats.catches
+    )
+    ledger = union_all(bat, bowl, field).subquery()
+    c = ledger.c
+
+    q = select(
+        c.player_id, User.username, Player.batch_id,
+        func.count(func.distinct(c.match_id)),
+        func.sum(c.runs), func.sum(c.balls), func.sum(c.outs),
+        func.sum(c.balls_bowled), func.sum(c.runs_conceded), func.sum(c.wickets),
+        func.sum(c.catches)
+    ).join(
+        Player, Player.id == c.player_id
+    ).join(
+        User, User.id == Player.user_id
+    ).where(
+        User.status == "approved"
+    ).group_by(
+        c.player_id, User.username, Player.batch_id
+    )
+
+    if season != ALL_SEASONS:
+        q = q.join(Match, Match.id == c.match_id).where(
+            extract("year", Match.match_date) == int(season)
+        )
+
+    totals = {}
+    for pid, name, batch_id, *values in db.session.execute(q):
+        t = dict(zip(TOTAL_FIELDS, (v or 0 for v in values)))
+        t.update(name=name, batch_id=batch_id)
+        totals[pid] = t
+    return totals
+
+
+# ----------------------------------------------------
+# RANKING
+# ----------------------------------------------------
+def _board_rows(category, totals, batch_id, season, now):
+    _, value_of, ascending = CATEGORIES[category]
+
+    scored = []
+    for pid, t in totals.items():
+        if batch_id != ALL_BATCHES and t["batch_id"] != batch_id:
+            continue
+        value = value_of(t)
+        if value is not None:
+            scored.append((value, t["name"] or "", pid, t["matches"]))
+
+    scored.sort(key=lambda r: (r[0] if ascending else -r[0], r[1], r[2]))
+
+    rows, rank, previous = [], 0, None
+    for position, (value, name, pid, matches) in enumerate(scored, start=1):
+        if value != previous:
+            rank, previous = position, value
+        rows.append({
+            "category": category, "batch_id": batch_id, "season": season,
+            "position": position, "rank": rank,
+            "player_id": pid, "player_name": name,
+            "value": float(value), "matches": matches, "refreshed_at": now
+        })
+    return rows
+
+
+def refresh_season(season):
+    """
+    Rebuild every board of one season: all categories, all batches and
+    each batch on its own. Part of the caller's transaction.
+    """
+    totals = _season_totals(season)
+    batch_ids = {ALL_BATCHES} | {t["batch_id"] for t in totals.values() if t["batch_id"]}
+    now = datetime.utcnow()
+
+    rows = []
+    for category in CATEGORIES:
+        for batch_id in batch_ids:
+            rows.extend(_board_rows(category, totals, batch_id, season, now))
+
+    LeaderboardEntry.query.filter_by(season=season).delete(synchronize_session=False)
+    if rows:
+        db.session.execute(insert(LeaderboardEntry), rows)
+    return len(rows)
+
+
+def refresh_for_match(match_id):
+    """Approval hook: the career boards and the boards of the match's season."""
+    m = db.session.get(Match, match_id)
+    refresh_season(ALL_SEASONS)
+    if m and m.match_date:
+        refresh_season(str(m.match_date.year))
+
+
+def rebuild_all():
+    """Every season that has a dated match, plus the career boards."""
+    years = {
+        int(y) for (y,) in db.session.query(extract("year", Match.match_date)).distinct()
+        if y is not None
+    }
+    LeaderboardEntry.query.delete(synchronize_session=False)
+
+    seasons = [ALL_SEASONS] + [str(y) for y in sorted(years)]
+    return {s: refresh_season(s) for s in seasons}
+
+
+# ----------------------------------------------------
+# READS
+# ----------------------------------------------------
+def _board(category, batch_id, season):
+    return LeaderboardEntry.query.filter_by(
+        category=category, batch_id=batch_id or ALL_BATCHES, season=season
+    )
+
+
+def top(category, batch_id=ALL_BATCHES, season=ALL_SEASONS, page=1, per_page=PER_PAGE):
+    """One page of a board and whether there is another after it."""
+    first = (page - 1) * per_page + 1
+    rows = _board(category, batch_id, season).filter(
+        LeaderboardEntry.position.between(first, first + per_page)
+    ).order_by(LeaderboardEntry.position).all()
+    return rows[:per_page], len(rows) > per_page
+
+
+def player_rank(player_id, category, batch_id=ALL_BATCHES, season=ALL_SEASONS):
+    return _board(category, batch_id, season).filter_by(player_id=player_id).first()
+
+
+def seasons():
+    """Seasons with a board, newest first after the career board."""
+    found = [
+        s for (s,) in db.session.query(LeaderboardEntry.season).filter_by(
+            category="runs", batch_id=ALL_BATCHES
+        ).distinct()
+        if s != ALL_SEASONS
+    ]
+    return [ALL_SEASONS] + sorted(found, reverse=True)
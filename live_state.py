@@ -0,0 +1,683 @@
+import json
+from types import SimpleNamespace
+
+from sqlalchemy import and_, func, or_
+
+from models import db, Match, LiveBall, LiveInnings, LiveOver, LiveCheckpoint
+
+# extras that add a penalty run and do not count as a legal delivery
+PENALTY_EXTRAS = ("wide", "no_ball")
+
+# legal deliveries in an over; a checkpoint is stored when one completes
+OVER_BALLS = 6
+
+
+# ----------------------------------------------------
+# PURE STATE HELPERS
+# ----------------------------------------------------
+def empty_state():
+    return {
+        "runs": 0, "wickets": 0, "legal_balls": 0, "extras": 0,
+        "batters": {}, "bowlers": {}
+    }
+
+
+def is_legal(extras):
+    return (extras or "none").lower() not in PENALTY_EXTRAS
+
+
+def is_wicket(wicket):
+    return bool(wicket) and wicket != "none"
+
+
+def apply_ball(state, ball, sign=1):
+    """
+    Add one ball to an innings state dict (sign=-1 takes it back out).
+    `ball` is anything with runs / extras / wicket / striker / bowler.
+    """
+    runs = int(ball.runs or 0)
+    legal = is_legal(ball.extras)
+    penalty = 0 if legal else 1
+    out = is_wicket(ball.wicket)
+
+    state["runs"] += sign * (runs + penalty)
+    state["extras"] += sign * penalty
+    if legal:
+        state["legal_balls"] += sign
+    if out:
+        state["wickets"] += sign
+
+    if ball.striker:
+        b = state["batters"].setdefault(
+            ball.striker, {"runs": 0, "balls": 0, "fours": 0, "sixes": 0, "out": False}
+        )
+        b["runs"] += sign * runs
+        if legal:
+            b["balls"] += sign
+        if runs == 4:
+            b["fours"] += sign
+        if runs == 6:
+            b["sixes"] += sign
+        if out:
+            b["out"] = sign > 0
+        if sign < 0 and not (b["runs"] or b["balls"] or b["out"]):
+            # an undone ball was all this batter had: off the scorecard
+            del state["batters"][ball.striker]
+
+    if ball.bowler:
+        bw = state["bowlers"].setdefault(
+            ball.bowler, {"runs": 0, "balls": 0, "wickets": 0}
+        )
+        bw["runs"] += sign * (runs + penalty)
+        if legal:
+            bw["balls"] += sign
+        if out:
+            bw["wickets"] += sign
+        if sign < 0 and not (bw["runs"] or bw["balls"] or bw["wickets"]):
+            del state["bowlers"][ball.bowler]
+
+    return state
+
+
+def new_partnership():
+    return {"runs": 0, "balls": 0, "batters": []}
+
+
+def empty_timeline_state():
+    state = empty_state()
+    state["partnership"] = new_partnership()
+    return state
+
+
+def apply_timeline_ball(state, ball):
+    """
+    apply_ball plus the current partnership, which starts afresh after
+    each wicket. Forward only — used for checkpoints and the timeline.
+    """
+    apply_ball(state, ball)
+
+    p = state.setdefault("partnership", new_partnership())
+    if not p["batters"]:
+        p["batters"] = [n for n in (ball.striker, ball.non_striker) if n]
+    legal = is_legal(ball.extras)
+    p["runs"] += int(ball.runs or 0) + (0 if legal else 1)
+    if legal:
+        p["balls"] += 1
+
+    if is_wicket(ball.wicket):
+        state["partnership"] = new_partnership()
+    return state
+
+
+def apply_ball_to_over(over, ball, sign=1):
+    """Add one ball to its LiveOver rollup row (sign=-1 takes it back out)."""
+    runs = int(ball.runs or 0)
+    legal = is_legal(ball.extras)
+    penalty = 0 if legal else 1
+
+    over.runs = (over.runs or 0) + sign * (runs + penalty)
+    over.extras = (over.extras or 0) + sign * penalty
+    over.deliveries = (over.deliveries or 0) + sign
+    if legal:
+        over.legal_balls = (over.legal_balls or 0) + sign
+    if is_wicket(ball.wicket):
+        over.wickets = (over.wickets or 0) + sign
+
+    if sign > 0:
+        if ball.bowler:
+            over.bowler = ball.bowler
+        if not over.first_ball_id or ball.id < over.first_ball_id:
+            over.first_ball_id = ball.id
+        if not over.last_ball_id or ball.id > over.last_ball_id:
+            over.last_ball_id = ball.id
+    return over
+
+
+def overs_str(legal_balls):
+    return f"{legal_balls // 6}.{legal_balls % 6}"
+
+
+# ----------------------------------------------------
+# PERSISTED INNINGS ROW
+# ----------------------------------------------------
+def row_to_state(row):
+    return {
+        "runs": row.runs or 0,
+        "wickets": row.wickets or 0,
+        "legal_balls": row.legal_balls or 0,
+        "extras": row.extras or 0,
+        "batters": json.loads(row.batters or "{}"),
+        "bowlers": json.loads(row.bowlers or "{}")
+    }
+
+
+def state_to_row(state, row):
+    row.runs = state["runs"]
+    row.wickets = state["wickets"]
+    row.legal_balls = state["legal_balls"]
+    row.extras = state["extras"]
+    row.batters = json.dumps(state["batters"])
+    row.bowlers = json.dumps(state["bowlers"])
+
+
+def _counted_in_innings(innings):
+    """Balls of an innings that count — undone balls and correction events don't."""
+    in_innings = LiveBall.innings == innings
+    if innings == 1:
+        # balls stored before LiveBall.innings existed belong to the 1st innings
+        in_innings = or_(in_innings, LiveBall.innings.is_(None))
+    return and_(in_innings, LiveBall.voided.isnot(True))
+
+
+def rebuild_innings(match_id, innings):
+    """
+    Replay the stored balls of one innings into its LiveInnings row, its
+    LiveOver rollups and its end-of-over checkpoints. Only needed for
+    matches scored before those tables existed.
+    """
+    row = LiveInnings.query.filter_by(match_id=match_id, innings=innings).first()
+    if not row:
+        row = LiveInnings(match_id=match_id, innings=innings)
+        db.session.add(row)
+
+    for model in (LiveOver, LiveCheckpoint):
+        model.query.filter_by(
+            match_id=match_id, innings=innings
+        ).delete(synchronize_session=False)
+
+    state = empty_timeline_state()
+    overs = {}
+    checkpoints = []
+    last_id = 0
+
+    balls = LiveBall.query.filter(
+        LiveBall.match_id == match_id, _counted_in_innings(innings)
+    ).order_by(LiveBall.id.asc())
+
+    for b in balls:
+        apply_timeline_ball(state, b)
+        over = overs.get(b.over_no)
+        if over is None:
+            over = overs[b.over_no] = LiveOver(match_id=match_id, innings=innings, over_no=b.over_no)
+        apply_ball_to_over(over, b)
+        last_id = b.id
+
+        if is_legal(b.extras) and over.legal_balls == OVER_BALLS:
+            checkpoints.append(LiveCheckpoint(
+                match_id=match_id, innings=innings, over_no=b.over_no,
+                last_ball_id=b.id, state=json.dumps(state)
+            ))
+
+    db.session.add_all(overs.values())
+    db.session.add_all(checkpoints)
+    state_to_row(state, row)
+    row.last_ball_id = last_id
+    return row
+
+
+def _over_rows(match_id, innings, over_nos):
+    """{over_no: LiveOver} for existing rollups of one innings, locked."""
+    return {
+        o.over_no: o for o in LiveOver.query.filter(
+            LiveOver.match_id == match_id,
+            LiveOver.innings == innings,
+            LiveOver.over_no.in_(over_nos)
+        ).with_for_update()
+    }
+
+
+def record_overs(balls):
+    """
+    Fold freshly added balls of one innings into their over rollups and
+    checkpoint every over they complete.
+    """
+    if not balls:
+        return
+    first = balls[0]
+    innings = first.innings or 1
+    overs = _over_rows(first.match_id, innings, {b.over_no for b in balls})
+    completed = []
+
+    for b in balls:
+        over = overs.get(b.over_no)
+        if over is None:
+            over = overs[b.over_no] = LiveOver(
+                match_id=b.match_id, innings=innings, over_no=b.over_no
+            )
+            db.session.add(over)
+        apply_ball_to_over(over, b)
+
+        if is_legal(b.extras) and over.legal_balls == OVER_BALLS:
+            completed.append(b.over_no)
+
+    for over_no in completed:
+        save_checkpoint(first.match_id, innings, over_no)
+
+
+def record_ball(ball):
+    """
+    Fold a freshly added LiveBall into its innings row — O(1), no replay.
+    Call inside the same transaction that adds the ball (after a flush).
+    """
+    innings = ball.innings or 1
+    row = LiveInnings.query.filter_by(
+        match_id=ball.match_id, innings=innings
+    ).with_for_update().first()
+
+    if not row:
+        # first ball of the innings, or a match scored before this table existed
+        return rebuild_innings(ball.match_id, innings)
+
+    record_overs([ball])
+    state = apply_ball(row_to_state(row), ball)
+    state_to_row(state, row)
+    row.last_ball_id = ball.id
+    return row
+
+
+def record_balls(balls):
+    """
+    Fold an ordered batch of freshly added balls into their innings rows,
+    touching each innings row once. Returns {innings: row}.
+    """
+    rows = {}
+    states = {}
+    fresh = {}
+
+    for ball in balls:
+        innings = ball.innings or 1
+        if innings not in rows:
+            row = LiveInnings.query.filter_by(
+                match_id=ball.match_id, innings=innings
+            ).with_for_update().first()
+            if not row:
+                # the rebuild already includes this batch (it was flushed)
+                rows[innings] = rebuild_innings(ball.match_id, innings)
+                continue
+            rows[innings] = row
+            states[innings] = row_to_state(row)
+
+        if innings in states:
+            apply_ball(states[innings], ball)
+            rows[innings].last_ball_id = ball.id
+            fresh.setdefault(innings, []).append(ball)
+
+    for innings, state in states.items():
+        state_to_row(state, rows[innings])
+        record_overs(fresh[innings])
+
+    return rows
+
+
+def get_innings_state(match_id, innings=1):
+    row = LiveInnings.query.filter_by(match_id=match_id, innings=innings).first()
+    if not row:
+        if not LiveBall.query.filter_by(match_id=match_id).first():
+            return None
+        row = rebuild_innings(match_id, innings)
+        db.session.commit()
+    return row_to_state(row)
+
+
+def state_to_summary(state, innings=1):
+    """
+    Scoreboard payload in the shape live_score.js renders.
+    """
+    return {
+        "innings": innings,
+        "totalRuns": state["runs"],
+        "wickets": state["wickets"],
+        "balls": state["legal_balls"],
+        "extras": state["extras"],
+        "overs": overs_str(state["legal_balls"]),
+        "batsmen": state["batters"],
+        "bowlers": state["bowlers"]
+    }
+
+
+# ----------------------------------------------------
+# OVER ROLLUPS (BALL HISTORY)
+# ----------------------------------------------------
+def match_overs(match_id):
+    """LiveOver rows of a match, oldest first; built once for older matches."""
+    def stored():
+        return LiveOver.query.filter_by(match_id=match_id).order_by(
+            LiveOver.innings.asc(), LiveOver.over_no.asc()
+        ).all()
+
+    overs = stored()
+    if overs:
+        return overs
+
+    # only balls that count make overs: a match whose balls were all
+    # undone has none, and rebuilding would not change that
+    innings_nos = {
+        i or 1 for (i,) in db.session.query(LiveBall.innings).filter(
+            LiveBall.match_id == match_id, LiveBall.voided.isnot(True)
+        ).distinct()
+    }
+    if not innings_nos:
+        return overs
+
+    for innings in sorted(innings_nos):
+        rebuild_innings(match_id, innings)
+    db.session.commit()
+    return stored()
+
+
+def over_balls(match_id, innings, over_no, after_id=0, limit=50):
+    """
+    One page of the balls of an over, keyset-paginated on LiveBall.id:
+    (balls, next_after_id) — next_after_id is None on the last page.
+    """
+    balls = LiveBall.query.filter(
+        LiveBall.match_id == match_id,
+        _counted_in_innings(innings),
+        LiveBall.over_no == over_no,
+        LiveBall.id > after_id
+    ).order_by(LiveBall.id.asc()).limit(limit + 1).all()
+
+    if len(balls) > limit:
+        return balls[:limit], balls[limit - 1].id
+    return balls, None
+
+
+# ----------------------------------------------------
+# CHECKPOINTS + TIMELINE
+# ----------------------------------------------------
+def nearest_checkpoint(match_id, innings, before_over):
+    """Latest checkpoint of the innings for an over before `before_over`."""
+    return LiveCheckpoint.query.filter(
+        LiveCheckpoint.match_id == match_id,
+        LiveCheckpoint.innings == innings,
+        LiveCheckpoint.over_no < before_over
+    ).order_by(LiveCheckpoint.over_no.desc()).first()
+
+
+def _balls_after(match_id, innings, after_over, upto_over, upto_ball=None):
+    """Balls of overs after_over+1 .. upto_over (ball_no <= upto_ball in the last)."""
+    q = LiveBall.query.filter(
+        LiveBall.match_id == match_id,
+        _counted_in_innings(innings),
+        LiveBall.over_no > after_over,
+        LiveBall.over_no <= upto_over
+    )
+    if upto_ball is not None:
+        q = q.filter(or_(LiveBall.over_no < upto_over, LiveBall.ball_no <= upto_ball))
+    return q.order_by(LiveBall.id.asc()).all()
+
+
+def _replay_from(match_id, innings, over_no, ball_no=None):
+    """(state, checkpoint used, balls replayed) at over_no / ball_no."""
+    cp = nearest_checkpoint(match_id, innings, over_no)
+    state = json.loads(cp.state) if cp else empty_timeline_state()
+
+    balls = _balls_after(match_id, innings, cp.over_no if cp else 0, over_no, ball_no)
+    for b in balls:
+        apply_timeline_ball(state, b)
+    return state, cp, balls
+
+
+def save_checkpoint(match_id, innings, over_no):
+    """
+    Store the state at the end of an over: the previous checkpoint plus
+    the balls since. Call after the over's last ball is flushed.
+    """
+    state, cp, balls = _replay_from(match_id, innings, over_no)
+
+    row = LiveCheckpoint.query.filter_by(
+        match_id=match_id, innings=innings, over_no=over_no
+    ).first()
+    if not row:
+        row = LiveCheckpoint(match_id=match_id, innings=innings, over_no=over_no)
+        db.session.add(row)
+
+    row.state = json.dumps(state)
+    row.last_ball_id = balls[-1].id if balls else (cp.last_ball_id if cp else 0)
+    return row
+
+
+def state_at(match_id, innings, over_no, ball_no):
+    """
+    Innings state after ball `ball_no` of over `over_no` (ball 0 is the
+    end of the previous over): the nearest checkpoint plus at most one
+    over of balls. Returns (state, checkpoint over or None, balls replayed).
+    """
+    state, cp, balls = _replay_from(match_id, innings, over_no, ball_no)
+    return state, (cp.over_no if cp else None), len(balls)
+
+
+# ----------------------------------------------------
+# LIVE SEQUENCE (COMPARE-AND-SWAP)
+# ----------------------------------------------------
+def current_seq(match_id):
+    return db.session.query(
+        func.coalesce(Match.live_seq, 0)
+    ).filter(Match.id == match_id).scalar() or 0
+
+
+def claim_seq(match_id, expected=None, count=1):
+    """
+    Advance Match.live_seq by `count` in one conditional UPDATE. With
+    `expected`, only when it still equals the stored value — a scorer
+    working from a stale view gets None and must refresh. Returns the
+    new live_seq. Part of the caller's transaction.
+    """
+    seq = func.coalesce(Match.live_seq, 0)
+    q = Match.query.filter(Match.id == match_id)
+    if expected is not None:
+        q = q.filter(seq == expected)
+
+    if not q.update({Match.live_seq: seq + count}, synchronize_session=False):
+        return None
+    return current_seq(match_id)
+
+
+# ----------------------------------------------------
+# CORRECTIONS (UNDO / AMEND)
+# ----------------------------------------------------
+AMENDABLE_FIELDS = (
+    "over_no", "ball_no", "striker", "non_striker", "bowler",
+    "runs", "extras", "wicket", "commentary", "angle", "shot_type"
+)
+
+
+def _fold(ball, sign):
+    """Add (sign=1) or take back (sign=-1) one ball in its innings row and over — O(1)."""
+    innings = ball.innings or 1
+
+    row = LiveInnings.query.filter_by(
+        match_id=ball.match_id, innings=innings
+    ).with_for_update().first()
+    if row:
+        state_to_row(apply_ball(row_to_state(row), ball, sign), row)
+
+    over = _over_rows(ball.match_id, innings, {ball.over_no}).get(ball.over_no)
+    if over is None and sign > 0:
+        over = LiveOver(match_id=ball.match_id, innings=innings, over_no=ball.over_no)
+        db.session.add(over)
+    if over is not None:
+        apply_ball_to_over(over, ball, sign)
+        if not over.deliveries:
+            db.session.delete(over)
+    return row
+
+
+def refresh_checkpoints(match_id, innings, from_over):
+    """
+    Checkpoints from `from_over` on are stale after a correction; re-save
+    the ones whose over is still complete, each from the one before.
+    O(overs) — shift_checkpoints handles the common corrections.
+    """
+    LiveCheckpoint.query.filter(
+        LiveCheckpoint.match_id == match_id,
+        LiveCheckpoint.innings == innings,
+        LiveCheckpoint.over_no >= from_over
+    ).delete(synchronize_session=False)
+
+    complete = LiveOver.query.filter(
+        LiveOver.match_id == match_id,
+        LiveOver.innings == innings,
+        LiveOver.over_no >= from_over,
+        LiveOver.legal_balls >= OVER_BALLS
+    ).order_by(LiveOver.over_no.asc())
+
+    for over in complete:
+        save_checkpoint(match_id, innings, over.over_no)
+
+
+def _opens_partnership(ball, innings):
+    """Whether the ball is the first of its partnership, in checkpoint replay order."""
+    before = LiveBall.query.filter(
+        LiveBall.match_id == ball.match_id,
+        _counted_in_innings(innings),
+        LiveBall.id != ball.id,
+        or_(
+            LiveBall.over_no < ball.over_no,
+            and_(LiveBall.over_no == ball.over_no, LiveBall.id < ball.id)
+        )
+    ).order_by(LiveBall.over_no.desc(), LiveBall.id.desc()).first()
+    return before is None or is_wicket(before.wicket)
+
+
+def _next_wicket_over(ball, innings):
+    """Over of the first wicket replayed after the ball, or None."""
+    return db.session.query(func.min(LiveBall.over_no)).filter(
+        LiveBall.match_id == ball.match_id,
+        _counted_in_innings(innings),
+        LiveBall.id != ball.id,
+        or_(
+            LiveBall.over_no > ball.over_no,
+            and_(LiveBall.over_no == ball.over_no, LiveBall.id > ball.id)
+        ),
+        LiveBall.wicket.isnot(None),
+        LiveBall.wicket.notin_(("", "none"))
+    ).scalar()
+
+
+def shift_checkpoints(match_id, innings, old=None, new=None):
+    """
+    Checkpoints after a corrected ball: `old` (the values taken back out,
+    None for a new ball) and `new` (the values put in, None for an undo).
+    The corrected overs' checkpoints are re-saved or dropped; later ones
+    get the ball's delta applied to their stored state (flushed as one
+    executemany UPDATE) without replaying any balls.
+
+    A wicket, or a ball that opens a partnership, changes how later
+    partnerships split up — those fall back to refresh_checkpoints.
+    """
+    changed = [(b, sign) for b, sign in ((old, -1), (new, 1)) if b is not None]
+    touched = sorted({b.over_no for b, _ in changed})
+
+    if any(is_wicket(b.wicket) or _opens_partnership(b, innings) for b, _ in changed):
+        refresh_checkpoints(match_id, innings, touched[0])
+        return
+
+    later = LiveCheckpoint.query.filter(
+        LiveCheckpoint.match_id == match_id,
+        LiveCheckpoint.innings == innings,
+        LiveCheckpoint.over_no > touched[0],
+        LiveCheckpoint.over_no.notin_(touched)
+    ).all()
+
+    if later:
+        splits = [(b, sign, _next_wicket_over(b, innings)) for b, sign in changed]
+        for cp in later:
+            state = json.loads(cp.state)
+            for b, sign, wicket_over in splits:
+                if cp.over_no <= b.over_no:
+                    continue
+                apply_ball(state, b, sign)
+                if wicket_over is None or cp.over_no < wicket_over:
+                    # still the partnership the ball was part of
+                    p = state["partnership"]
+                    legal = is_legal(b.extras)
+                    p["runs"] += sign * (int(b.runs or 0) + (0 if legal else 1))
+                    if legal:
+                        p["balls"] += sign
+            cp.state = json.dumps(state)
+        db.session.flush()
+
+    for over_no in touched:
+        over = _over_rows(match_id, innings, {over_no}).get(over_no)
+        if over is not None and (over.legal_balls or 0) >= OVER_BALLS:
+            save_checkpoint(match_id, innings, over_no)
+        else:
+            LiveCheckpoint.query.filter_by(
+                match_id=match_id, innings=innings, over_no=over_no
+            ).delete(synchronize_session=False)
+
+
+def _correction_event(ball, kind, seq):
+    event = LiveBall(
+        match_id=ball.match_id, innings=ball.innings,
+        voided=True, correction=kind, ref_ball_id=ball.id, seq=seq
+    )
+    for field in AMENDABLE_FIELDS:
+        setattr(event, field, getattr(ball, field))
+    db.session.add(event)
+    return event
+
+
+def void_ball(ball, seq):
+    """
+    Undo a ball: its runs come back out of the innings row and over
+    rollup, the ball is kept as voided and a "void" event is appended.
+    Returns (event, innings row).
+    """
+    row = _fold(ball, -1)
+    ball.voided = True
+    ball.seq = seq
+    event = _correction_event(ball, "void", seq)
+    db.session.flush()
+
+    shift_checkpoints(ball.match_id, ball.innings or 1, old=ball)
+    return event, row
+
+
+def amend_fits(ball, changes):
+    """
+    Whether the amended ball still fits an over: its ball number stays
+    within 1..OVER_BALLS and, if legal, its (possibly new) over doesn't
+    end up with more than OVER_BALLS legal balls.
+    """
+    ball_no = changes.get("ball_no")
+    if ball_no is not None and not 1 <= ball_no <= OVER_BALLS:
+        return False
+
+    over_no = changes.get("over_no", ball.over_no)
+    if not is_legal(changes.get("extras", ball.extras)):
+        return True
+
+    over = _over_rows(ball.match_id, ball.innings or 1, {over_no}).get(over_no)
+    legal = over.legal_balls or 0 if over else 0
+    if over_no == ball.over_no and is_legal(ball.extras):
+        legal -= 1   # the ball itself is already counted there
+    return legal < OVER_BALLS
+
+
+def amend_ball(ball, changes, seq):
+    """
+    Correct a ball in place: take the old values back out, apply the new
+    ones and append an "amend" event carrying them. Returns (event, innings row).
+    Raises ValueError when the amended ball would overfill an over.
+    """
+    if not amend_fits(ball, changes):
+        raise ValueError(f"over {changes.get('over_no', ball.over_no)} has no room for this ball")
+
+    before = SimpleNamespace(**{f: getattr(ball, f) for f in AMENDABLE_FIELDS},
+                             id=ball.id, match_id=ball.match_id)
+    _fold(ball, -1)
+
+    for field in AMENDABLE_FIELDS:
+        if field in changes:
+            setattr(ball, field, changes[field])
+    ball.seq = seq
+    db.session.flush()
+
+    row = _fold(ball, 1)
+    event = _correction_event(ball, "amend", seq)
+    db.session.flush()
+
+    shift_checkpoints(ball.match_id, ball.innings or 1, old=before, new=ball)
+    return event, row
@@ -0,0 +1,430 @@
+"""
+Manual scorecard saves as a diff.
+
+A save sends the whole scorecard. Instead of deleting every ManualScore
+and WagonWheel row of the match and adding them back, the incoming rows
+are matched to the stored ones and only the difference is written: one
+bulk INSERT, one bulk UPDATE (by primary key) and one DELETE per table.
+
+    ManualScore   keyed by (match_id, player_id, section)
+    WagonWheel    a multiset of (player_id, angle, distance, runs, shot_type)
+
+Saves go through a versioned draft (ManualScorecardDraft). A save made
+from an older version than the stored one is rejected with a diff of
+the two scorecards, and autosaves write the scorecard tables at most
+once every DRAFT_FLUSH_SECONDS — the draft row holds the latest payload
+in between.
+"""
+import json
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, ManualScore, WagonWheel, ManualScorecardDraft
+from reports import drop_report_snapshot
+
+SECTIONS = ("batting", "bowling", "fielding", "opponent")
+
+# ManualScore value columns; a row only fills the ones of its section
+SCORE_FIELDS = {
+    "runs": 0, "balls_faced": 0, "fours": 0, "sixes": 0, "is_out": False,
+    "dismissal_type": None, "wicket_over": None,
+    "overs": 0.0, "runs_conceded": 0, "wickets": 0,
+    "catches": 0, "drops": 0, "saves": 0,
+}
+
+# the columns each section fills, for conflict diffs
+SECTION_FIELDS = {
+    "batting": ("runs", "balls_faced", "fours", "sixes", "is_out", "dismissal_type", "wicket_over"),
+    "bowling": ("overs", "runs_conceded", "wickets"),
+    "fielding": ("catches", "drops", "saves"),
+    "opponent": ("runs", "wickets", "overs"),
+}
+
+WAGON_FIELDS = ("player_id", "angle", "distance", "runs", "shot_type")
+
+# the parts of a save payload a draft keeps
+PAYLOAD_KEYS = ("batting", "bowling", "fielding", "wagon", "opponent_simple", "team_summary")
+
+# autosaves reach ManualScore / WagonWheel at most this often
+DRAFT_FLUSH_SECONDS = 5
+
+
+# ----------------------------------------------------
+# PAYLOAD -> ROWS
+# ----------------------------------------------------
+def _int(v):
+    return int(v or 0)
+
+
+def _float(v):
+    return float(v or 0)
+
+
+def _str(v):
+    return None if v in (None, "") else str(v)
+
+
+def _score_row(section, player_id, **values):
+    row = dict(SCORE_FIELDS)
+    row.update(values)
+    row.update(
+        section=section,
+        player_id=_int(player_id) or None,
+        is_opponent=section == "opponent"
+    )
+    return row
+
+
+def incoming_score_rows(data):
+    """The ManualScore rows a save payload describes, in payload order."""
+    rows = []
+
+    for b in data.get("batting", []):
+        rows.append(_score_row(
+            "batting", b.get("player_id"),
+            runs=_int(b.get("runs")), balls_faced=_int(b.get("balls")),
+            fours=_int(b.get("fours")), sixes=_int(b.get("sixes")),
+            is_out=bool(_int(b.get("is_out"))),
+            wicket_over=_str(b.get("wicket_over")),
+            dismissal_type=_str(b.get("dismissal_type"))
+        ))
+
+    for bo in data.get("bowling", []):
+        rows.append(_score_row(
+            "bowling", bo.get("player_id"),
+            overs=_float(bo.get("overs")),
+            runs_conceded=_int(bo.get("runs_conceded")),
+            wickets=_int(bo.get("wickets"))
+        ))
+
+    for f in data.get("fielding", []):
+        rows.append(_score_row(
+            "fielding", f.get("player_id"),
+            catches=_int(f.get("catches")), drops=_int(f.get("drops")),
+            saves=_int(f.get("saves"))
+        ))
+
+    op = data.get("opponent_simple")
+    if op:
+        rows.append(_score_row(
+            "opponent", None,
+            runs=_int(op.get("runs")), wickets=_int(op.get("wickets")),
+            overs=_float(op.get("overs"))
+        ))
+
+    return rows
+
+
+def incoming_wagon_rows(data):
+    return [
+        {
+            "player_id": _int(w.get("player_id")) or None,
+            "angle": None if w.get("angle") is None else _int(w.get("angle")),
+            "distance": _int(w.get("distance")),
+            "runs": _int(w.get("runs")),
+            "shot_type": _str(w.get("shot_type")),
+        }
+        for w in data.get("wagon", [])
+    ]
+
+
+# ----------------------------------------------------
+# DIFF
+# ----------------------------------------------------
+def _stored_values(s):
+    values = {f: getattr(s, f) for f in SCORE_FIELDS}
+    for f, default in SCORE_FIELDS.items():
+        if values[f] is None:
+            values[f] = default
+    values["is_out"] = bool(values["is_out"])
+    values["overs"] = float(values["overs"])
+    return values
+
+
+def diff_scores(stored, incoming):
+    """
+    (inserts, updates, delete_ids). Rows are paired per key in order, so
+    a key that appears twice on either side still diffs correctly.
+    """
+    by_key = defaultdict(list)
+    for s in sorted(stored, key=lambda s: s.id):
+        by_key[(s.player_id, s.section)].append(s)
+
+    inserts, updates = [], []
+    for row in incoming:
+        existing = by_key.get((row["player_id"], row["section"]))
+        if not existing:
+            inserts.append(row)
+            continue
+        s = existing.pop(0)
+        values = {f: row[f] for f in SCORE_FIELDS}
+        if _stored_values(s) != values or bool(s.is_opponent) != row["is_opponent"]:
+            updates.append(dict(values, id=s.id, is_opponent=row["is_opponent"]))
+
+    delete_ids = [s.id for left in by_key.values() for s in left]
+    return inserts, updates, delete_ids
+
+
+def diff_wagon(stored, incoming):
+    """(inserts, delete_ids): shots are compared as a multiset."""
+    have = defaultdict(list)
+    for w in sorted(stored, key=lambda w: w.id):
+        have[tuple(getattr(w, f) for f in WAGON_FIELDS)].append(w.id)
+
+    wanted = Counter(tuple(r[f] for f in WAGON_FIELDS) for r in incoming)
+
+    inserts, delete_ids = [], []
+    for key, ids in have.items():
+        keep = wanted.pop(key, 0)
+        delete_ids += ids[keep:]
+        if keep > len(ids):
+            wanted[key] = keep - len(ids)
+    for key, n in wanted.items():
+        inserts += [dict(zip(WAGON_FIELDS, key))] * n
+    return inserts, delete_ids
+
+
+# ----------------------------------------------------
+# SAVE
+# ----------------------------------------------------
+def sync_manual_scorecard(match_id, data):
+    """
+    Bring the match's ManualScore / WagonWheel rows in line with a save
+    payload, writing only what changed. Part of the caller's transaction.
+    Returns {"inserted", "updated", "deleted"} row counts.
+    """
+    stored_scores = ManualScore.query.filter_by(match_id=match_id).all()
+    stored_wagon = WagonWheel.query.filter_by(match_id=match_id).all()
+
+    s_ins, s_upd, s_del = diff_scores(stored_scores, incoming_score_rows(data))
+    w_ins, w_del = diff_wagon(stored_wagon, incoming_wagon_rows(data))
+
+    if s_del:
+        db.session.execute(delete(ManualScore).where(ManualScore.id.in_(s_del)))
+    if s_upd:
+        db.session.execute(update(ManualScore), s_upd)
+    if s_ins:
+        db.session.execute(insert(ManualScore), [dict(r, match_id=match_id) for r in s_ins])
+
+    if w_del:
+        db.session.execute(delete(WagonWheel).where(WagonWheel.id.in_(w_del)))
+    if w_ins:
+        db.session.execute(insert(WagonWheel), [dict(r, match_id=match_id) for r in w_ins])
+
+    return {
+        "inserted": len(s_ins) + len(w_ins),
+        "updated": len(s_upd),
+        "deleted": len(s_del) + len(w_del),
+    }
+
+
+# ----------------------------------------------------
+# VERSIONED DRAFTS
+# ----------------------------------------------------
+def _canonical(data):
+    return json.dumps({k: data[k] for k in PAYLOAD_KEYS if k in data}, sort_keys=True)
+
+
+def stored_payload(match_id):
+    """The save payload the match's ManualScore / WagonWheel rows amount to."""
+    data = {"batting": [], "bowling": [], "fielding": [], "wagon": []}
+
+    for s in ManualScore.query.filter_by(match_id=match_id).order_by(ManualScore.id):
+        if s.section == "opponent":
+            data["opponent_simple"] = {"runs": s.runs, "wickets": s.wickets, "overs": s.overs}
+        elif s.section == "bowling":
+            data["bowling"].append({
+                "player_id": s.player_id, "overs": s.overs,
+                "runs_conceded": s.runs_conceded, "wickets": s.wickets
+            })
+        elif s.section == "fielding":
+            data["fielding"].append({
+                "player_id": s.player_id, "catches": s.catches, "drops": s.drops, "saves": s.saves
+            })
+        else:
+            data["batting"].append({
+                "player_id": s.player_id, "runs": s.runs, "balls": s.balls_faced,
+                "fours": s.fours, "sixes": s.sixes, "is_out": 1 if s.is_out else 0,
+                "wicket_over": s.wicket_over, "dismissal_type": s.dismissal_type
+            })
+
+    for w in WagonWheel.query.filter_by(match_id=match_id).order_by(WagonWheel.id):
+        data["wagon"].append({f: getattr(w, f) for f in WAGON_FIELDS})
+
+    return data
+
+
+def get_draft(match_id):
+    """
+    The match's draft. Created on first use at version 0 from the rows
+    already stored, so its payload and the scorecard tables agree.
+    """
+    draft = db.session.get(ManualScorecardDraft, match_id)
+    if draft:
+        return draft
+
+    try:
+        with db.session.begin_nested():
+            draft = ManualScorecardDraft(
+                match_id=match_id, version=0, saved_version=0,
+                payload=_canonical(stored_payload(match_id))
+            )
+            db.session.add(draft)
+    except IntegrityError:
+        # another request created it first
+        draft = db.session.get(ManualScorecardDraft, match_id)
+    return draft
+
+
+def draft_payload(draft):
+    return json.loads(draft.payload or "{}")
+
+
+def save_draft(match_id, data, expected=None, user_id=None):
+    """
+    Store a save payload as the match's draft and bump its version, in
+    one conditional UPDATE. With `expected`, only when it still equals
+    the stored version — a save made from a stale view gets None. An
+    unchanged payload keeps its version. Part of the caller's transaction.
+    """
+    draft = get_draft(match_id)
+    payload = _canonical(data)
+
+    if draft.payload == payload:
+        # nothing to overwrite, whichever version the client had
+        return draft
+
+    D = ManualScorecardDraft
+    q = D.query.filter(D.match_id == match_id)
+    if expected is not None:
+        q = q.filter(D.version == expected)
+
+    if not q.update({
+        D.version: D.version + 1,
+        D.payload: payload,
+        D.updated_by: user_id,
+        D.updated_at: datetime.utcnow(),
+    }, synchronize_session=False):
+        db.session.refresh(draft)
+        return None
+
+    db.session.refresh(draft)
+    return draft
+
+
+def flush_due_in(draft, now=None):
+    """Seconds until an autosave may write the scorecard tables again."""
+    if draft.saved_at is None:
+        return 0
+    now = now or datetime.utcnow()
+    elapsed = (now - draft.saved_at).total_seconds()
+    return max(0, round(DRAFT_FLUSH_SECONDS - elapsed, 1))
+
+
+def flush_draft(draft, force=False):
+    """
+    Write the draft into ManualScore / WagonWheel unless that version is
+    already there or — without `force` — the last write was less than
+    DRAFT_FLUSH_SECONDS ago. Claiming the write is a conditional UPDATE,
+    so concurrent requests flush a version once. Returns the change
+    counts, or None when nothing was written.
+    """
+    if draft.saved_version == draft.version:
+        return None
+
+    D = ManualScorecardDraft
+    now = datetime.utcnow()
+    q = D.query.filter(
+        D.match_id == draft.match_id,
+        D.saved_version == draft.saved_version
+    )
+    if not force:
+        q = q.filter(or_(
+            D.saved_at.is_(None),
+            D.saved_at <= now - timedelta(seconds=DRAFT_FLUSH_SECONDS)
+        ))
+
+    claimed = q.update(
+        {D.saved_version: draft.version, D.saved_at: now},
+        synchronize_session=False
+    )
+    db.session.refresh(draft)
+    if not claimed:
+        return None
+
+    changes = sync_manual_scorecard(draft.match_id, draft_payload(draft))
+
+    # scores were re-edited: any frozen report is stale
+    if any(changes.values()):
+        drop_report_snapshot(draft.match_id)
+    return changes
+
+
+# ----------------------------------------------------
+# CONFLICT DIFF
+# ----------------------------------------------------
+def _section_rows(data):
+    rows = defaultdict(list)
+    for row in incoming_score_rows(data):
+        fields = SECTION_FIELDS[row["section"]]
+        rows[row["section"]].append(dict(
+            {"player_id": row["player_id"]}, **{f: row[f] for f in fields}
+        ))
+    return rows
+
+
+def _diff_section(section, ours, theirs):
+    added, removed, changed = [], [], []
+
+    by_player = defaultdict(list)
+    for row in ours:
+        by_player[row["player_id"]].append(row)
+
+    for row in theirs:
+        mine = by_player.get(row["player_id"])
+        if not mine:
+            added.append(row)
+            continue
+        old = mine.pop(0)
+        fields = {
+            f: [old[f], row[f]] for f in SECTION_FIELDS[section] if old[f] != row[f]
+        }
+        if fields:
+            changed.append({"player_id": row["player_id"], "fields": fields})
+
+    removed = [row for left in by_player.values() for row in left]
+    return {"added": added, "removed": removed, "changed": changed}
+
+
+def draft_diff(ours, theirs):
+    """
+    What a rejected save (`theirs`) would change in the stored draft
+    (`ours`), per section. Rows are matched by player; changed fields
+    are [stored, submitted] pairs. Sections that agree are left out.
+    """
+    diff = {}
+
+    ours_rows, theirs_rows = _section_rows(ours), _section_rows(theirs)
+    for section in SECTIONS:
+        d = _diff_section(section, ours_rows.get(section, []), theirs_rows.get(section, []))
+        if any(d.values()):
+            diff[section] = d
+
+    ours_wagon = Counter(tuple(r[f] for f in WAGON_FIELDS) for r in incoming_wagon_rows(ours))
+    theirs_wagon = Counter(tuple(r[f] for f in WAGON_FIELDS) for r in incoming_wagon_rows(theirs))
+    wagon = {
+        "added": [dict(zip(WAGON_FIELDS, k)) for k in (theirs_wagon - ours_wagon).elements()],
+        "removed": [dict(zip(WAGON_FIELDS, k)) for k in (ours_wagon - theirs_wagon).elements()],
+    }
+    if any(wagon.values()):
+        diff["wagon"] = wagon
+
+    a, b = ours.get("team_summary") or {}, theirs.get("team_summary") or {}
+    summary = {k: [a.get(k), b.get(k)] for k in sorted(set(a) | set(b)) if a.get(k) != b.get(k)}
+    if summary:
+        diff["team_summary"] = summary
+
+    return diff
@@ -0,0 +1,277 @@
+"""
+Versioned schema migrations.
+
+db.create_all() only creates missing tables; it never adds columns or
+indexes to tables that already exist. Each step below does that for one
+change, is safe to re-run, and is recorded in `schema_migrations`.
+
+    flask db-upgrade          apply pending migrations
+    flask db-check-indexes    list hot-path indexes missing from the database
+"""
+from sqlalchemy import inspect, text
+
+from models import (
+    db, SchemaMigration,
+    Match, LiveBall, ManualScore, Message, Attendance, Notification, MatchPayment,
+    BattingStats, BowlingStats, FieldingStats, PlayerStats
+)
+import live_state
+import stats_ledger
+import leaderboards
+import unread_counters
+
+
+# ----------------------------------------------------
+# HOT-PATH INDEXES (declared on the models, listed here for the checks)
+# ----------------------------------------------------
+HOT_PATH_INDEXES = {
+    Message: ["ix_messages_receiver_read", "ix_messages_group_deleted_created"],
+    LiveBall: ["ix_live_balls_match_id_id"],
+    ManualScore: ["ix_manual_scores_match_opponent"],
+    Attendance: ["ix_attendance_date_player"],
+    Notification: ["ix_notifications_user_read_created"],
+    MatchPayment: ["ix_match_payments_availability_status"],
+}
+
+# per-match stats ledger: the unique keys make approval idempotent
+LEDGER_INDEXES = {
+    BattingStats: ["uq_batting_stats_match_player", "ix_batting_stats_player"],
+    BowlingStats: ["uq_bowling_stats_match_player", "ix_bowling_stats_player"],
+    FieldingStats: ["uq_fielding_stats_match_player", "ix_fielding_stats_player"],
+}
+
+# ball history pages through the balls of one over
+OVER_ROLLUP_INDEXES = {
+    LiveBall: ["ix_live_balls_match_innings_over_id"],
+}
+
+# manual scorecard saves diff against (match_id, player_id, section)
+MANUAL_SCORECARD_INDEXES = {
+    ManualScore: ["ix_manual_scores_match_player_section"],
+}
+
+# keys the bulk upserts in stats_ledger.py rely on
+UPSERT_KEYS = {
+    PlayerStats: ["uq_player_stats_player"],
+}
+
+
+def _existing_columns(table):
+    return {c["name"] for c in inspect(db.engine).get_columns(table)}
+
+
+def _existing_indexes(table):
+    insp = inspect(db.engine)
+    names = {i["name"] for i in insp.get_indexes(table)}
+    names |= {u["name"] for u in insp.get_unique_constraints(table) if u.get("name")}
+    return names
+
+
+def _add_columns(model, column_names):
+    table = model.__table__
+    present = _existing_columns(table.name)
+
+    for name in column_names:
+        if name in present:
+            continue
+        col = table.c[name]
+        ddl = f"ALTER TABLE {table.name} ADD COLUMN {name} {col.type.compile(dialect=db.engine.dialect)}"
+        db.session.execute(text(ddl))
+
+
+def _create_indexes(model, index_names):
+    present = _existing_indexes(model.__tablename__)
+
+    for idx in model.__table__.indexes:
+        if idx.name in index_names and idx.name not in present:
+            idx.create(bind=db.session.connection())
+
+
+# ----------------------------------------------------
+# DERIVED-DATA REBUILDS
+# Tables filled from other tables (ledger, PlayerStats, leaderboards,
+# live rollups, inbox counters) are rebuilt with today's service code. That code expects
+# today's schema, so upgrade() runs the rebuilds once, after every
+# pending step — never from inside a step.
+# ----------------------------------------------------
+def _scored_innings():
+    pairs = db.session.query(LiveBall.match_id, LiveBall.innings).distinct().all()
+    return sorted({(m, i or 1) for m, i in pairs})
+
+
+def rebuild_stats_ledger():
+    stats_ledger.backfill_ledger()
+
+
+def rebuild_player_stats():
+    stats_ledger.refresh_player_stats()
+
+
+def rebuild_leaderboards():
+    leaderboards.rebuild_all()
+
+
+def rebuild_live_innings():
+    # LiveInnings, LiveOver and LiveCheckpoint rows of every scored innings
+    for match_id, innings in _scored_innings():
+        live_state.rebuild_innings(match_id, innings)
+
+
+def rebuild_inbox_counters():
+    unread_counters.rebuild_direct_counters()
+    unread_counters.rebuild_group_counters()
+
+
+# ----------------------------------------------------
+# MIGRATIONS (append only — never edit an applied step)
+# Steps change the schema with their own DDL / SQL only.
+# ----------------------------------------------------
+def m001_live_scoring_columns():
+    _add_columns(Match, ["current_innings", "batting_side"])
+    _add_columns(LiveBall, ["innings", "angle", "shot_type", "created_at", "client_seq"])
+
+    if "uq_live_balls_match_client_seq" not in _existing_indexes("live_balls"):
+        db.session.execute(text(
+            "CREATE UNIQUE INDEX uq_live_balls_match_client_seq "
+            "ON live_balls (match_id, client_seq)"
+        ))
+
+
+def m002_hot_path_indexes():
+    for model, names in HOT_PATH_INDEXES.items():
+        _create_indexes(model, names)
+
+
+def m003_stats_ledger():
+    # PlayerStats so far was summed deltas; rebuild_stats_ledger derives it
+    for model, names in LEDGER_INDEXES.items():
+        _create_indexes(model, names)
+
+
+def m004_unique_player_stats():
+    # keep the oldest row per player; rebuild_player_stats re-derives its values
+    db.session.execute(text(
+        "DELETE FROM player_stats WHERE player_id IS NULL OR id NOT IN "
+        "(SELECT id FROM (SELECT MIN(id) AS id FROM player_stats GROUP BY player_id) AS keep)"
+    ))
+    _create_indexes(PlayerStats, UPSERT_KEYS[PlayerStats])
+
+
+def m005_leaderboards():
+    # the table comes from create_all(); rebuild_leaderboards fills it
+    pass
+
+
+def m006_live_over_rollups():
+    # live_overs comes from create_all(); rebuild_live_innings fills it
+    _create_indexes(LiveBall, OVER_ROLLUP_INDEXES[LiveBall])
+
+
+def m007_live_checkpoints():
+    # live_checkpoints comes from create_all(); replaying an innings
+    # (rebuild_live_innings) writes a checkpoint at the end of each over
+    pass
+
+
+def m008_live_seq_and_corrections():
+    _add_columns(Match, ["live_seq"])
+    _add_columns(LiveBall, ["seq", "voided", "correction", "ref_ball_id"])
+
+
+def m009_manual_score_sections():
+    _add_columns(ManualScore, ["section"])
+    _create_indexes(ManualScore, MANUAL_SCORECARD_INDEXES[ManualScore])
+
+    # section of the rows saved so far, from the columns each section fills
+    for section, where in (
+        ("opponent", "is_opponent = :true"),
+        ("bowling", "overs > 0 OR runs_conceded > 0 OR wickets > 0"),
+        ("fielding", "catches > 0 OR drops > 0 OR saves > 0"),
+        ("batting", "1 = 1"),
+    ):
+        db.session.execute(
+            text(f"UPDATE manual_scores SET section = :section WHERE section IS NULL AND ({where})"),
+            {"section": section, "true": True}
+        )
+
+
+def m010_inbox_counters():
+    # user_inbox_counters comes from create_all(); rebuild_inbox_counters
+    # fills it from the messages stored so far
+    pass
+
+
+# (version, name, step, derived-data rebuilds it needs)
+MIGRATIONS = [
+    (1, "live scoring columns", m001_live_scoring_columns, ()),
+    (2, "hot path composite indexes", m002_hot_path_indexes, ()),
+    (3, "per-match stats ledger", m003_stats_ledger, (rebuild_stats_ledger,)),
+    (4, "unique player_stats.player_id", m004_unique_player_stats, (rebuild_player_stats,)),
+    (5, "materialized leaderboards", m005_leaderboards, (rebuild_leaderboards,)),
+    (6, "per-over live rollups", m006_live_over_rollups, (rebuild_live_innings,)),
+    (7, "end-of-over live checkpoints", m007_live_checkpoints, (rebuild_live_innings,)),
+    (8, "live sequence and ball corrections", m008_live_seq_and_corrections, ()),
+    (9, "manual scorecard sections", m009_manual_score_sections, ()),
+    (10, "per-user inbox counters", m010_inbox_counters, (rebuild_inbox_counters,)),
+]
+
+
+# ----------------------------------------------------
+# RUNNER
+# ----------------------------------------------------
+def applied_versions():
+    return {v for (v,) in db.session.query(SchemaMigration.version)}
+
+
+def upgrade():
+    """
+    Apply pending steps in order, then the rebuilds they need (each
+    once). Versions are recorded with the rebuilds, so a failure leaves
+    them pending and the next run repeats the idempotent steps.
+    Returns the names applied.
+    """
+    SchemaMigration.__table__.create(bind=db.engine, checkfirst=True)
+    done = applied_versions()
+    pending = [m for m in MIGRATIONS if m[0] not in done]
+    if not pending:
+        return []
+
+    try:
+        rebuilds = []
+        for version, name, step, needs in pending:
+            step()
+            db.session.commit()
+            rebuilds += [r for r in needs if r not in rebuilds]
+
+        for rebuild in rebuilds:
+            rebuild()
+
+        for version, name, step, needs in pending:
+            db.session.add(SchemaMigration(version=version, name=name))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return [f"{version:03d} {name}" for version, name, step, needs in pending]
+
+
+def missing_indexes():
+    """[(table, index_name)] for checked indexes absent from the database."""
+    missing = []
+    checked = (
+        HOT_PATH_INDEXES, LEDGER_INDEXES, UPSERT_KEYS, OVER_ROLLUP_INDEXES,
+        MANUAL_SCORECARD_INDEXES
+    )
+    for model, names in (item for group in checked for item in group.items()):
+        table = model.__tablename__
+        if not inspect(db.engine).has_table(table):
+            continue
+        present = _existing_indexes(table)
+        missing += [(table, n) for n in names if n not in present]
+    return missing
+
+
+def report_missing_indexes():
+    for table, name in missing_indexes():
+        print(f"⚠️ Warning: missing index {name} on {table} — run `flask db-upgrade`")
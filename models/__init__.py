@@ -13,6 +13,12 @@ from .pre_match import PreMatchResponse
 from .pre_match_availability import PreMatchAvailability
 from .food_item import FoodItem
 from .payment import MatchPayment
+from .live_innings import LiveInnings, LiveOver, LiveCheckpoint
+from .inbox_counter import UserInboxCounter
+from .schema_migration import SchemaMigration
+from .report_snapshot import MatchReportSnapshot
+from .leaderboard import LeaderboardEntry
+from .manual_draft import ManualScorecardDraft
 
 
 __all__ = [
@@ -21,5 +27,7 @@ __all__ = [
     "MatchAssignment", "OpponentTempPlayer",
     "ManualScore", "WagonWheel", "LiveBall",
     "PlayerStats", "BattingStats", "BowlingStats", "FieldingStats", "Attendance",
-    "Notification", "Message","ChatGroup","ChatGroupMember","PreMatchAvailability","PreMatchResponse","FoodItem","MatchPayment"
+    "Notification", "Message","ChatGroup","ChatGroupMember","PreMatchAvailability","PreMatchResponse","FoodItem","MatchPayment",
+    "LiveInnings", "LiveOver", "LiveCheckpoint", "UserInboxCounter", "SchemaMigration",
+    "MatchReportSnapshot", "LeaderboardEntry", "ManualScorecardDraft"
 ]
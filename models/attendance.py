@@ -3,6 +3,9 @@ from .base_models import db
 
 class Attendance(db.Model):
     __tablename__ = "attendance"
+    __table_args__ = (
+        db.Index("ix_attendance_date_player", "date", "player_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     player_id = db.Column(db.Integer, db.ForeignKey("players.id"), nullable=False)
@@ -0,0 +1,15 @@
+from .base_models import db
+
+
+class UserInboxCounter(db.Model):
+    """
+    Unread-message counter per user, kept in step with every message write.
+
+    group_id 0 holds direct messages; any other value is that chat group.
+    Badges read these rows by primary key instead of counting `messages`.
+    """
+    __tablename__ = "user_inbox_counters"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    group_id = db.Column(db.Integer, primary_key=True, default=0, autoincrement=False)
+    unread = db.Column(db.Integer, nullable=False, default=0)
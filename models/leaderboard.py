@@ -0,0 +1,32 @@
+from datetime import datetime
+from .base_models import db
+
+
+class LeaderboardEntry(db.Model):
+    """
+    Precomputed leaderboard row, rebuilt by leaderboards.py when a match
+    is approved. One board per (category, batch_id, season); batch_id 0
+    is every batch and season "all" is the whole career.
+    """
+    __tablename__ = "leaderboard_entries"
+    __table_args__ = (
+        # paged top-N: a range scan on position
+        db.Index("uq_leaderboard_board_position", "category", "batch_id", "season", "position", unique=True),
+        # a player's own rank
+        db.Index("uq_leaderboard_board_player", "category", "batch_id", "season", "player_id", unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    category = db.Column(db.String(20), nullable=False)
+    batch_id = db.Column(db.Integer, nullable=False, default=0)
+    season = db.Column(db.String(10), nullable=False, default="all")
+
+    position = db.Column(db.Integer, nullable=False)   # 1..n, unique per board
+    rank = db.Column(db.Integer, nullable=False)       # ties share a rank
+
+    player_id = db.Column(db.Integer, db.ForeignKey("players.id"), nullable=False)
+    player_name = db.Column(db.String(100))
+    value = db.Column(db.Float, nullable=False)
+    matches = db.Column(db.Integer, default=0)
+
+    refreshed_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -0,0 +1,80 @@
+from datetime import datetime
+from .base_models import db
+
+
+class LiveInnings(db.Model):
+    """
+    Running totals of one innings of a live match.
+
+    Updated in place as each LiveBall is stored, so viewers read the
+    scoreboard from this row instead of replaying every ball.
+    """
+    __tablename__ = "live_innings"
+    __table_args__ = (
+        db.UniqueConstraint("match_id", "innings", name="uq_live_innings_match_innings"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    match_id = db.Column(db.Integer, nullable=False)
+    innings = db.Column(db.Integer, nullable=False, default=1)
+
+    runs = db.Column(db.Integer, default=0)
+    wickets = db.Column(db.Integer, default=0)
+    legal_balls = db.Column(db.Integer, default=0)
+    extras = db.Column(db.Integer, default=0)
+
+    # JSON strings: {name: {runs, balls, fours, sixes, out}} / {name: {runs, balls, wickets}}
+    batters = db.Column(db.Text, default="{}")
+    bowlers = db.Column(db.Text, default="{}")
+
+    last_ball_id = db.Column(db.Integer, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class LiveOver(db.Model):
+    """
+    Per-over rollup of a live innings, maintained as each LiveBall is
+    stored. Ball history lists these rows and loads the balls of an
+    over only when asked.
+    """
+    __tablename__ = "live_overs"
+    __table_args__ = (
+        db.UniqueConstraint("match_id", "innings", "over_no", name="uq_live_overs_match_innings_over"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    match_id = db.Column(db.Integer, nullable=False)
+    innings = db.Column(db.Integer, nullable=False, default=1)
+    over_no = db.Column(db.Integer, nullable=False)
+
+    runs = db.Column(db.Integer, default=0)         # includes penalty extras
+    wickets = db.Column(db.Integer, default=0)
+    extras = db.Column(db.Integer, default=0)
+    legal_balls = db.Column(db.Integer, default=0)
+    deliveries = db.Column(db.Integer, default=0)   # legal balls + wides / no-balls
+    bowler = db.Column(db.String(120))
+
+    first_ball_id = db.Column(db.Integer)
+    last_ball_id = db.Column(db.Integer)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class LiveCheckpoint(db.Model):
+    """
+    Full innings state at the end of an over (JSON string: the
+    live_state dict plus the current partnership). The timeline starts
+    from the nearest checkpoint and replays at most one over of balls.
+    """
+    __tablename__ = "live_checkpoints"
+    __table_args__ = (
+        db.UniqueConstraint("match_id", "innings", "over_no", name="uq_live_checkpoints_match_innings_over"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    match_id = db.Column(db.Integer, nullable=False)
+    innings = db.Column(db.Integer, nullable=False, default=1)
+    over_no = db.Column(db.Integer, nullable=False)
+
+    last_ball_id = db.Column(db.Integer, nullable=False)
+    state = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
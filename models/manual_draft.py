@@ -0,0 +1,21 @@
+from datetime import datetime
+from .base_models import db
+
+
+class ManualScorecardDraft(db.Model):
+    """
+    Latest manual scorecard payload (JSON string) of a match and its
+    version. Every accepted save bumps the version; a save made from an
+    older version is rejected. `saved_version` is the version last
+    written into ManualScore / WagonWheel (see manual_scorecard.py).
+    """
+    __tablename__ = "manual_scorecard_drafts"
+
+    match_id = db.Column(db.Integer, db.ForeignKey("matches.id"), primary_key=True, autoincrement=False)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    payload = db.Column(db.Text, nullable=False, default="{}")
+    updated_by = db.Column(db.Integer, db.ForeignKey("users.id"))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    saved_version = db.Column(db.Integer, nullable=False, default=0)
+    saved_at = db.Column(db.DateTime)
@@ -3,6 +3,10 @@ from datetime import datetime
 
 class Message(db.Model):
     __tablename__ = "messages"
+    __table_args__ = (
+        db.Index("ix_messages_receiver_read", "receiver_id", "is_read"),
+        db.Index("ix_messages_group_deleted_created", "group_id", "is_deleted", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -3,6 +3,9 @@ from .base_models import db
 
 class Notification(db.Model):
     __tablename__ = "notifications"
+    __table_args__ = (
+        db.Index("ix_notifications_user_read_created", "user_id", "is_read", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, nullable=False)
@@ -3,6 +3,9 @@ from models import db
 
 class MatchPayment(db.Model):
     __tablename__ = "match_payments"
+    __table_args__ = (
+        db.Index("ix_match_payments_availability_status", "availability_id", "payment_status"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
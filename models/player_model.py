@@ -96,6 +96,13 @@ class Match(db.Model):
 
     status = db.Column(db.String(50), default="ongoing")
 
+    # innings logic
+    current_innings = db.Column(db.Integer, default=1)      # 1 or 2
+    batting_side = db.Column(db.String(20))                 # "team" or "opponent"
+
+    # last accepted live scoring change; scorers compare-and-swap on it
+    live_seq = db.Column(db.Integer, default=0)
+
     scorer_coach_id = db.Column(db.Integer)
     scorer_player_id = db.Column(db.Integer)
 
@@ -137,6 +144,10 @@ class OpponentTempPlayer(db.Model):
 # -------------------------
 class ManualScore(db.Model):
     __tablename__ = "manual_scores"
+    __table_args__ = (
+        db.Index("ix_manual_scores_match_opponent", "match_id", "is_opponent"),
+        db.Index("ix_manual_scores_match_player_section", "match_id", "player_id", "section"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -168,6 +179,9 @@ class ManualScore(db.Model):
     # Opponent flag
     is_opponent = db.Column(db.Boolean, default=False)  # NEW
 
+    # batting / bowling / fielding / opponent — the row's part of the scorecard
+    section = db.Column(db.String(10))
+
     # RELATIONSHIPS
     player = db.relationship("Player", backref="manual_scores")
     match = db.relationship("Match", backref="manual_scores")
@@ -193,9 +207,18 @@ class WagonWheel(db.Model):
 # -------------------------
 class LiveBall(db.Model):
     __tablename__ = "live_balls"
+    __table_args__ = (
+        # events feed reads "balls of match X newer than id N"
+        db.Index("ix_live_balls_match_id_id", "match_id", "id"),
+        # ball history pages through one over at a time
+        db.Index("ix_live_balls_match_innings_over_id", "match_id", "innings", "over_no", "id"),
+        # offline scorers replay batches; the client sequence makes that idempotent
+        db.UniqueConstraint("match_id", "client_seq", name="uq_live_balls_match_client_seq"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     match_id = db.Column(db.Integer)
+    innings = db.Column(db.Integer, default=1)
     over_no = db.Column(db.Integer)
     ball_no = db.Column(db.Integer)
     striker = db.Column(db.String(120))
@@ -206,4 +229,20 @@ class LiveBall(db.Model):
     wicket = db.Column(db.String(20))
     commentary = db.Column(db.Text)
 
-    
\ No newline at end of file
+    angle = db.Column(db.Integer)
+    shot_type = db.Column(db.String(50))
+
+    client_seq = db.Column(db.Integer, nullable=True)
+
+    # Match.live_seq after this change
+    seq = db.Column(db.Integer)
+
+    # corrections: undo keeps the ball with voided=True, amend edits it in
+    # place. Either way an event row (correction "void" / "amend",
+    # ref_ball_id -> the ball) is appended so feeds resuming by id see the
+    # change. Event rows are voided too; voided rows never count.
+    voided = db.Column(db.Boolean, default=False)
+    correction = db.Column(db.String(10))
+    ref_ball_id = db.Column(db.Integer)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
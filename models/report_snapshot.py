@@ -0,0 +1,15 @@
+from datetime import datetime
+from .base_models import db
+
+
+class MatchReportSnapshot(db.Model):
+    """
+    Frozen match report payload (JSON string), written when the coach
+    approves a match and served instead of rebuilding the report.
+    Dropped whenever the match's scorecard is edited again.
+    """
+    __tablename__ = "match_report_snapshots"
+
+    match_id = db.Column(db.Integer, db.ForeignKey("matches.id"), primary_key=True, autoincrement=False)
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
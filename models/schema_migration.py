@@ -0,0 +1,11 @@
+from datetime import datetime
+from .base_models import db
+
+
+class SchemaMigration(db.Model):
+    """One row per applied migration (see migrations.py)."""
+    __tablename__ = "schema_migrations"
+
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(120), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -3,6 +3,10 @@ from .base_models import db
 
 class PlayerStats(db.Model):
     __tablename__ = "player_stats"
+    __table_args__ = (
+        # one derived row per player; stats_ledger upserts on it
+        db.Index("uq_player_stats_player", "player_id", unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     player_id = db.Column(db.Integer, db.ForeignKey("players.id"))
@@ -25,8 +29,16 @@ class PlayerStats(db.Model):
     player = db.relationship("Player", back_populates="playerstats")
 
 
+# ----------------------------------------------------
+# PER-MATCH LEDGER (one row per player per approved match;
+# written by stats_ledger.py, PlayerStats is rebuilt from these)
+# ----------------------------------------------------
 class BattingStats(db.Model):
     __tablename__ = "batting_stats"
+    __table_args__ = (
+        db.Index("uq_batting_stats_match_player", "match_id", "player_id", unique=True),
+        db.Index("ix_batting_stats_player", "player_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     player_id = db.Column(db.Integer)
@@ -40,6 +52,10 @@ class BattingStats(db.Model):
 
 class BowlingStats(db.Model):
     __tablename__ = "bowling_stats"
+    __table_args__ = (
+        db.Index("uq_bowling_stats_match_player", "match_id", "player_id", unique=True),
+        db.Index("ix_bowling_stats_player", "player_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     player_id = db.Column(db.Integer)
@@ -51,6 +67,10 @@ class BowlingStats(db.Model):
 
 class FieldingStats(db.Model):
     __tablename__ = "fielding_stats"
+    __table_args__ = (
+        db.Index("uq_fielding_stats_match_player", "match_id", "player_id", unique=True),
+        db.Index("ix_fielding_stats_player", "player_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     player_id = db.Column(db.Integer)
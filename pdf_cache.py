@@ -0,0 +1,129 @@
+"""
+Content-addressed PDF cache.
+
+A PDF is stored under the sha256 of its kind and input data, so the same
+data is only ever rendered once, and a document never overwrites a
+different one. Files are written to a temp file and os.replace()d into
+place; two workers building the same key just write identical bytes.
+
+Eviction runs after each write: files idle for longer than `max_age`
+seconds go first, then the least recently used until the directory is
+under `max_bytes`.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from flask import current_app, send_file
+
+from pdf_render import RENDERERS
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_AGE = 7 * 24 * 60 * 60
+
+
+# ----------------------------------------------------
+# KEYS & FILES
+# ----------------------------------------------------
+def cache_key(kind, data):
+    blob = json.dumps([kind, data], sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def cache_path(cache_dir, key):
+    return os.path.join(cache_dir, f"{key}.pdf")
+
+
+def lookup(cache_dir, key):
+    """Path of a cached PDF (marked as just used), or None."""
+    path = cache_path(cache_dir, key)
+    try:
+        os.utime(path)
+    except OSError:
+        return None
+    return path
+
+
+def store(cache_dir, key, pdf, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = cache_path(cache_dir, key)
+
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+    evict(cache_dir, max_bytes, max_age, keep=path)
+    return path
+
+
+def evict(cache_dir, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE, keep=None):
+    now = time.time()
+    files = []
+
+    for entry in os.scandir(cache_dir):
+        if not entry.name.endswith(".pdf"):
+            continue
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        if entry.path != keep and now - st.st_mtime > max_age:
+            _remove(entry.path)
+        else:
+            files.append((st.st_mtime, st.st_size, entry.path))
+
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        if path != keep:
+            _remove(path)
+            total -= size
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def build(kind, data, cache_dir, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+    """(key, path) of the PDF for `data`, rendering it only on a miss."""
+    key = cache_key(kind, data)
+    path = lookup(cache_dir, key)
+    if path is None:
+        path = store(cache_dir, key, RENDERERS[kind](data), max_bytes, max_age)
+    return key, path
+
+
+# ----------------------------------------------------
+# FLASK HELPERS
+# ----------------------------------------------------
+def cache_settings():
+    cfg = current_app.config
+    return {
+        "cache_dir": cfg["PDF_CACHE_DIR"],
+        "max_bytes": cfg["PDF_CACHE_MAX_BYTES"],
+        "max_age": cfg["PDF_CACHE_MAX_AGE"]
+    }
+
+
+def send_cached_pdf(path, key, download_name):
+    # ETag is the content hash; If-None-Match hits get a 304
+    return send_file(
+        path,
+        as_attachment=True,
+        download_name=download_name,
+        mimetype="application/pdf",
+        etag=key,
+        conditional=True
+    )
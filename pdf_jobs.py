@@ -0,0 +1,193 @@
+"""
+Background PDF jobs.
+
+ReportLab work is CPU-bound and blocks the eventlet hub (chat sockets,
+live scoring) for as long as a document takes to build. Views collect
+the report data (reports.py) and hand it to submit(); a process pool
+renders it into the PDF cache (pdf_cache.py).
+
+Job state lives in small JSON files, so any gunicorn worker can answer
+status / download requests for a job another worker queued:
+
+    <job_dir>/<job_id>.json   status: queued -> running -> done | failed
+                              "key" names the finished file in the cache
+"""
+import json
+import multiprocessing
+import os
+import re
+import tempfile
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import pdf_cache
+from pdf_render import RENDERERS
+
+JOB_ID_RE = re.compile(r"[0-9a-f]{32}")
+
+# finished / failed jobs are swept after this many seconds
+JOB_TTL = 60 * 60
+
+_executor = None
+
+
+# ----------------------------------------------------
+# STATUS FILES
+# ----------------------------------------------------
+def _status_path(job_dir, job_id):
+    return os.path.join(job_dir, f"{job_id}.json")
+
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _update(job_dir, job, **changes):
+    job.update(changes)
+    _write_atomic(_status_path(job_dir, job["id"]), json.dumps(job).encode())
+    return job
+
+
+def get_job(job_dir, job_id):
+    if not JOB_ID_RE.fullmatch(job_id or ""):
+        return None
+    try:
+        with open(_status_path(job_dir, job_id)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def sweep(job_dir, ttl=JOB_TTL):
+    cutoff = time.time() - ttl
+    for name in os.listdir(job_dir):
+        path = os.path.join(job_dir, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+# ----------------------------------------------------
+# WORKER (runs in the pool process)
+# ----------------------------------------------------
+def run_job(job_dir, cache, job, data):
+    _update(job_dir, job, status="running", started_at=time.time())
+    try:
+        key, _ = pdf_cache.build(job["kind"], data, **cache)
+    except Exception as e:
+        _update(job_dir, job, status="failed", error=str(e), finished_at=time.time())
+        return
+    _update(job_dir, job, status="done", key=key, finished_at=time.time())
+
+
+# ----------------------------------------------------
+# SUBMIT
+# ----------------------------------------------------
+def get_executor(workers=2):
+    """
+    One pool per app process. Spawned (not forked) workers: a fork would
+    copy the eventlet hub and open database connections into the child.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def submit(job_dir, cache, kind, data, filename, user_id, workers=2):
+    """
+    Queue a render of `data` with RENDERERS[kind]; returns the job dict.
+    `cache` holds the pdf_cache.build() settings. Already-cached data
+    gives a job that is done straight away.
+    """
+    if kind not in RENDERERS:
+        raise ValueError(f"unknown PDF kind: {kind}")
+
+    os.makedirs(job_dir, exist_ok=True)
+    sweep(job_dir)
+
+    job = {
+        "id": uuid.uuid4().hex,
+        "kind": kind,
+        "filename": filename,
+        "user_id": user_id,
+        "status": "queued",
+        "created_at": time.time(),
+    }
+
+    key = pdf_cache.cache_key(kind, data)
+    if pdf_cache.lookup(cache["cache_dir"], key):
+        return _update(job_dir, job, status="done", key=key, finished_at=time.time())
+
+    _update(job_dir, job)
+    get_executor(workers).submit(run_job, job_dir, cache, job, data)
+    return job
+
+
+# ----------------------------------------------------
+# STREAMED ZIP OF MANY PDFS
+# ----------------------------------------------------
+def render(kind, data):
+    return RENDERERS[kind](data)
+
+
+class _ZipSink:
+    """Write-only target for ZipFile; holds bytes until they are drained."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        out = b"".join(self.chunks)
+        self.chunks = []
+        return out
+
+
+def stream_pdf_zip(kind, items, workers=2, in_flight=None):
+    """
+    Yield a ZIP archive of RENDERERS[kind] PDFs, one (name, data) item per
+    file. Items are rendered in the pool with at most `in_flight` pending
+    at once, and each PDF is written out as soon as it is done, so memory
+    does not grow with the number of items.
+    """
+    in_flight = in_flight or workers * 2
+    executor = get_executor(workers)
+    items = iter(items)
+    pending = {}
+    sink = _ZipSink()
+
+    # PDFs are already compressed; deflating them again gains nothing
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as zf:
+        while True:
+            for name, data in items:
+                pending[executor.submit(render, kind, data)] = name
+                if len(pending) >= in_flight:
+                    break
+
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                zf.writestr(pending.pop(future), future.result())
+            yield sink.drain()
+
+    # central directory
+    yield sink.drain()
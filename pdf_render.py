@@ -0,0 +1,304 @@
+"""
+ReportLab renderers for every downloadable PDF.
+
+Each takes the plain dict built by the matching *_pdf_data() function in
+reports.py and returns the PDF as bytes. Nothing here touches the
+database or the request, so they run in pdf_jobs worker processes.
+"""
+import io
+
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib import colors
+
+
+def _build(story, **doc_kwargs):
+    buffer = io.BytesIO()
+    SimpleDocTemplate(buffer, **doc_kwargs).build(story)
+    return buffer.getvalue()
+
+
+# ----------------------------------------------------
+# MATCH REPORT
+# ----------------------------------------------------
+def render_match_report_pdf(data):
+    styles = getSampleStyleSheet()
+    story = []
+
+    m = data["match"]
+
+    # TITLE
+    story.append(Paragraph(f"Match Report — {m['title']}", styles["Title"]))
+    story.append(Paragraph(f"{m['team_name']} vs {m['opponent_name']}", styles["Normal"]))
+    story.append(Spacer(1, 12))
+
+    # SCORE SUMMARY
+    summary = [
+        ["Team", "Runs", "Wickets", "Overs"],
+        [m["team_name"], data["our"]["runs"], data["our"]["wickets"], data["our"]["overs"]],
+        [m["opponent_name"], data["opponent"]["runs"], data["opponent"]["wickets"], data["opponent"]["overs"]],
+    ]
+
+    t = Table(summary)
+    t.setStyle(TableStyle([
+        ("BACKGROUND", (0,0), (-1,0), colors.lightblue),
+        ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
+    ]))
+    story.append(t)
+    story.append(Spacer(1, 12))
+
+    # TOP PERFORMERS
+    story.append(Paragraph("Top Performers", styles["Heading2"]))
+
+    for s in data["suggestions"]:
+        story.append(Paragraph(f"<b>{s['player_name']}</b>", styles["Normal"]))
+        for sug in s["suggestions"]:
+            story.append(Paragraph(f"• {sug}", styles["Normal"]))
+        story.append(Spacer(1, 6))
+
+    return _build(story, pagesize=A4, leftMargin=30, rightMargin=30)
+
+
+# ----------------------------------------------------
+# PLAYER STATS
+# ----------------------------------------------------
+def render_player_stats_pdf(data):
+    styles = getSampleStyleSheet()
+    story = []
+
+    story.append(Paragraph(f"Player Stats Report - {data['name']}", styles["Title"]))
+    story.append(Spacer(1, 12))
+
+    # Basic info table
+    info = [
+        ["Field", "Value"],
+        ["Name", data["name"]],
+        ["Age", data["age"] or "-"],
+        ["Batting Style", data["batting_style"] or "-"],
+        ["Bowling Style", data["bowling_style"] or "-"],
+        ["Role", data["role"] or "-"],
+    ]
+
+    t = Table(info)
+    t.setStyle(TableStyle([
+        ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
+        ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
+        ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
+    ]))
+    story.append(t)
+    story.append(Spacer(1, 20))
+
+    # Career Stats
+    stats = data["stats"]
+    if stats:
+        story.append(Paragraph("Career Stats", styles["Heading2"]))
+        career = [
+            ["Matches", stats["matches"]],
+            ["Runs", stats["total_runs"]],
+            ["Balls", stats["total_balls"]],
+            ["Fours", stats["total_fours"]],
+            ["Sixes", stats["total_sixes"]],
+            ["Wickets", stats["wickets"]],
+            ["Overs Bowled", stats["overs_bowled"]],
+            ["Runs Conceded", stats["runs_conceded"]],
+            ["Catches", stats["catches"]],
+        ]
+
+        t2 = Table(career)
+        t2.setStyle(TableStyle([
+            ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
+        ]))
+
+        story.append(t2)
+    else:
+        story.append(Paragraph("No stats available yet.", styles["Normal"]))
+
+    return _build(story, pagesize=A4)
+
+
+# ----------------------------------------------------
+# ATTENDANCE
+# ----------------------------------------------------
+def render_attendance_pdf(data):
+    styles = getSampleStyleSheet()
+    elements = []
+
+    # ===== TITLE =====
+    elements.append(Paragraph(
+        f"<b>Attendance Report</b><br/>Date: {data['date']}",
+        styles["Title"]
+    ))
+
+    elements.append(Paragraph("<br/>", styles["Normal"]))
+
+    # ===== TABLE DATA =====
+    table_data = [
+        ["Player", "Status", "Coach Note"]
+    ]
+
+    for a in data["rows"]:
+        table_data.append([
+            a["player"],
+            "Present" if a["status"] == "present" else "Absent",
+            a["note"] or "-"
+        ])
+
+    table = Table(table_data, colWidths=[180, 80, 200])
+
+    table.setStyle(TableStyle([
+        ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
+        ("TEXTCOLOR", (0,0), (-1,0), colors.black),
+
+        ("ALIGN", (1,1), (-1,-1), "CENTER"),
+        ("ALIGN", (0,0), (0,-1), "LEFT"),
+
+        ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
+
+        ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
+        ("BOTTOMPADDING", (0,0), (-1,0), 10),
+        ("TOPPADDING", (0,0), (-1,0), 10),
+    ]))
+
+    elements.append(table)
+
+    return _build(
+        elements,
+        pagesize=A4,
+        rightMargin=30,
+        leftMargin=30,
+        topMargin=30,
+        bottomMargin=30
+    )
+
+
+# ----------------------------------------------------
+# DRILLS
+# ----------------------------------------------------
+def render_drills_pdf(data):
+    styles = getSampleStyleSheet()
+    content = []
+
+    if data.get("title"):
+        content.append(Paragraph(data["title"], styles["Title"]))
+
+    for topic, drills in data["topics"]:
+        content.append(Paragraph(f"<b>{topic.upper()}</b>", styles["Heading2"]))
+        for d in drills:
+            content.append(Paragraph(f"- {d}", styles["Normal"]))
+
+    return _build(content)
+
+
+# ----------------------------------------------------
+# PRE-MATCH AVAILABILITY
+# ----------------------------------------------------
+def render_availability_pdf(data):
+    styles = getSampleStyleSheet()
+    elements = []
+
+    # 🔹 Title
+    elements.append(
+        Paragraph(
+            "<b>Pre-Match Availability Report</b>",
+            styles["Title"]
+        )
+    )
+    elements.append(Spacer(1, 12))
+
+    # 🔹 Match Details
+    elements.append(Paragraph(
+        f"<b>Title:</b> {data['title'] or 'N/A'}",
+        styles["Normal"]
+    ))
+    elements.append(Paragraph(
+        f"<b>Date:</b> {data['match_date'] or 'N/A'}",
+        styles["Normal"]
+    ))
+    elements.append(Paragraph(
+        f"<b>Venue:</b> {data['venue'] or 'N/A'}",
+        styles["Normal"]
+    ))
+    elements.append(Spacer(1, 12))
+
+    # 🔹 Responses
+    if data["responses"]:
+        for r in data["responses"]:
+            elements.append(
+                Paragraph(
+                    f"{r['username']} — <b>{r['status'].upper()}</b>",
+                    styles["Normal"]
+                )
+            )
+    else:
+        elements.append(
+            Paragraph("No responses submitted yet.", styles["Italic"])
+        )
+
+    return _build(elements)
+
+
+# ----------------------------------------------------
+# MATCH PAYMENTS
+# ----------------------------------------------------
+def render_payment_pdf(data):
+    styles = getSampleStyleSheet()
+    elements = []
+
+    # TITLE
+    elements.append(Paragraph(
+        f"<b>Match Payment Report</b>", styles["Title"]
+    ))
+    elements.append(Paragraph(
+        f"Match: {data['title']}", styles["Normal"]
+    ))
+    elements.append(Paragraph(
+        f"Date: {data['match_date']}", styles["Normal"]
+    ))
+    elements.append(Paragraph(
+        f"Venue: {data['venue']}", styles["Normal"]
+    ))
+
+    elements.append(Paragraph("<br/>", styles["Normal"]))
+
+    # TABLE DATA
+    table_data = [
+        ["Player Name", "Amount", "Transaction ID", "Paid Date"]
+    ]
+
+    for p in data["payments"]:
+        table_data.append([
+            p["username"],
+            f"₹{p['amount']}",
+            p["transaction_id"],
+            p["paid_at"]
+        ])
+
+    table = Table(table_data, colWidths=[140, 80, 140, 120])
+    table.setStyle(TableStyle([
+        ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
+        ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
+        ("ALIGN", (1,1), (-1,-1), "CENTER"),
+        ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
+    ]))
+
+    elements.append(table)
+
+    elements.append(Paragraph("<br/>", styles["Normal"]))
+    elements.append(Paragraph(
+        f"<b>Total Approved Amount:</b> ₹{data['total_amount']}",
+        styles["Normal"]
+    ))
+
+    return _build(elements, pagesize=A4)
+
+
+# kind -> renderer, used by pdf_jobs workers
+RENDERERS = {
+    "match_report": render_match_report_pdf,
+    "player_stats": render_player_stats_pdf,
+    "attendance": render_attendance_pdf,
+    "drills": render_drills_pdf,
+    "availability": render_availability_pdf,
+    "payments": render_payment_pdf,
+}
@@ -0,0 +1,464 @@
+import json
+from datetime import datetime
+
+from sqlalchemy.orm import joinedload
+
+from models import (
+    db, User, Player, ManualScore, WagonWheel, MatchReportSnapshot,
+    PlayerStats, Attendance, PreMatchResponse, MatchPayment
+)
+from drillmap import DRILL_MAP, DRILL_CATEGORIES
+import analytics
+
+
+# ----------------------------------------------------
+# AI COACH SUGGESTIONS
+# ----------------------------------------------------
+def _form_suggestions(form, batting):
+    """Advice from the player's precomputed analytics (analytics.py)."""
+    if not form:
+        return []
+    s = []
+    if batting:
+        if form["trend_runs"] is not None and form["trend_runs"] >= 2:
+            s.append("Runs trending up over recent matches — keep the same preparation.")
+        elif form["trend_runs"] is not None and form["trend_runs"] <= -2:
+            s.append("Runs trending down over recent matches — review technique with the coach.")
+        if form["consistency"] is not None and form["consistency"] < 0.4:
+            s.append("Scores vary a lot from match to match — focus on consistency.")
+    else:
+        if form["economy_pct"] is not None and form["economy_pct"] <= 25:
+            s.append("Economy in the bottom quarter of the batch — work on control.")
+    return s
+
+
+def generate_coach_suggestions(full_batting, full_bowling, top_fielding, form=None):
+    """
+    `form` maps player_id -> analytics.player_analytics() dict; when
+    given, each player's advice also reflects their recent form.
+    """
+    form = form or {}
+    suggestions = []
+
+    # ---------------- BATSMEN ----------------
+    for b in full_batting:
+        # SAFETY CHECK
+        if not b.get("player_name"):
+            continue
+
+        runs = b.get("runs", 0)
+        balls = b.get("balls", 0)
+        sr = (runs / balls * 100) if balls > 0 else 0
+
+        s = []
+
+        if runs >= 50:
+            s.append("Excellent batting performance — continue building long innings.")
+        elif runs >= 30:
+            s.append("Good start — work on converting 30s into big scores.")
+        else:
+            s.append("Need stronger shot selection and rotation of strike.")
+
+        if balls > 0:
+            if sr < 60:
+                s.append("Low strike rate — improve running between wickets and placement.")
+            elif sr > 120:
+                s.append("Great aggressive intent — maintain controlled aggression.")
+
+        s.extend(_form_suggestions(form.get(b.get("player_id")), batting=True))
+
+        suggestions.append({
+            "player_name": b["player_name"],
+            "suggestions": s
+        })
+
+    # ---------------- BOWLERS ----------------
+    for bw in full_bowling:
+        if not bw.get("player_name"):
+            continue
+
+        overs = bw.get("overs", 0)
+        runs_conceded = bw.get("runs_conceded", 0)
+        wickets = bw.get("wickets", 0)
+
+        econ = (runs_conceded / overs) if overs > 0 else 0
+        s = []
+
+        if wickets >= 3:
+            s.append("Strong wicket-taking performance — maintain consistency with variations.")
+        elif wickets == 0:
+            s.append("Focus on bowling tighter lines to create wicket opportunities.")
+
+        if overs > 0:
+            if econ > 7.5:
+                s.append("Economy rate high — practice yorkers and slower balls.")
+            else:
+                s.append("Good economical spell — maintain discipline.")
+
+        s.extend(_form_suggestions(form.get(bw.get("player_id")), batting=False))
+
+        suggestions.append({
+            "player_name": bw["player_name"],
+            "suggestions": s
+        })
+
+    # ---------------- FIELDERS ----------------
+    for f in top_fielding:
+        if not f.get("player_name"):
+            continue
+
+        catches = f.get("catches", 0)
+        s = []
+
+        if catches >= 2:
+            s.append("Good catching performance — work on reaction drills for run-outs.")
+        else:
+            s.append("Improve anticipation and ready position while fielding.")
+
+        suggestions.append({
+            "player_name": f["player_name"],
+            "suggestions": s
+        })
+
+    return suggestions
+
+
+# ----------------------------------------------------
+# MATCH REPORT DATA
+# Fixed query count: scorecard rows (with players + users) and wagon
+# shots (with names) — whatever the number of rows.
+# ----------------------------------------------------
+def player_name(row):
+    if row.player and row.player.user:
+        return row.player.user.username
+    return "-"
+
+
+def build_match_report_data(m):
+    # ---------------- OUR TEAM ROWS (+ player + user, one query) ----------------
+    our_rows = ManualScore.query.options(
+        joinedload(ManualScore.player).joinedload(Player.user)
+    ).filter_by(match_id=m.id, is_opponent=False).all()
+
+    # ---------------- BATTING ----------------
+    full_batting = []
+    total = 0
+    fow = []
+    w_no = 1
+
+    for r in our_rows:
+        total += (r.runs or 0)
+
+        if r.balls_faced > 0:
+            full_batting.append({
+                "player_id": r.player_id,
+                "player_name": player_name(r),
+                "runs": r.runs,
+                "balls": r.balls_faced,
+                "fours": r.fours,
+                "sixes": r.sixes,
+                "dismissal_type": r.dismissal_type if r.is_out else "Not Out"
+            })
+
+        if r.is_out:
+            fow.append({
+                "number": w_no,
+                "score": total,
+                "over": r.wicket_over or "-",
+                "player_name": player_name(r)
+            })
+            w_no += 1
+
+    # ---------------- BOWLING ----------------
+    full_bowling = []
+    for r in our_rows:
+        if r.overs and float(r.overs) > 0:
+            full_bowling.append({
+                "player_id": r.player_id,
+                "player_name": player_name(r),
+                "overs": float(r.overs),
+                "runs_conceded": r.runs_conceded,
+                "wickets": r.wickets,
+            })
+
+    # ---------------- FIELDING ----------------
+    top_fielding = []
+    for r in our_rows:
+        if r.catches > 0:
+            top_fielding.append({
+                "player_id": r.player_id,
+                "player_name": player_name(r),
+                "catches": r.catches
+            })
+
+    # ---------------- WAGON WHEEL (names joined, grouped per player) ----------------
+    shots = db.session.query(WagonWheel, User.username).outerjoin(
+        Player, Player.id == WagonWheel.player_id
+    ).outerjoin(
+        User, User.id == Player.user_id
+    ).filter(
+        WagonWheel.match_id == m.id
+    ).order_by(WagonWheel.id.asc()).all()
+
+    wagon_by_player = {}
+    for w, username in shots:
+        entry = wagon_by_player.setdefault(w.player_id, {
+            "player_name": username or "-",
+            "shots": []
+        })
+        entry["shots"].append({
+            "angle": w.angle,
+            "runs": w.runs,
+            "shot_type": w.shot_type
+        })
+    wagon_list = list(wagon_by_player.values())
+
+    # ---------------- RESULT ----------------
+    result = None
+    if m.team_runs is not None and m.opp_runs is not None:
+        if m.team_runs > m.opp_runs:
+            result = f"{m.team_name} won by {m.team_runs - m.opp_runs} runs"
+        elif m.opp_runs > m.team_runs:
+            result = f"{m.opponent_name} won by {m.opp_runs - m.team_runs} runs"
+        else:
+            result = "Match Tied"
+
+    # ---------------- AI COACH SUGGESTIONS ----------------
+    academy = analytics.get()
+    form = {r.player_id: academy.for_player(r.player_id) for r in our_rows if r.player_id}
+    suggestions = generate_coach_suggestions(full_batting, full_bowling, top_fielding, form)
+
+    # ---------------- FINAL DATA ----------------
+    data = {
+        "match": m,
+        "result": result,
+
+        "our": {
+            "runs": m.team_runs or 0,
+            "wickets": m.team_wkts or 0,
+            "overs": float(m.team_overs or 0)
+        },
+
+        "opponent": {
+            "runs": m.opp_runs or 0,
+            "wickets": m.opp_wkts or 0,
+            "overs": float(m.opp_overs or 0)
+        },
+
+        "full_batting": full_batting,
+        "full_bowling": full_bowling,
+        "fow": fow,
+
+        "top_batting": sorted(full_batting, key=lambda x: x["runs"], reverse=True)[:3],
+        "top_bowling": sorted(full_bowling, key=lambda x: x["wickets"], reverse=True)[:3],
+        "top_fielding": top_fielding,
+
+        "wagon_list": wagon_list,
+        "suggestions": suggestions,
+
+        "generated_at": datetime.utcnow()
+    }
+
+    return data
+
+
+# ----------------------------------------------------
+# SNAPSHOTS FOR COMPLETED MATCHES
+# ----------------------------------------------------
+def save_report_snapshot(m):
+    """
+    Freeze the report of an approved match. Part of the caller's
+    transaction; the caller commits.
+    """
+    data = build_match_report_data(m)
+
+    payload = {k: v for k, v in data.items() if k != "match"}
+    payload["generated_at"] = data["generated_at"].isoformat()
+
+    snap = db.session.get(MatchReportSnapshot, m.id)
+    if not snap:
+        snap = MatchReportSnapshot(match_id=m.id)
+        db.session.add(snap)
+    snap.payload = json.dumps(payload)
+    snap.created_at = datetime.utcnow()
+
+    return data
+
+
+def drop_report_snapshot(match_id):
+    MatchReportSnapshot.query.filter_by(match_id=match_id).delete()
+
+
+def get_match_report_data(m):
+    """
+    Report payload for a match: a single-row read once the match is
+    completed, a fresh build while it is still being scored.
+    """
+    if m.status != "completed":
+        return build_match_report_data(m)
+
+    snap = db.session.get(MatchReportSnapshot, m.id)
+    if not snap:
+        # approved before snapshots existed — freeze it now
+        data = save_report_snapshot(m)
+        db.session.commit()
+        return data
+
+    data = json.loads(snap.payload)
+    data["match"] = m
+    data["generated_at"] = datetime.fromisoformat(data["generated_at"])
+    return data
+
+
+
+# ----------------------------------------------------
+# PDF DATA
+# Plain dicts for the renderers in pdf_render.py — built here, inside
+# the request, so rendering never needs the database.
+# ----------------------------------------------------
+def match_report_pdf_data(m):
+    data = get_match_report_data(m)
+    return {
+        "match": {
+            "id": m.id,
+            "title": m.title,
+            "team_name": m.team_name,
+            "opponent_name": m.opponent_name
+        },
+        "our": data["our"],
+        "opponent": data["opponent"],
+        "suggestions": data["suggestions"]
+    }
+
+
+def player_stats_pdf_data(player):
+    stats = PlayerStats.query.filter_by(player_id=player.id).first()
+    return _player_stats_dict(player, player.user.username, stats)
+
+
+def _player_stats_dict(player, username, stats):
+    return {
+        "name": username,
+        "age": player.age,
+        "batting_style": player.batting_style,
+        "bowling_style": player.bowling_style,
+        "role": player.role_in_team,
+        "stats": {
+            "matches": stats.matches,
+            "total_runs": stats.total_runs,
+            "total_balls": stats.total_balls,
+            "total_fours": stats.total_fours,
+            "total_sixes": stats.total_sixes,
+            "wickets": stats.wickets,
+            "overs_bowled": stats.overs_bowled,
+            "runs_conceded": stats.runs_conceded,
+            "catches": stats.catches
+        } if stats else None
+    }
+
+
+def iter_player_stats_pdf_data(batch_id=None, chunk=100):
+    """
+    (file name, data) for every approved player, optionally one Batch.
+    One query, fetched `chunk` rows at a time so memory stays flat.
+    """
+    q = db.session.query(Player, User.username, PlayerStats).join(
+        User, User.id == Player.user_id
+    ).outerjoin(
+        PlayerStats, PlayerStats.player_id == Player.id
+    ).filter(
+        User.status == "approved"
+    )
+    if batch_id:
+        q = q.filter(Player.batch_id == batch_id)
+
+    last_player = None
+    for player, username, stats in q.order_by(Player.id, PlayerStats.id).yield_per(chunk):
+        if player.id == last_player:
+            continue    # extra PlayerStats rows — the first one wins, as in player_stats_pdf
+        last_player = player.id
+        yield f"{username}_stats.pdf", _player_stats_dict(player, username, stats)
+
+
+def attendance_pdf_data(day):
+    rows = Attendance.query.options(
+        joinedload(Attendance.player).joinedload(Player.user)
+    ).filter_by(date=day).all()
+
+    return {
+        "date": str(day),
+        "rows": [
+            {
+                "player": a.player.user.username,
+                "status": a.status,
+                "note": a.improvement_note
+            }
+            for a in rows
+        ]
+    }
+
+
+def drills_pdf_data(category=None):
+    """Whole catalogue, or the topics of one DRILL_CATEGORIES entry."""
+    if category is None:
+        return {
+            "topics": [(topic, list(d["drills"])) for topic, d in DRILL_MAP.items()]
+        }
+
+    return {
+        "title": f"{category.title()} Drills",
+        "topics": [
+            (topic, list(DRILL_MAP[topic]["drills"]))
+            for topic in DRILL_CATEGORIES[category]
+        ]
+    }
+
+
+def availability_pdf_data(availability):
+    responses = db.session.query(
+        User.username,
+        PreMatchResponse.status
+    ).join(
+        PreMatchResponse,
+        User.id == PreMatchResponse.user_id
+    ).filter(
+        PreMatchResponse.availability_id == availability.id
+    ).order_by(User.username).all()
+
+    return {
+        "title": availability.title,
+        "match_date": str(availability.match_date) if availability.match_date else None,
+        "venue": availability.venue,
+        "responses": [{"username": r.username, "status": r.status} for r in responses]
+    }
+
+
+def payment_pdf_data(availability):
+    payments = (
+        db.session.query(
+            MatchPayment,
+            User.username
+        )
+        .join(User, User.id == MatchPayment.user_id)
+        .filter(
+            MatchPayment.availability_id == availability.id,
+            MatchPayment.payment_status == "paid"
+        )
+        .all()
+    )
+
+    return {
+        "title": availability.title,
+        "match_date": str(availability.match_date),
+        "venue": availability.venue,
+        "payments": [
+            {
+                "username": username,
+                "amount": str(p.amount),
+                "transaction_id": p.transaction_id,
+                "paid_at": p.created_at.strftime("%Y-%m-%d %H:%M")
+            }
+            for p, username in payments
+        ],
+        "total_amount": sum(float(p.amount) for p, _ in payments)
+    }
@@ -0,0 +1,70 @@
+from datetime import date
+
+from flask import Blueprint, request, abort
+from flask_login import login_required, current_user
+
+from models import Match
+from exports import (
+    csv_response, attendance_export, player_stats_export, manual_score_export
+)
+
+exports_bp = Blueprint("exports", __name__)
+
+
+def _coach_only():
+    if current_user.role != "coach":
+        abort(403)
+
+
+def _date_arg(name, default):
+    value = request.args.get(name)
+    if not value:
+        return default
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        abort(400)
+
+
+# ----------------------------------------------------
+# ATTENDANCE (?start=YYYY-MM-DD&end=YYYY-MM-DD, default today)
+# ----------------------------------------------------
+@exports_bp.route("/export/attendance.csv")
+@login_required
+def attendance_csv():
+    _coach_only()
+
+    end = _date_arg("end", date.today())
+    start = _date_arg("start", end)
+    if start > end:
+        abort(400)
+
+    header, rows = attendance_export(start, end)
+    return csv_response(f"attendance_{start}_{end}.csv", header, rows)
+
+
+# ----------------------------------------------------
+# PLAYER STATS (?batch_id=)
+# ----------------------------------------------------
+@exports_bp.route("/export/player_stats.csv")
+@login_required
+def player_stats_csv():
+    _coach_only()
+
+    batch_id = request.args.get("batch_id", type=int)
+    header, rows = player_stats_export(batch_id)
+
+    filename = f"player_stats_batch_{batch_id}.csv" if batch_id else "player_stats.csv"
+    return csv_response(filename, header, rows)
+
+
+# ----------------------------------------------------
+# MATCH SCORECARD
+# ----------------------------------------------------
+@exports_bp.route("/export/match/<int:match_id>/scorecard.csv")
+@login_required
+def match_scorecard_csv(match_id):
+    Match.query.get_or_404(match_id)
+
+    header, rows = manual_score_export(match_id)
+    return csv_response(f"match_{match_id}_scorecard.csv", header, rows)
@@ -1,15 +1,12 @@
-import io
-import csv
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
 from sqlalchemy import func
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash, abort, send_file
+from flask import Blueprint, render_template, request, redirect, url_for, flash, abort
 from flask_login import login_required, current_user
 from models import db, PreMatchAvailability, PreMatchResponse, User
 from models.payment import MatchPayment
+from reports import payment_pdf_data
+from routes.report_jobs import send_or_queue_pdf
+from exports import csv_response, payment_export
 
 payments_bp = Blueprint("payments", __name__)
 
@@ -147,48 +144,10 @@ def export_payment_csv(availability_id):
     if current_user.role != "coach":
         abort(403)
 
-    availability = PreMatchAvailability.query.get_or_404(availability_id)
+    PreMatchAvailability.query.get_or_404(availability_id)
 
-    payments = (
-        db.session.query(
-            MatchPayment,
-            User.username
-        )
-        .join(User, User.id == MatchPayment.user_id)
-        .filter(
-            MatchPayment.availability_id == availability_id,
-            MatchPayment.payment_status == "paid"
-        )
-        .all()
-    )
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    # HEADER
-    writer.writerow([
-        "Player Name",
-        "Amount",
-        "Transaction ID",
-        "Paid Date"
-    ])
-
-    for p, username in payments:
-        writer.writerow([
-            username,
-            float(p.amount),
-            p.transaction_id,
-            p.created_at.strftime("%Y-%m-%d %H:%M")
-        ])
-
-    output.seek(0)
-
-    return send_file(
-        io.BytesIO(output.getvalue().encode()),
-        mimetype="text/csv",
-        as_attachment=True,
-        download_name=f"match_{availability_id}_payments.csv"
-    )
+    header, rows = payment_export(availability_id)
+    return csv_response(f"match_{availability_id}_payments.csv", header, rows)
 @payments_bp.route("/payment/export/pdf/<int:availability_id>")
 @login_required
 def export_payment_pdf(availability_id):
@@ -196,79 +155,6 @@ def export_payment_pdf(availability_id):
         abort(403)
 
     availability = PreMatchAvailability.query.get_or_404(availability_id)
-
-    payments = (
-        db.session.query(
-            MatchPayment,
-            User.username
-        )
-        .join(User, User.id == MatchPayment.user_id)
-        .filter(
-            MatchPayment.availability_id == availability_id,
-            MatchPayment.payment_status == "paid"
-        )
-        .all()
-    )
-
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
-    styles = getSampleStyleSheet()
-    elements = []
-
-    # TITLE
-    elements.append(Paragraph(
-        f"<b>Match Payment Report</b>", styles["Title"]
-    ))
-    elements.append(Paragraph(
-        f"Match: {availability.title}", styles["Normal"]
-    ))
-    elements.append(Paragraph(
-        f"Date: {availability.match_date}", styles["Normal"]
-    ))
-    elements.append(Paragraph(
-        f"Venue: {availability.venue}", styles["Normal"]
-    ))
-
-    elements.append(Paragraph("<br/>", styles["Normal"]))
-
-    # TABLE DATA
-    table_data = [
-        ["Player Name", "Amount", "Transaction ID", "Paid Date"]
-    ]
-
-    total_amount = 0
-
-    for p, username in payments:
-        table_data.append([
-            username,
-            f"₹{p.amount}",
-            p.transaction_id,
-            p.created_at.strftime("%Y-%m-%d %H:%M")
-        ])
-        total_amount += float(p.amount)
-
-    table = Table(table_data, colWidths=[140, 80, 140, 120])
-    table.setStyle(TableStyle([
-        ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
-        ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
-        ("ALIGN", (1,1), (-1,-1), "CENTER"),
-        ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
-    ]))
-
-    elements.append(table)
-
-    elements.append(Paragraph("<br/>", styles["Normal"]))
-    elements.append(Paragraph(
-        f"<b>Total Approved Amount:</b> ₹{total_amount}",
-        styles["Normal"]
-    ))
-
-    doc.build(elements)
-    buffer.seek(0)
-
-    return send_file(
-        buffer,
-        as_attachment=True,
-        download_name=f"match_{availability_id}_payments.pdf",
-        mimetype="application/pdf"
+    return send_or_queue_pdf(
+        "payments", payment_pdf_data(availability), f"match_{availability_id}_payments.pdf"
     )
\ No newline at end of file
@@ -0,0 +1,146 @@
+from datetime import date
+
+from flask import (
+    Blueprint, jsonify, abort, url_for, current_app, request, render_template,
+    make_response
+)
+from flask_login import login_required, current_user
+
+from models import Match, Player, PreMatchAvailability
+import pdf_cache
+import pdf_jobs
+from reports import (
+    match_report_pdf_data, player_stats_pdf_data, attendance_pdf_data,
+    availability_pdf_data, payment_pdf_data
+)
+
+report_jobs_bp = Blueprint("report_jobs", __name__)
+
+
+# ----------------------------------------------------
+# REPORT KINDS
+# Each returns (data, download_name); same checks as the direct routes,
+# which answer a cache miss with send_or_queue_pdf below.
+# ----------------------------------------------------
+def _match_report(object_id):
+    m = Match.query.get_or_404(object_id)
+    return match_report_pdf_data(m), f"match_{object_id}_report.pdf"
+
+
+def _player_stats(object_id):
+    player = Player.query.get_or_404(object_id)
+    return player_stats_pdf_data(player), f"{player.user.username}_stats.pdf"
+
+
+def _attendance(object_id):
+    today = date.today()
+    return attendance_pdf_data(today), f"attendance_{today}.pdf"
+
+
+def _availability(object_id):
+    availability = PreMatchAvailability.query.get_or_404(object_id)
+    return availability_pdf_data(availability), f"pre_match_{object_id}.pdf"
+
+
+def _payments(object_id):
+    if current_user.role != "coach":
+        abort(403)
+    availability = PreMatchAvailability.query.get_or_404(object_id)
+    return payment_pdf_data(availability), f"match_{object_id}_payments.pdf"
+
+
+REPORT_KINDS = {
+    "match_report": _match_report,
+    "player_stats": _player_stats,
+    "attendance": _attendance,
+    "availability": _availability,
+    "payments": _payments,
+}
+
+
+def _job_dir():
+    return current_app.config["PDF_JOB_DIR"]
+
+
+def _job_json(job):
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "error": job.get("error"),
+        "status_url": url_for("report_jobs.job_status", job_id=job["id"]),
+        "download_url": url_for("report_jobs.job_download", job_id=job["id"])
+    }
+
+
+def _submit(kind, data, filename):
+    return pdf_jobs.submit(
+        _job_dir(), pdf_cache.cache_settings(), kind, data, filename,
+        current_user.id, workers=current_app.config["PDF_WORKERS"]
+    )
+
+
+def send_or_queue_pdf(kind, data, filename):
+    """
+    For the direct PDF routes: the cached file when there is one, else a
+    queued job and a 202 — JSON for API clients, a page that waits for
+    the job and then downloads it for browsers. Never renders inline.
+    """
+    key = pdf_cache.cache_key(kind, data)
+    path = pdf_cache.lookup(current_app.config["PDF_CACHE_DIR"], key)
+    if path:
+        return pdf_cache.send_cached_pdf(path, key, filename)
+
+    job = _job_json(_submit(kind, data, filename))
+    if request.accept_mimetypes.best == "application/json":
+        resp = jsonify(job)
+    else:
+        resp = make_response(render_template("pdf_job.html", job=job))
+
+    resp.status_code = 202
+    resp.headers["Location"] = job["status_url"]
+    resp.headers["Retry-After"] = "1"
+    return resp
+
+
+def _own_job(job_id):
+    job = pdf_jobs.get_job(_job_dir(), job_id)
+    if not job or job["user_id"] != current_user.id:
+        abort(404)
+    return job
+
+
+# ----------------------------------------------------
+# ROUTES
+# ----------------------------------------------------
+@report_jobs_bp.route("/reports/jobs/<kind>", methods=["POST"])
+@report_jobs_bp.route("/reports/jobs/<kind>/<int:object_id>", methods=["POST"])
+@login_required
+def submit_job(kind, object_id=None):
+    if kind not in REPORT_KINDS:
+        abort(404)
+
+    data, filename = REPORT_KINDS[kind](object_id)
+    return jsonify(_job_json(_submit(kind, data, filename))), 202
+
+
+@report_jobs_bp.route("/reports/jobs/<job_id>")
+@login_required
+def job_status(job_id):
+    return jsonify(_job_json(_own_job(job_id)))
+
+
+@report_jobs_bp.route("/reports/jobs/<job_id>/download")
+@login_required
+def job_download(job_id):
+    job = _own_job(job_id)
+
+    if job["status"] != "done":
+        return jsonify(_job_json(job)), 409
+
+    path = pdf_cache.lookup(current_app.config["PDF_CACHE_DIR"], job["key"])
+    if not path:
+        # evicted since the job finished — submit it again
+        return jsonify({"error": "expired", "job_id": job_id}), 410
+
+    return pdf_cache.send_cached_pdf(path, job["key"], job["filename"])
@@ -0,0 +1,79 @@
+from functools import wraps
+
+from flask import session, jsonify, flash, redirect, url_for
+from flask_login import current_user
+
+from models import Coach, Player, Match
+
+# session key holding the logged-in user's coach / player ids
+ACTOR_SESSION_KEY = "scoring_actor"
+
+
+# ----------------------------------------------------
+# ACTOR IDS (RESOLVED ONCE PER LOGIN SESSION)
+# ----------------------------------------------------
+def get_actor_ids():
+    """
+    (coach_id, player_id) of the current user. Looked up on first use and
+    kept in the session, so scoring requests skip the Coach / Player query.
+    """
+    cached = session.get(ACTOR_SESSION_KEY)
+    if cached and cached.get("user_id") == current_user.id:
+        return cached.get("coach_id"), cached.get("player_id")
+
+    coach_id = player_id = None
+    if current_user.role == "coach":
+        c = Coach.query.filter_by(user_id=current_user.id).first()
+        coach_id = c.id if c else None
+    elif current_user.role == "player":
+        p = Player.query.filter_by(user_id=current_user.id).first()
+        player_id = p.id if p else None
+
+    session[ACTOR_SESSION_KEY] = {
+        "user_id": current_user.id,
+        "coach_id": coach_id,
+        "player_id": player_id
+    }
+    return coach_id, player_id
+
+
+def clear_actor_cache():
+    session.pop(ACTOR_SESSION_KEY, None)
+
+
+# ----------------------------------------------------
+# SCORER CHECKS
+# ----------------------------------------------------
+def is_match_scorer(match):
+    if not current_user.is_authenticated:
+        return False
+
+    coach_id, player_id = get_actor_ids()
+
+    if current_user.role == "coach":
+        return coach_id is not None and match.scorer_coach_id == coach_id
+    if current_user.role == "player":
+        return player_id is not None and match.scorer_player_id == player_id
+    return False
+
+
+def scorer_required(api=False, message="You are not the assigned scorer."):
+    """
+    Route decorator: loads the match from `match_id`, checks that the
+    current user is its assigned scorer and passes it on as `m`.
+    API routes get a JSON 403; pages flash and go back to match_detail.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(match_id, *args, **kwargs):
+            m = Match.query.get_or_404(match_id)
+
+            if not is_match_scorer(m):
+                if api:
+                    return jsonify({"error": "not_allowed"}), 403
+                flash(message, "danger")
+                return redirect(url_for("match_detail", match_id=match_id))
+
+            return view(match_id, *args, m=m, **kwargs)
+        return wrapped
+    return decorator
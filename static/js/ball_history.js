@@ -0,0 +1,57 @@
+// ----------------------------------------------------
+// BALL HISTORY
+// The page lists over summaries; the balls of an over are fetched on
+// demand from /api/live/<match>/overs/<innings>/<over>/balls, one
+// keyset page (after_id) at a time.
+// ----------------------------------------------------
+function ballRow(b) {
+    const tr = document.createElement("tr");
+    tr.className = "table-light small";
+    [
+        "", `${b.over}.${b.ball}`, b.bowler || "-",
+        b.runs, b.wicket !== "none" ? b.wicket : "",
+        b.extras !== "none" ? b.extras : "", "",
+        `${b.striker || ""} ${b.commentary ? "— " + b.commentary : ""}`
+    ].forEach(v => {
+        const td = document.createElement("td");
+        td.textContent = v;
+        tr.appendChild(td);
+    });
+    return tr;
+}
+
+function loadOverBalls(button, target, afterId) {
+    button.disabled = true;
+    fetch(`${button.dataset.overBalls}?after_id=${afterId}`)
+        .then(r => r.json())
+        .then(page => {
+            const more = target.querySelector(".more-balls");
+            if (more) more.remove();
+
+            page.balls.forEach(b => target.appendChild(ballRow(b)));
+
+            if (page.next_after_id) {
+                const tr = document.createElement("tr");
+                tr.className = "more-balls";
+                tr.innerHTML = '<td colspan="8"><a href="#">Load more…</a></td>';
+                tr.querySelector("a").addEventListener("click", e => {
+                    e.preventDefault();
+                    loadOverBalls(button, target, page.next_after_id);
+                });
+                target.appendChild(tr);
+            }
+            target.dataset.loaded = "1";
+        })
+        .finally(() => { button.disabled = false; });
+}
+
+document.addEventListener("click", function (e) {
+    const button = e.target.closest("[data-over-balls]");
+    if (!button) return;
+
+    const target = button.closest("tbody").nextElementSibling;
+    target.classList.toggle("d-none");
+    if (!target.dataset.loaded && !target.classList.contains("d-none")) {
+        loadOverBalls(button, target, 0);
+    }
+});
@@ -1,26 +1,62 @@
 // live_score.js — final (works with /api/live/<id>/add and /api/live/<id>/events)
 
-async function postBall(matchId, payload){
+// last live_seq seen per match; sent back as expected_seq so the server
+// rejects changes made from a stale view (another scorer got in first)
+const liveSeq = {};
+
+function noteSeq(matchId, seq){
+  if(seq != null && seq > (liveSeq[matchId]||0)) liveSeq[matchId] = seq;
+}
+
+async function postScoring(matchId, url, payload){
   try{
-    const res = await fetch(`/api/live/${matchId}/add`, {
+    const body = Object.assign({}, payload);
+    if(liveSeq[matchId] != null) body.expected_seq = liveSeq[matchId];
+    const res = await fetch(url, {
       method: "POST",
       headers: {"Content-Type":"application/json"},
-      body: JSON.stringify(payload)
+      body: JSON.stringify(body)
     });
-    return await res.json();
+    const r = await res.json();
+    // a stale answer carries the current value; the caller refreshes and retries
+    if(res.status === 409 && r.live_seq != null) liveSeq[matchId] = r.live_seq;
+    else noteSeq(matchId, r.seq);
+    return r;
   }catch(e){
-    console.error("postBall error", e); return {error:"network"};
+    console.error("postScoring error", e); return {error:"network"};
   }
 }
 
-async function fetchEvents(matchId){
+function postBall(matchId, payload){
+  return postScoring(matchId, `/api/live/${matchId}/add`, payload);
+}
+
+// action: "undo" or "amend" (changes = the corrected ball fields)
+// (corrections always carry expected_seq — the server refuses them without it)
+function correctBall(matchId, ballId, action, changes){
+  const body = Object.assign({expected_seq: liveSeq[matchId] || 0}, changes || {});
+  return postScoring(matchId, `/api/live/${matchId}/balls/${ballId}/${action}`, body);
+}
+
+async function fetchEvents(matchId, sinceId){
   try{
-    const res = await fetch(`/api/live/${matchId}/events`);
+    const res = await fetch(`/api/live/${matchId}/events?since_id=${sinceId||0}`);
     if(!res.ok) return [];
-    return await res.json();
+    const evs = await res.json();
+    // a revalidated (304) response replays the cached body; drop anything already held
+    return evs.filter(ev => ev.id > (sinceId||0));
   }catch(e){ console.error("fetchEvents", e); return []; }
 }
 
+async function fetchState(matchId){
+  try{
+    const res = await fetch(`/api/live/${matchId}/state`);
+    if(!res.ok) return null;
+    const st = await res.json();
+    return st.empty ? null : st;
+  }catch(e){ console.error("fetchState", e); return null; }
+}
+
 function buildSummary(events){
   const summary = { totalRuns:0, wickets:0, balls:0, batsmen:{}, bowlers:{} };
   events.forEach(ev=>{
@@ -103,11 +139,50 @@ function initLive(matchId, opts){
   const submitBtn = document.getElementById(opts.submitBtnId);
   const refreshInterval = opts.fetchInterval || 3000;
 
+  const events = [];
+  let lastId = 0;
+  let summary = null;
+
+  if(opts.liveSeq != null) noteSeq(matchId, opts.liveSeq);
+
+  // correction events rewrite the ball they point at; undone balls are dropped
+  function appendEvents(fresh){
+    fresh.forEach(ev => {
+      if(ev.id <= lastId) return;
+      lastId = ev.id;
+      noteSeq(matchId, ev.seq);
+      const i = events.findIndex(b => b.id === ev.ref_ball_id);
+      if(ev.correction === "void"){ if(i >= 0) events.splice(i, 1); }
+      else if(ev.correction === "amend"){
+        if(i >= 0) events[i] = Object.assign({}, ev, {id: events[i].id, correction: null, voided: false});
+      }
+      else if(!ev.voided) events.push(ev);
+    });
+  }
+
   async function refresh(){
-    const evs = await fetchEvents(matchId);
-    renderEvents(eventsCt, evs);
-    const sum = buildSummary(evs);
-    renderScoreboard(boardCt, sum);
+    const fresh = await fetchEvents(matchId, lastId);
+    if(fresh.length === 0 && lastId > 0) return;
+    appendEvents(fresh);
+    renderEvents(eventsCt, events);
+    // totals come from the server-side innings aggregate; replay only as a fallback
+    summary = await fetchState(matchId) || buildSummary(events);
+    renderScoreboard(boardCt, summary);
+  }
+
+  // patch the scoreboard from a pushed "live_ball" delta
+  function applyDelta(d){
+    if(d.ball.id <= lastId) return;
+    appendEvents([d.ball]);
+    renderEvents(eventsCt, events);
+    if(!summary){ refresh(); return; }
+    summary.totalRuns = d.score.runs;
+    summary.wickets = d.score.wickets;
+    summary.extras = d.score.extras;
+    summary.overs = d.score.overs;
+    Object.assign(summary.batsmen, d.batter);
+    Object.assign(summary.bowlers, d.bowler);
+    renderScoreboard(boardCt, summary);
   }
 
   if(submitBtn){
@@ -129,11 +204,47 @@ function initLive(matchId, opts){
       const r = await postBall(matchId, payload);
       submitBtn.disabled = false; submitBtn.innerText="Add Ball";
       if(r && r.status==='ok'){ await refresh(); }
+      else if(r && r.error==='stale'){ await refresh(); alert("The score was changed from another device — check it and submit again."); }
       else { alert("Save failed: "+JSON.stringify(r)); }
     });
   }
 
+  // polling only runs while there is no live socket
+  let timer = null;
+  function startPolling(){ if(!timer) timer = setInterval(refresh, refreshInterval); }
+  function stopPolling(){ if(timer){ clearInterval(timer); timer = null; } }
+
+  function wireSocket(){
+    if(typeof io === "undefined"){ startPolling(); return; }
+    const sock = (typeof socket !== "undefined") ? socket : io();
+    // since_id makes the server replay only the balls missed while away
+    const join = ()=>{ stopPolling(); sock.emit("join_match_room", {match_id: matchId, since_id: lastId}); };
+
+    sock.on("connect", join);
+    sock.on("disconnect", startPolling);
+    sock.on("live_ball", d=>{ if(d.match_id == matchId) applyDelta(d); });
+    sock.on("live_innings", d=>{ if(d.match_id == matchId) refresh(); });
+    // resume replies and synced batches both carry balls + the resulting scoreboard
+    const applyBatch = d=>{
+      if(d.match_id != matchId) return;
+      appendEvents(d.balls);
+      renderEvents(eventsCt, events);
+      if(d.state){ summary = d.state; renderScoreboard(boardCt, summary); }
+      if(d.has_more) refresh();
+    };
+    sock.on("live_resume", applyBatch);
+    sock.on("live_balls", applyBatch);
+    sock.on("live_correction", d=>{
+      if(d.match_id != matchId) return;
+      applyBatch({match_id: d.match_id, balls: [d.event], state: d.state});
+    });
+    if(sock.connected) join();
+  }
+
   refresh();
-  const timer = setInterval(refresh, refreshInterval);
-  return { stop: ()=>clearInterval(timer), refresh };
+  // base.html opens the shared socket after the page content, so wait for it
+  if(document.readyState === "loading") document.addEventListener("DOMContentLoaded", wireSocket);
+  else wireSocket();
+
+  return { stop: stopPolling, refresh, events: () => events };
 }
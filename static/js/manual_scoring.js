@@ -12,6 +12,9 @@
 window.MS_PLAYERS = window.MS_PLAYERS || [];
 window.WAGON_SHOTS = window.WAGON_SHOTS || [];
 
+// version of the stored draft this form is based on (sent as If-Match)
+let draftVersion = window.MATCH?.draft_version ?? null;
+
 function $id(id) { return document.getElementById(id); }
 
 function buildPlayerOptionsHTML(selectedId) {
@@ -174,12 +177,27 @@ function clearWagonShots() {
   window.WAGON_SHOTS = [];
   renderWagonList();
   if (typeof window.resetWagon === "function") window.resetWagon();
+  scheduleAutosave();
 }
-function addWagonShot(playerId, shot) {
+function pushWagonShot(playerId, shot) {
   let group = window.WAGON_SHOTS.find(g => g.player_id == playerId);
   if (!group) { group = { player_id: playerId, shots: [] }; window.WAGON_SHOTS.push(group); }
   group.shots.push(shot);
+}
+function addWagonShot(playerId, shot) {
+  pushWagonShot(playerId, shot);
   renderWagonList();
+  scheduleAutosave();
+}
+// one row per shot, as the server stores them
+function flattenWagonShots() {
+  const rows = [];
+  window.WAGON_SHOTS.forEach(function(g) {
+    g.shots.forEach(function(s) {
+      rows.push({ player_id: g.player_id, angle: s.angle, distance: s.distance || 0, runs: s.runs || 0, shot_type: s.shot_type || null });
+    });
+  });
+  return rows;
 }
 function renderWagonList() {
   const ul = $id("shotsList"); if (!ul) return;
@@ -263,8 +281,8 @@ function promptMatchSummary() {
   };
 }
 
-/* ---------- SAVE (collect & POST) ---------- */
-async function saveManualScoring(matchId) {
+/* ---------- COLLECT / RESTORE ---------- */
+function collectScorecard() {
   // collect batting
   const batting = [];
   document.querySelectorAll(".batting-row").forEach(function(r) {
@@ -313,15 +331,140 @@ async function saveManualScoring(matchId) {
     });
   });
 
+  return {
+    batting: batting,
+    bowling: bowling,
+    fielding: fielding,
+    wagon: flattenWagonShots(),
+    opponent_simple: getOpponentSimple()
+  };
+}
+
+// fill the form from a stored draft; `replace` drops what is on screen first
+function loadDraft(draft, replace) {
+  if (!draft) return;
+  if (replace) {
+    ["batting-container", "bowling-container", "fielding-container"].forEach(function(id) {
+      if ($id(id)) $id(id).innerHTML = "";
+    });
+    window.WAGON_SHOTS = [];
+  }
+
+  (draft.batting || []).forEach(function(b) { addBattingRow(b); });
+  (draft.bowling || []).forEach(function(b) { addBowlingRow(b); });
+  (draft.fielding || []).forEach(function(f) { addFieldingRow(f); });
+
+  (draft.wagon || []).forEach(function(w) {
+    if (w.shots) w.shots.forEach(function(s) { pushWagonShot(w.player_id, s); });
+    else pushWagonShot(w.player_id, w);
+  });
+  renderWagonList();
+
+  const op = draft.opponent_simple;
+  if (op) {
+    if ($id("oppRuns")) $id("oppRuns").value = op.runs ?? "";
+    if ($id("oppWickets")) $id("oppWickets").value = op.wickets ?? "";
+    if ($id("oppOvers")) $id("oppOvers").value = op.overs ?? "";
+  }
+  computeOverview();
+}
+
+/* ---------- VERSIONED SAVES ---------- */
+function draftHeaders() {
+  const headers = { "Content-Type": "application/json" };
+  if (draftVersion !== null) headers["If-Match"] = `"${draftVersion}"`;
+  return headers;
+}
+
+function describeDraftDiff(diff) {
+  return Object.keys(diff || {}).map(function(section) {
+    const d = diff[section];
+    if (section === "team_summary") return "team summary: " + Object.keys(d).join(", ");
+    const parts = [];
+    if (d.added?.length) parts.push(d.added.length + " added");
+    if (d.removed?.length) parts.push(d.removed.length + " removed");
+    (d.changed || []).forEach(function(c) {
+      parts.push(playerNameById(c.player_id) + " (" + Object.keys(c.fields).join(", ") + ")");
+    });
+    return section + ": " + parts.join(", ");
+  }).join("\n");
+}
+
+// another device saved first: keep ours (retry on their version) or load theirs
+function handleDraftConflict(data) {
+  clearTimeout(autosaveTimer);
+  draftVersion = data.version;
+  const who = data.updated_by ? " by " + data.updated_by : "";
+  const keepMine = window.confirm(
+    "This scorecard was changed" + who + " on another device.\n\n" +
+    "Your version differs in:\n" + describeDraftDiff(data.diff) + "\n\n" +
+    "OK = keep your version, Cancel = load theirs."
+  );
+  if (keepMine) {
+    setAutosaveStatus("Overwriting with your version…");
+    return true;
+  }
+  loadDraft(data.draft, true);
+  setAutosaveStatus("Loaded the latest version");
+  return false;
+}
+
+/* ---------- AUTOSAVE ---------- */
+const AUTOSAVE_DELAY_MS = 1500;
+let autosaveTimer = null;
+
+function setAutosaveStatus(text) {
+  const el = $id("autosaveStatus");
+  if (el) el.textContent = text;
+}
+
+function scheduleAutosave(delayMs) {
+  clearTimeout(autosaveTimer);
+  autosaveTimer = setTimeout(function() { autosaveManualScoring(window.MATCH?.id); }, delayMs ?? AUTOSAVE_DELAY_MS);
+}
+
+async function autosaveManualScoring(matchId) {
+  if (!matchId) return;
+  try {
+    const resp = await fetch(`/api/match/${matchId}/manual_draft`, {
+      method: "PUT",
+      headers: draftHeaders(),
+      body: JSON.stringify(collectScorecard())
+    });
+    const data = await resp.json();
+    if (resp.status === 409) {
+      if (handleDraftConflict(data)) scheduleAutosave(0);
+      return;
+    }
+    if (!resp.ok) return setAutosaveStatus("Autosave failed: " + (data.error || resp.status));
+
+    draftVersion = data.version;
+    if (data.status === "queued" && data.flush_in !== null) {
+      // the server writes at most once per interval: send again once it is due
+      setAutosaveStatus("Draft saved");
+      scheduleAutosave(data.flush_in * 1000 + 100);
+    } else {
+      setAutosaveStatus("All changes saved");
+    }
+  } catch (err) {
+    setAutosaveStatus("Offline — changes not saved yet");
+  }
+}
+
+/* ---------- SAVE (collect & POST) ---------- */
+async function saveManualScoring(matchId) {
+  clearTimeout(autosaveTimer);
+  const card = collectScorecard();
+
   // prompt for match summary
   const summary = promptMatchSummary();
   if (!summary) return alert("Save cancelled.");
 
   const payload = {
-    batting: batting,
-    bowling: bowling,
-    fielding: fielding,
-    wagon: window.WAGON_SHOTS || [],
+    batting: card.batting,
+    bowling: card.bowling,
+    fielding: card.fielding,
+    wagon: card.wagon,
     opponent_simple: summary.opponent_simple,
     team_summary: summary.team_summary
   };
@@ -329,10 +472,14 @@ async function saveManualScoring(matchId) {
   try {
     const resp = await fetch(`/api/match/${matchId}/manual_save`, {
       method: "POST",
-      headers: { "Content-Type": "application/json" },
+      headers: draftHeaders(),
       body: JSON.stringify(payload)
     });
     const data = await resp.json();
+    if (resp.status === 409) {
+      if (handleDraftConflict(data)) alert("Press Save again to overwrite with your version.");
+      return;
+    }
     if (!resp.ok) {
       alert("Save failed: " + (data.error || JSON.stringify(data)));
       return;
@@ -437,9 +584,19 @@ document.addEventListener("DOMContentLoaded", function() {
   wireWagonStart();
   renderWagonList();
 
+  // resume from the latest draft
+  loadDraft(window.MANUAL_DRAFT);
+
   // compute overview on input changes
   document.body.addEventListener("input", computeOverview);
 
+  // autosave after edits and row removals
+  document.body.addEventListener("input", function() { scheduleAutosave(); });
+  document.body.addEventListener("change", function() { scheduleAutosave(); });
+  document.body.addEventListener("click", function(e) {
+    if (e.target.closest(".remove, .remove-row")) scheduleAutosave();
+  });
+
   // initial UI application (this will create rows for visible sections only)
   applyInningsUI();
   computeOverview();
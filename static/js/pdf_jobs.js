@@ -0,0 +1,76 @@
+// ----------------------------------------------------
+// BACKGROUND PDF DOWNLOADS
+// Links with data-pdf-job="<submit url>" queue the PDF as a job, poll
+// its status and then download it. The link's own href (the direct
+// route) is used if the job can't be queued; on a cache miss that
+// route queues a job too and answers with the waiting page below.
+// ----------------------------------------------------
+const PDF_POLL_MS = 1000;
+
+function waitForPdfJob(statusUrl, onDone, onFailed) {
+    fetch(statusUrl)
+        .then(r => {
+            if (!r.ok) throw new Error(r.status);
+            return r.json();
+        })
+        .then(j => {
+            if (j.status === "done") {
+                onDone(j.download_url);
+            } else if (j.status === "failed") {
+                onFailed();
+            } else {
+                setTimeout(() => waitForPdfJob(statusUrl, onDone, onFailed), PDF_POLL_MS);
+            }
+        })
+        .catch(onFailed);
+}
+
+function finishPdfJob(link, label) {
+    link.textContent = label;
+    delete link.dataset.busy;
+}
+
+document.addEventListener("click", function (e) {
+    const link = e.target.closest("a[data-pdf-job]");
+    if (!link) return;
+
+    e.preventDefault();
+    if (link.dataset.busy) return;
+    link.dataset.busy = "1";
+
+    const label = link.textContent;
+    link.textContent = "Preparing PDF…";
+
+    fetch(link.dataset.pdfJob, { method: "POST" })
+        .then(r => {
+            if (!r.ok) throw new Error(r.status);
+            return r.json();
+        })
+        .then(job => waitForPdfJob(
+            job.status_url,
+            url => {
+                finishPdfJob(link, label);
+                window.location.href = url;
+            },
+            () => finishPdfJob(link, "PDF failed — try again")
+        ))
+        .catch(() => {
+            finishPdfJob(link, label);
+            window.location.href = link.href;
+        });
+});
+
+// waiting page of a direct PDF route (pdf_job.html)
+document.addEventListener("DOMContentLoaded", function () {
+    const box = document.querySelector("[data-pdf-job-status]");
+    if (!box) return;
+
+    waitForPdfJob(
+        box.dataset.pdfJobStatus,
+        url => { window.location.href = url; },
+        () => {
+            box.querySelector("[data-pdf-job-message]").textContent =
+                "The PDF could not be built. Go back and try again.";
+        }
+    );
+});
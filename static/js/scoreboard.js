@@ -2,26 +2,46 @@
    SCOREBOARD AUTO REFRESH (Used in dashboards)
 --------------------------------------------------------- */
 
+const boardState = {};
+
 async function refreshScoreboard(matchId, elementId) {
     try {
-        const res = await fetch(`/api/live/${matchId}/events`);
-        const events = await res.json();
+        const st = boardState[elementId] ||
+            (boardState[elementId] = { lastId: 0, total: 0, wickets: 0, last: null });
 
-        if (!events || events.length === 0) return;
+        const res = await fetch(`/api/live/${matchId}/events?since_id=${st.lastId}`);
+        if (!res.ok) return;
+        const events = (await res.json()).filter(b => b.id > st.lastId);
 
-        let total = 0;
-        let wickets = 0;
+        if (!events || events.length === 0) return;
 
         events.forEach(b => {
-            total += parseInt(b.runs);
+            if (b.voided) return;   // undone balls and correction events
+            st.total += parseInt(b.runs);
             if (b.extras === "wide" || b.extras === "no_ball") {
-                total += 1;
+                st.total += 1;
             }
-            if (b.wicket !== "none") wickets++;
+            if (b.wicket !== "none") st.wickets++;
         });
 
-        const last = events[events.length - 1];
-        const overs = `${last.over}.${last.ball}`;
+        st.last = events[events.length - 1];
+        st.lastId = st.last.id;
+
+        let overs = `${st.last.over}.${st.last.ball}`;
+
+        // a correction changes balls already counted; take the server's totals
+        if (events.some(b => b.correction)) {
+            const stRes = await fetch(`/api/live/${matchId}/state`);
+            const state = stRes.ok ? await stRes.json() : null;
+            if (state && !state.empty) {
+                st.total = state.totalRuns;
+                st.wickets = state.wickets;
+                overs = state.overs;
+            }
+        }
+
+        const total = st.total;
+        const wickets = st.wickets;
 
         const box = document.getElementById(elementId);
         if (!box) return;
@@ -36,8 +56,24 @@ async function refreshScoreboard(matchId, elementId) {
     }
 }
 
+function pushScoreboard(elementId, delta) {
+    const st = boardState[elementId];
+    const box = document.getElementById(elementId);
+    if (!st || !box || delta.ball.id <= st.lastId) return;
+
+    st.lastId = delta.ball.id;
+    st.total = delta.score.runs;
+    st.wickets = delta.score.wickets;
+    st.last = delta.ball;
+    box.innerHTML = `
+        <div class="score-num">${delta.score.runs}/${delta.score.wickets}</div>
+        <div class="text-muted small">Overs: ${delta.score.overs}</div>
+    `;
+}
+
 document.addEventListener("DOMContentLoaded", () => {
     const boards = document.querySelectorAll("[data-scoreboard]");
+    const live = (typeof io !== "undefined") ? ((typeof socket !== "undefined") ? socket : io()) : null;
 
     boards.forEach(box => {
         const matchId = box.getAttribute("data-scoreboard");
@@ -45,6 +81,37 @@ document.addEventListener("DOMContentLoaded", () => {
 
         refreshScoreboard(matchId, elementId);
 
+        if (live) {
+            // pushed deltas replace the poll; fall back to it only while disconnected
+            let timer = null;
+            const join = () => {
+                if (timer) { clearInterval(timer); timer = null; }
+                live.emit("join_match_room", { match_id: matchId });
+                refreshScoreboard(matchId, elementId);
+            };
+            live.on("connect", join);
+            live.on("disconnect", () => {
+                if (!timer) timer = setInterval(() => refreshScoreboard(matchId, elementId), 5000);
+            });
+            live.on("live_ball", d => { if (d.match_id == matchId) pushScoreboard(elementId, d); });
+            live.on("live_correction", d => {
+                if (d.match_id != matchId || !d.state) return;
+                pushScoreboard(elementId, {
+                    ball: d.event,
+                    score: { runs: d.state.totalRuns, wickets: d.state.wickets, overs: d.state.overs }
+                });
+            });
+            live.on("live_balls", d => {
+                if (d.match_id != matchId || !d.state || !d.balls.length) return;
+                pushScoreboard(elementId, {
+                    ball: d.balls[d.balls.length - 1],
+                    score: { runs: d.state.totalRuns, wickets: d.state.wickets, overs: d.state.overs }
+                });
+            });
+            if (live.connected) join();
+            return;
+        }
+
         setInterval(() => {
             refreshScoreboard(matchId, elementId);
         }, 5000);
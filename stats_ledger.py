@@ -0,0 +1,248 @@
+"""
+Per-match stats ledger.
+
+Approving a match writes one BattingStats / BowlingStats / FieldingStats
+row per player for that match (unique on match_id + player_id),
+replacing whatever the match had before — approving twice gives the
+same ledger. PlayerStats is derived from the ledger with one grouped
+query, so career totals can always be recomputed.
+
+    flask rebuild-player-stats    backfill the ledger and rebuild PlayerStats
+"""
+from sqlalchemy import case, func, insert, inspect, literal, select, union_all
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from models import (
+    db, Match, ManualScore, PlayerStats, BattingStats, BowlingStats, FieldingStats
+)
+
+LEDGER_MODELS = (BattingStats, BowlingStats, FieldingStats)
+
+# rows per upsert statement — keeps bound parameters under SQLite's limit
+UPSERT_CHUNK = 1000
+
+# set once uq_player_stats_player is known to exist (migration 004)
+_unique_player_key = False
+
+# PlayerStats columns, in the order _totals_query() selects them
+STAT_FIELDS = (
+    "matches", "total_runs", "total_balls", "total_fours", "total_sixes", "outs",
+    "overs_bowled", "runs_conceded", "wickets", "catches", "drops", "saves"
+)
+
+
+# ----------------------------------------------------
+# LEDGER WRITE (ON APPROVAL)
+# ----------------------------------------------------
+def _ledger_player_ids(match_id):
+    parts = [
+        select(model.player_id).where(model.match_id == match_id)
+        for model in LEDGER_MODELS
+    ]
+    return {pid for (pid,) in db.session.execute(union_all(*parts))}
+
+
+def write_match_ledger(match_id):
+    """
+    Replace the ledger rows of one match with its scorecard totals.
+    Part of the caller's transaction. Returns the player ids whose
+    totals may have changed.
+    """
+    previous = _ledger_player_ids(match_id)
+
+    for model in LEDGER_MODELS:
+        model.query.filter_by(match_id=match_id).delete(synchronize_session=False)
+
+    # a player can have separate batting / bowling / fielding rows
+    rows = db.session.query(
+        ManualScore.player_id,
+        func.sum(ManualScore.runs), func.sum(ManualScore.balls_faced),
+        func.sum(ManualScore.fours), func.sum(ManualScore.sixes),
+        func.max(case((ManualScore.is_out == True, 1), else_=0)),
+        func.sum(ManualScore.overs), func.sum(ManualScore.runs_conceded),
+        func.sum(ManualScore.wickets),
+        func.sum(ManualScore.catches), func.sum(ManualScore.drops),
+        func.sum(ManualScore.saves)
+    ).filter(
+        ManualScore.match_id == match_id,
+        ManualScore.is_opponent == False,
+        ManualScore.player_id.isnot(None)
+    ).group_by(ManualScore.player_id).all()
+
+    batting, bowling, fielding = [], [], []
+    for (pid, runs, balls, fours, sixes, out,
+         overs, conceded, wickets, catches, drops, saves) in rows:
+
+        # every player on the scorecard gets a batting row — it is
+        # what counts the match as played
+        batting.append({
+            "match_id": match_id, "player_id": pid,
+            "runs": runs or 0, "balls": balls or 0,
+            "fours": fours or 0, "sixes": sixes or 0,
+            "is_out": bool(out)
+        })
+        if overs or conceded or wickets:
+            bowling.append({
+                "match_id": match_id, "player_id": pid,
+                "overs": float(overs or 0), "runs_conceded": conceded or 0,
+                "wickets": wickets or 0
+            })
+        if catches or drops or saves:
+            fielding.append({
+                "match_id": match_id, "player_id": pid,
+                "catches": catches or 0, "drops": drops or 0, "saves": saves or 0
+            })
+
+    for model, values in ((BattingStats, batting), (BowlingStats, bowling), (FieldingStats, fielding)):
+        if values:
+            db.session.execute(insert(model), values)
+
+    return previous | {r[0] for r in rows}
+
+
+# ----------------------------------------------------
+# DERIVED PLAYERSTATS
+# ----------------------------------------------------
+def _totals_query(player_ids=None):
+    """Career totals per player: one grouped query over the three tables."""
+    zero, zero_f = literal(0), literal(0.0)
+
+    def only(model, q):
+        return q if player_ids is None else q.where(model.player_id.in_(player_ids))
+
+    bat = only(BattingStats, select(
+        BattingStats.player_id.label("player_id"),
+        BattingStats.match_id.label("match_id"),
+        BattingStats.runs.label("runs"), BattingStats.balls.label("balls"),
+        BattingStats.fours.label("fours"), BattingStats.sixes.label("sixes"),
+        case((BattingStats.is_out == True, 1), else_=0).label("outs"),
+        zero_f.label("overs"), zero.label("runs_conceded"), zero.label("wickets"),
+        zero.label("catches"), zero.label("drops"), zero.label("saves")
+    ))
+    bowl = only(BowlingStats, select(
+        BowlingStats.player_id, BowlingStats.match_id,
+        zero, zero, zero, zero, zero,
+        BowlingStats.overs, BowlingStats.runs_conceded, BowlingStats.wickets,
+        zero, zero, zero
+    ))
+    field = only(FieldingStats, select(
+        FieldingStats.player_id, FieldingStats.match_id,
+        zero, zero, zero, zero, zero,
+        zero_f, zero, zero,
+        FieldingStats.catches, FieldingStats.drops, FieldingStats.saves
+    ))
+
+    ledger = union_all(bat, bowl, field).subquery()
+    c = ledger.c
+
+    return select(
+        c.player_id,
+        func.count(func.distinct(c.match_id)),
+        func.sum(c.runs), func.sum(c.balls), func.sum(c.fours), func.sum(c.sixes),
+        func.sum(c.outs),
+        func.sum(c.overs), func.sum(c.runs_conceded), func.sum(c.wickets),
+        func.sum(c.catches), func.sum(c.drops), func.sum(c.saves)
+    ).group_by(c.player_id)
+
+
+def _has_unique_player_key():
+    global _unique_player_key
+    if not _unique_player_key:
+        indexes = inspect(db.session.connection()).get_indexes("player_stats")
+        _unique_player_key = any(i["name"] == "uq_player_stats_player" for i in indexes)
+    return _unique_player_key
+
+
+def _upsert_statement(rows):
+    """
+    INSERT ... ON DUPLICATE KEY UPDATE (MySQL) / ON CONFLICT DO UPDATE
+    (SQLite, PostgreSQL) on the unique player_stats.player_id. None when
+    the database has no such key yet or no upsert syntax.
+    """
+    if not _has_unique_player_key():
+        return None
+
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ("mysql", "mariadb"):
+        stmt = mysql.insert(PlayerStats).values(rows)
+        return stmt.on_duplicate_key_update({f: stmt.inserted[f] for f in STAT_FIELDS})
+
+    if dialect in ("sqlite", "postgresql"):
+        module = sqlite if dialect == "sqlite" else postgresql
+        stmt = module.insert(PlayerStats).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=["player_id"],
+            set_={f: stmt.excluded[f] for f in STAT_FIELDS}
+        )
+
+    return None
+
+
+def refresh_player_stats(player_ids=None):
+    """
+    Recompute PlayerStats from the ledger — for `player_ids`, or for
+    everyone when None. A fixed number of statements whatever the
+    number of players: the grouped SELECT, one bulk upsert (per
+    UPSERT_CHUNK players) and one UPDATE zeroing players left with no
+    ledger rows. Part of the caller's transaction.
+    """
+    if player_ids is not None:
+        player_ids = list(player_ids)
+        if not player_ids:
+            return 0
+
+    rows = [
+        dict(zip(STAT_FIELDS, (v or 0 for v in values)), player_id=pid)
+        for pid, *values in db.session.execute(_totals_query(player_ids))
+    ]
+
+    for i in range(0, len(rows), UPSERT_CHUNK):
+        chunk = rows[i:i + UPSERT_CHUNK]
+        stmt = _upsert_statement(chunk)
+        if stmt is not None:
+            db.session.execute(stmt)
+        else:
+            # no unique key yet / other databases: merge row by row
+            for row in chunk:
+                stats = PlayerStats.query.filter_by(player_id=row["player_id"]).first()
+                if not stats:
+                    stats = PlayerStats(player_id=row["player_id"])
+                    db.session.add(stats)
+                for field in STAT_FIELDS:
+                    setattr(stats, field, row[field])
+
+    stale = PlayerStats.query.filter(
+        PlayerStats.player_id.notin_([r["player_id"] for r in rows])
+    )
+    if player_ids is not None:
+        stale = stale.filter(PlayerStats.player_id.in_(player_ids))
+    stale.update({f: 0 for f in STAT_FIELDS}, synchronize_session=False)
+
+    # the upsert bypasses the ORM; refresh PlayerStats loaded earlier
+    for obj in list(db.session.identity_map.values()):
+        if isinstance(obj, PlayerStats):
+            db.session.expire(obj)
+    return len(rows)
+
+
+def record_match_stats(match_id):
+    """Approval hook: ledger rows for the match, then the affected totals."""
+    refresh_player_stats(write_match_ledger(match_id))
+
+
+# ----------------------------------------------------
+# BACKFILL
+# ----------------------------------------------------
+def backfill_ledger():
+    """
+    Ledger rows for every approved match (their scorecards are kept),
+    then a full PlayerStats rebuild. Safe to re-run; the caller commits.
+    """
+    match_ids = [
+        mid for (mid,) in db.session.query(Match.id).filter(Match.status == "completed")
+    ]
+    for mid in match_ids:
+        write_match_ledger(mid)
+
+    return len(match_ids), refresh_player_stats()
@@ -0,0 +1,171 @@
+from sqlalchemy import and_, case, func, insert, literal, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from models import db, Message, ChatGroupMember, UserInboxCounter
+
+# group_id used for the direct-message counter row
+DIRECT = 0
+
+
+# ----------------------------------------------------
+# READ (PRIMARY-KEY LOOKUPS)
+# ----------------------------------------------------
+def get_unread_counts(user_id):
+    rows = UserInboxCounter.query.filter_by(user_id=user_id).all()
+
+    direct = 0
+    groups = {}
+    for r in rows:
+        if r.group_id == DIRECT:
+            direct = r.unread
+        elif r.unread:
+            groups[r.group_id] = r.unread
+
+    return {"total": direct, "groups": groups, "group_total": sum(groups.values())}
+
+
+# ----------------------------------------------------
+# WRITE HOOKS
+# Call before the commit that stores / reads the messages, so the counter
+# moves in the same transaction.
+# ----------------------------------------------------
+def _increment_statement(user_ids, group_id, delta):
+    """
+    INSERT ... ON DUPLICATE KEY UPDATE (MySQL) / ON CONFLICT DO UPDATE
+    (SQLite, PostgreSQL) adding `delta` to each user's counter, so two
+    first messages to the same user can't race on the primary key.
+    None when the database has no upsert syntax.
+    """
+    rows = [{"user_id": uid, "group_id": group_id, "unread": delta} for uid in sorted(user_ids)]
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ("mysql", "mariadb"):
+        stmt = mysql.insert(UserInboxCounter).values(rows)
+        return stmt.on_duplicate_key_update(unread=UserInboxCounter.unread + delta)
+
+    if dialect in ("sqlite", "postgresql"):
+        module = sqlite if dialect == "sqlite" else postgresql
+        stmt = module.insert(UserInboxCounter).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=["user_id", "group_id"],
+            set_={"unread": UserInboxCounter.unread + delta}
+        )
+
+    return None
+
+
+def _add(user_ids, group_id, delta):
+    user_ids = {int(u) for u in user_ids if u}
+    if not user_ids:
+        return
+
+    if delta > 0:
+        stmt = _increment_statement(user_ids, group_id, delta)
+        if stmt is not None:
+            db.session.execute(stmt)
+            return
+
+    existing = {
+        uid for (uid,) in db.session.query(UserInboxCounter.user_id).filter(
+            UserInboxCounter.user_id.in_(user_ids),
+            UserInboxCounter.group_id == group_id
+        )
+    }
+
+    if existing:
+        new_value = UserInboxCounter.unread + delta
+        UserInboxCounter.query.filter(
+            UserInboxCounter.user_id.in_(existing),
+            UserInboxCounter.group_id == group_id
+        ).update(
+            {UserInboxCounter.unread: case((new_value > 0, new_value), else_=0)},
+            synchronize_session=False
+        )
+
+    if delta > 0:
+        for uid in user_ids - existing:
+            db.session.add(UserInboxCounter(user_id=uid, group_id=group_id, unread=delta))
+
+
+def record_direct_message(receiver_id):
+    _add([receiver_id], DIRECT, 1)
+
+
+def record_group_message(group_id, sender_id):
+    members = [
+        m.user_id for m in ChatGroupMember.query.filter_by(group_id=group_id)
+        if m.user_id != sender_id
+    ]
+    _add(members, int(group_id), 1)
+
+
+def mark_direct_read(user_id, count=1):
+    if count:
+        _add([user_id], DIRECT, -count)
+
+
+def mark_group_read(user_id, group_id):
+    UserInboxCounter.query.filter_by(
+        user_id=user_id, group_id=group_id
+    ).update({UserInboxCounter.unread: 0}, synchronize_session=False)
+
+
+# ----------------------------------------------------
+# REPAIR
+# ----------------------------------------------------
+def rebuild_direct_counters():
+    """
+    Recompute every direct-message counter from `messages` in one
+    INSERT ... SELECT. Safe to re-run; the caller commits.
+    """
+    UserInboxCounter.query.filter_by(group_id=DIRECT).delete(synchronize_session=False)
+
+    counts = select(
+        Message.receiver_id, literal(DIRECT), func.count(Message.id)
+    ).where(
+        Message.receiver_id.isnot(None),
+        Message.is_read == False,
+        Message.is_deleted == False
+    ).group_by(Message.receiver_id)
+
+    db.session.execute(
+        insert(UserInboxCounter).from_select(["user_id", "group_id", "unread"], counts)
+    )
+
+    return UserInboxCounter.query.filter_by(group_id=DIRECT).count()
+
+
+def rebuild_group_counters():
+    """
+    Recompute every group counter from `messages`. Group messages carry no
+    per-member read state, so a member's own latest post in the group
+    stands in for it: messages from others after that post count as
+    unread. Safe to re-run; the caller commits.
+    """
+    UserInboxCounter.query.filter(
+        UserInboxCounter.group_id != DIRECT
+    ).delete(synchronize_session=False)
+
+    last_post = select(func.max(Message.id)).where(
+        Message.group_id == ChatGroupMember.group_id,
+        Message.sender_id == ChatGroupMember.user_id
+    ).correlate(ChatGroupMember).scalar_subquery()
+
+    counts = select(
+        ChatGroupMember.user_id, ChatGroupMember.group_id, func.count(Message.id.distinct())
+    ).join(
+        Message, and_(
+            Message.group_id == ChatGroupMember.group_id,
+            Message.sender_id != ChatGroupMember.user_id,
+            Message.is_deleted == False,
+            Message.id > func.coalesce(last_post, 0)
+        )
+    ).where(
+        ChatGroupMember.user_id.isnot(None)
+    ).group_by(ChatGroupMember.user_id, ChatGroupMember.group_id)
+
+    db.session.execute(
+        insert(UserInboxCounter).from_select(["user_id", "group_id", "unread"], counts)
+    )
+
+    return UserInboxCounter.query.filter(UserInboxCounter.group_id != DIRECT).count()